@@ -0,0 +1,249 @@
+#!/usr/bin/python3
+'''
+Command line backtest runner, for scripts, cron jobs and batch pipelines.
+
+    python3 -m backtest savedBots/myBot.json --coin ETH --start 2017-01-01 --end 2018-01-01
+    python3 -m backtest savedBots/myBot.json --data prices.csv --stats stats.csv --history history.json
+    python3 -m backtest savedBots/myBot.json --rolling rolling.csv --window 90
+    python3 -m backtest savedBots/myBot.json --monte-carlo 1000 --method gbm --stats distribution.csv
+    python3 -m backtest savedBots/myBot.json --coins BTC ETH LTC ZEC --cash-mode pool --stats portfolio.csv
+
+Only the bots, the data layer and the Analyser are imported, never the GUI.
+'''
+import sys, os, json, csv, argparse
+from datetime import datetime
+
+import bots
+import fetchData
+import exceptions
+import monteCarlo
+import portfolio
+from core import resultCache, checkpoints, chunked, profiling
+from statistics.algorithmAnalysis import Analyser, jsonSafe
+from statistics import rollingAnalysis
+
+
+def loadBot(path):
+    '''
+        returns a bot made from a saved bot file
+    '''
+    with open(path, 'r') as f:
+        botData = json.load(f)
+    bot = bots.createBot(botData['Bot Type'])
+    bot.setSaveData(botData)
+    return bot
+
+def loadData(args):
+    if args.data is not None:
+        return fetchData.readData(args.data, args.compact or args.float32, args.float32)
+    return fetchData.getData(args.exchange, args.resolution, args.coin, args.compact or args.float32, args.float32)
+
+def historyRows(buySellData):
+    '''
+        returns the backtest history as a list of dicts, one per data point
+    '''
+    rows = []
+    for state in buySellData:
+        date = state.getDateStamp()
+        rows.append({
+            'Date': date.strftime('%Y-%m-%d') if hasattr(date, 'strftime') else str(date),
+            'Market Price': state.getMarketPrice(),
+            'Cash': state.getCashBalance(),
+            'Coins': state.getCoinAmount(),
+            'Portfolio Value': state.getPortfolioValue(),
+            'Action': state.getAction().name,
+        })
+    return rows
+
+def portfolioRows(portfolioHistory, pooled):
+    '''
+        returns the statistics of a portfolio.PortfolioHistory as a list of dicts,
+        the combined portfolio first, then each coin
+        Pooled coins' histories all hold the shared cash, so only their coins and trades are given
+    '''
+    rows = [dict(Coin='Portfolio', **Analyser(portfolioHistory).getSummary())]
+    for coin in portfolioHistory.getCoins():
+        history = portfolioHistory.getHistoryOfCoin(coin)
+        if not pooled:
+            rows.append(dict(Coin=coin, **Analyser(history).getSummary()))
+        else:
+            coins = history.getLatestDataPoint().getCoinAmount() if len(history) > 0 else 0
+            rows.append({'Coin': coin, 'Final Coin Amount': coins, 'Number of Trades': portfolioHistory.getNumTrades(coin)})
+    return rows
+
+def distributionRows(summary):
+    '''
+        returns the summary of a monteCarlo.MonteCarloResult as a list of dicts, one per metric
+    '''
+    rows = []
+    for metric, stats in summary.items():
+        row = {'Metric': metric, 'Mean': stats['mean'], 'Std': stats['std'], 'Min': stats['min'], 'Max': stats['max']}
+        for percentile, value in stats['percentiles'].items():
+            row[f'P{percentile}'] = value
+        rows.append(row)
+    return rows
+
+def _outputFormat(path, default):
+    if path is not None and path.lower().endswith('.csv'):
+        return 'csv'
+    if path is not None and path.lower().endswith('.json'):
+        return 'json'
+    return default
+
+def writeRows(rows, path, outputFormat):
+    '''
+        writes a list of dicts as JSON or CSV, to the file at path or to stdout if path is None
+        Infinite and NaN numbers are written to JSON as null
+    '''
+    f = open(path, 'w', newline='') if path is not None else sys.stdout
+    try:
+        if outputFormat == 'csv':
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()) if rows else [])
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            rows = [jsonSafe(row) for row in rows]
+            json.dump(rows if len(rows) != 1 else rows[0], f, indent=2, allow_nan=False)
+            f.write('\n')
+    finally:
+        if path is not None:
+            f.close()
+
+def _parseDate(text):
+    return datetime.strptime(text, '%Y-%m-%d')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='backtest', description='Backtest a saved bot without the GUI')
+    parser.add_argument('bot', help='saved bot file (.json)')
+    parser.add_argument('--coin', default='ETH', help='coin to download or read from the data folder')
+    parser.add_argument('--exchange', default='Gemini')
+    parser.add_argument('--resolution', default='day', choices=['day', 'hour', 'minute'])
+    parser.add_argument('--data', default=None, help='CSV file in the cryptodatadownload.com layout, instead of --coin')
+    parser.add_argument('--start', type=_parseDate, default=None, help='Start Trading Date, YYYY-MM-DD')
+    parser.add_argument('--end', type=_parseDate, default=None, help='End Trading Date, YYYY-MM-DD')
+    parser.add_argument('--stats', default=None, help='file to write the statistics to, stdout by default')
+    parser.add_argument('--history', default=None, help='file to write the trading history to')
+    parser.add_argument('--rolling', default=None,
+                        help='file to write the rolling return, volatility, Sharpe ratio and drawdown of each data point to')
+    parser.add_argument('--window', type=int, default=rollingAnalysis.defaultWindow,
+                        help='number of data points in the --rolling window, at least 3 (default %(default)s)')
+    parser.add_argument('--format', default=None, choices=['json', 'csv'],
+                        help='output format, by default taken from the file extension, otherwise json')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='always run the backtest, instead of reusing a cached result')
+    parser.add_argument('--cache-stats', action='store_true',
+                        help='print the hit rate and size of the result cache after the run')
+    parser.add_argument('--compact', action='store_true',
+                        help='load only the columns the bots use, with typed dates, to save memory')
+    parser.add_argument('--float32', action='store_true',
+                        help='like --compact, with the prices as float32, which can change results slightly')
+    parser.add_argument('--chunked', type=int, default=None, metavar='ROWS',
+                        help='read --data ROWS rows at a time instead of loading it all, for files too big for memory')
+    parser.add_argument('--checkpoints', action='store_true',
+                        help='carry on from the checkpoints of an earlier run of this bot with an earlier End Trading Date '
+                             'or less data, and save checkpoints for the next run')
+    parser.add_argument('--profile', nargs='?', const=profiling.profileDirectory, default=None, metavar='DIR',
+                        help='profile the run with cProfile, without the result cache, and save a .pstats file and '
+                             'collapsed stacks for flame graphs in DIR (default %(const)s)')
+    parser.add_argument('--monte-carlo', type=int, default=None, metavar='PATHS',
+                        help='run the bot over PATHS price paths resampled from the data, and write the distribution '
+                             'of the final value, max drawdown and number of trades instead of one backtest\'s statistics')
+    parser.add_argument('--method', default='bootstrap', choices=['bootstrap', 'gbm'],
+                        help='how --monte-carlo makes its paths, a block bootstrap of the returns or a geometric '
+                             'brownian motion fitted to them (default %(default)s)')
+    parser.add_argument('--seed', type=int, default=None, help='random seed for --monte-carlo')
+    parser.add_argument('--coins', nargs='+', default=None,
+                        help='run the bot over each of these coins as one portfolio, instead of --coin, and write the '
+                             'statistics of the portfolio and of each coin')
+    parser.add_argument('--cash-mode', default='split', choices=['split', 'pool'],
+                        help='whether --coins each trade an equal share of the Cash Amount, or all trade out of '
+                             'one balance of it (default %(default)s)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes for --monte-carlo and --coins, one per CPU by default')
+    args = parser.parse_args(argv)
+
+    bot = loadBot(args.bot)
+    if args.start is not None:
+        bot.changeParam('Start Trading Date', args.start)
+    if args.end is not None:
+        bot.changeParam('End Trading Date', args.end)
+
+    if args.chunked is not None and args.data is None:
+        parser.error('--chunked needs --data')
+    if args.window < 3:
+        parser.error('--window must be at least 3')
+    if args.monte_carlo is not None:
+        if args.monte_carlo < 1:
+            parser.error('--monte-carlo needs at least 1 path')
+        if args.chunked is not None or args.checkpoints or args.profile is not None:
+            parser.error('--monte-carlo can\'t be used with --chunked, --checkpoints or --profile')
+        if args.history is not None or args.rolling is not None:
+            parser.error('--monte-carlo has no single history for --history or --rolling')
+    if args.coins is not None:
+        if args.data is not None or args.monte_carlo is not None:
+            parser.error('--coins can\'t be used with --data or --monte-carlo')
+        if args.chunked is not None or args.checkpoints or args.profile is not None:
+            parser.error('--coins can\'t be used with --chunked, --checkpoints or --profile')
+
+    def run():
+        if args.chunked is not None:
+            return chunked.runChunked(bot, args.data, args.chunked)
+        elif args.checkpoints:
+            return checkpoints.runWithCheckpoints(bot, loadData(args))
+        elif args.no_cache or args.profile is not None:
+            return bot.processHistoricalData(loadData(args))
+        else:
+            return resultCache.runCached(bot, loadData(args))
+
+    def runMonteCarlo():
+        method = monteCarlo.PathMethod.GBM if args.method == 'gbm' else monteCarlo.PathMethod.BOOTSTRAP
+        simulation = monteCarlo.MonteCarloSimulation(bot, loadData(args), method, seed=args.seed)
+        return simulation.run(args.monte_carlo, workers=args.workers,
+                              progressCallback=lambda done, total: print(f"{done}/{total} paths", file=sys.stderr))
+
+    def runPortfolio():
+        dataByCoin = {coin: fetchData.getData(args.exchange, args.resolution, coin, args.compact or args.float32, args.float32)
+                      for coin in args.coins}
+        allocation = portfolio.CashAllocation.POOL if args.cash_mode == 'pool' else portfolio.CashAllocation.SPLIT
+        return portfolio.PortfolioBacktest(bot, dataByCoin, allocation).run(args.workers)
+
+    try:
+        bot.checkParameters()
+        if args.monte_carlo is not None:
+            result = runMonteCarlo()
+        elif args.coins is not None:
+            buySellData = runPortfolio()
+        elif args.profile is not None:
+            buySellData, report = profiling.profileCall(run, bot.getName(), args.profile)
+            print(profiling.formatTopFunctions(report.getTopFunctions()), file=sys.stderr)
+            print(f"Profile saved to {report.getPstatsPath()} and {report.getCollapsedPath()}", file=sys.stderr)
+        else:
+            buySellData = run()
+    except IndexError:
+        print('Invalid Dates - the data does not cover the trading window', file=sys.stderr)
+        return 2
+    except (exceptions.InvalidStartEndDates, exceptions.InvalidMovingAvgs, exceptions.InvalidDays,
+            exceptions.InvalidIntervals, exceptions.InvalidThresholds) as e:
+        print('Invalid bot parameters - ' + type(e).__name__, file=sys.stderr)
+        return 2
+
+    if args.monte_carlo is not None:
+        writeRows(distributionRows(result.getSummary()), args.stats, args.format or _outputFormat(args.stats, 'json'))
+        return 0
+
+    if args.coins is not None:
+        writeRows(portfolioRows(buySellData, args.cash_mode == 'pool'), args.stats, args.format or _outputFormat(args.stats, 'json'))
+    else:
+        writeRows([Analyser(buySellData).getSummary()], args.stats, args.format or _outputFormat(args.stats, 'json'))
+    if args.history is not None:
+        writeRows(historyRows(buySellData), args.history, args.format or _outputFormat(args.history, 'json'))
+    if args.rolling is not None:
+        rolling = rollingAnalysis.rollingAnalytics(buySellData, args.window)
+        writeRows(rolling.getRows(), args.rolling, args.format or _outputFormat(args.rolling, 'json'))
+    if args.cache_stats:
+        print(resultCache.formatStats(resultCache.getDefaultCache().getStats()), file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,78 @@
+#!/usr/bin/python3
+'''
+Import-time benchmark for the GUI-free modules.
+
+Each module is imported in a fresh interpreter with -X importtime. The benchmark
+fails (exit status 1) if any of them pulls in a GUI or plotting package, or if
+`import bots` takes longer than --max-ms.
+
+    python3 -m benchmarks.importTime
+'''
+import sys, os, subprocess, argparse
+
+# modules which must be importable without a display stack
+headlessModules = [
+    'bots',
+    'core.bots',
+    'statistics.algorithmAnalysis',
+    'fetchData',
+    'backtest',
+    'jobQueue',
+    'monteCarlo',
+    'portfolio',
+]
+
+forbiddenPackages = ['PyQt5', 'plotly', 'qdarkstyle', 'tkinter']
+
+repoRoot = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measureImport(module):
+    '''
+        imports module in a new interpreter
+        returns (total import time in ms, list of the names of every module imported)
+    '''
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+                            cwd=repoRoot, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError('Could not import ' + module + ':\n' + result.stderr)
+
+    imported = []
+    total = 0
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        fields = line[len('import time:'):].split('|')
+        name = fields[2].strip()
+        imported.append(name)
+        if name == module:
+            total = int(fields[1]) / 1000
+    return total, imported
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check that the engine imports quickly and without the GUI')
+    parser.add_argument('--max-ms', type=float, default=150,
+                        help='fail if importing bots takes longer than this many milliseconds')
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in headlessModules:
+        total, imported = measureImport(module)
+        forbidden = sorted(set(name for name in imported
+                               if name.split('.')[0] in forbiddenPackages))
+        status = 'ok'
+        if forbidden:
+            status = 'FAIL imports ' + ', '.join(forbidden)
+            failed = True
+        elif module == 'bots' and total > args.max_ms:
+            status = 'FAIL slower than {} ms'.format(args.max_ms)
+            failed = True
+        print('{:32s} {:8.1f} ms  {}'.format(module, total, status))
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/python3
+'''
+Parity check and timing for the ledger kernels in core.ledgerKernel.
+
+Every bot is run on random data with random parameters, and the BacktestHistory from
+the kernel is compared with the one from the bot's own ledger. If numba is installed
+the compiled kernels are also compared with the plain Python ones. Exits with status 1
+on any difference. Then times a sweep of the ledger over --bars random signals.
+
+    python3 -m benchmarks.ledgerKernelParity --runs 200 --bars 1000000
+'''
+import sys, io, time, random, argparse, contextlib
+from datetime import datetime, timedelta
+
+from core import bots, ledgerKernel
+from benchmarks.syntheticData import makeData
+
+botTypes = ['ROC', 'RSI', 'TMA', 'SMA', 'DEMA']
+
+
+def randomParameters(rng, botType):
+    start = datetime(2016, 1, 1) + timedelta(days=rng.randint(0, 200))
+    parameters = {
+        'Start Trading Date': start,
+        'End Trading Date': start + timedelta(days=rng.randint(60, 400)),
+        'Fee Per Trade': rng.uniform(0, 2),
+        'Amount To Trade': rng.uniform(50, 3000),
+        'Stop Loss': rng.uniform(1, 60),
+        'Cash Amount': rng.uniform(500, 20000),
+    }
+    if botType == 'ROC':
+        parameters.update({'Short ROC Interval': rng.randint(1, 8), 'Long ROC Interval': rng.randint(9, 40),
+                           'Consecutive Day Run': rng.randint(1, 4)})
+    elif botType == 'RSI':
+        parameters.update({'Upper Threshold': rng.randint(55, 80), 'Lower Threshold': rng.randint(20, 45),
+                           'Moving Avg Window Size': rng.randint(3, 20)})
+    elif botType == 'TMA':
+        parameters.update({'Short Moving Avg Days': rng.randint(2, 8), 'Medium Moving Avg Days': rng.randint(9, 20),
+                           'Long Moving Avg Days': rng.randint(21, 50)})
+    else:
+        parameters.update({'Short Moving Avg Days': rng.randint(2, 15), 'Long Moving Avg Days': rng.randint(16, 50)})
+    return parameters
+
+def historyRows(buySellData):
+    return [(s.getDateStamp(), s.getCashBalance(), s.getCoinAmount(), s.getMarketPrice(), s.getAction())
+            for s in buySellData]
+
+def checkParity(runs, seed):
+    '''
+        returns the number of runs where the kernel didn't match the bot's ledger
+    '''
+    rng = random.Random(seed)
+    failures = 0
+    for run in range(runs):
+        botType = botTypes[run % len(botTypes)]
+        data = makeData(900, seed=run % 7, numGaps=10 if run % 3 == 0 else 0)
+        parameters = randomParameters(rng, botType)
+        bot = bots.createBot(botType, parameters)
+        signalStream = bot.getSignals(data)
+        with contextlib.redirect_stdout(io.StringIO()):
+            expected = historyRows(bot.runLedger(signalStream))
+        expectedCash = bot.cashAmount
+
+        bot = bots.createBot(botType, parameters)
+        actual = historyRows(ledgerKernel.runLedger(bot, signalStream))
+        if actual != expected or bot.cashAmount != expectedCash:
+            failures += 1
+            print('Mismatch', botType, parameters, len(expected), len(actual))
+
+        if ledgerKernel.isCompiled():
+            arrays = ledgerKernel.signalArrays(signalStream)
+            kernel = ledgerKernel._kernels[botType]
+            args = (arrays[1], arrays[2], arrays[3], 10000.0, 0.5, 300.0, 20.0)
+            if kernel is ledgerKernel.crossoverLedger:
+                args = args[:3] + (False, 0.0, 0, 0) + args[3:]
+            compiled, plain = kernel(*args), kernel.py_func(*args)
+            if any((a != b).any() if hasattr(a, 'any') else a != b for a, b in zip(compiled, plain)):
+                failures += 1
+                print('Compiled kernel differs from plain Python', botType)
+    return failures
+
+def timeSweep(numBars, seed):
+    '''
+        returns the bars per second of each kernel on numBars random signals
+    '''
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    prices = 100*np.exp(np.cumsum(rng.normal(0, 0.01, numBars)))
+    buys = (rng.random(numBars) < 0.05).astype(np.int8)
+    sells = ((rng.random(numBars) < 0.05) & (buys == 0)).astype(np.int8)
+    prices, buys, sells = [ledgerKernel.kernelInput(a) for a in (prices, buys, sells)]
+    rates = {}
+    for name, kernel, extra in [('roc', ledgerKernel.rocLedger, ()), ('rsi', ledgerKernel.rsiLedger, ()),
+                                ('crossover', ledgerKernel.crossoverLedger, (False, 0.0, 0, 0))]:
+        kernel(prices[:10], buys[:10], sells[:10], *extra, 10000.0, 0.1, 100.0, 99.0) # compile
+        startTime = time.perf_counter()
+        kernel(prices, buys, sells, *extra, 1e9, 0.1, 100.0, 99.0)
+        rates[name] = numBars / (time.perf_counter() - startTime)
+    return rates
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check the ledger kernels match the bots, and time them')
+    parser.add_argument('--runs', type=int, default=100)
+    parser.add_argument('--bars', type=int, default=1000000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    failures = checkParity(args.runs, args.seed)
+    print(f"{args.runs} runs, {failures} mismatches, kernels {'compiled with numba' if ledgerKernel.isCompiled() else 'running as plain Python'}")
+    for name, rate in timeSweep(args.bars, args.seed).items():
+        print(f"{name:10} {rate/1e6:8.2f} million bars/s")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,214 @@
+#!/usr/bin/python3
+'''
+Memory benchmark for each stage of a backtest.
+
+For each dataset size, records how much memory loading, normalising (the compact load
+mode's dtype conversion), each bot's run, the Analyser stats and building the graph's
+figure take at their peak and still hold once they've finished. Python allocations are
+traced with tracemalloc, and the resident set size of the process is sampled alongside,
+which also catches memory numpy and pandas allocate outside the Python heap.
+Results are saved as JSON in benchmarks/results, named after the current commit.
+
+    python3 -m benchmarks.memory --sizes 1000 10000 100000
+    python3 -m benchmarks.memory --compare benchmarks/results/old.json benchmarks/results/new.json
+'''
+import sys, os, io, gc, json, time, platform, argparse, threading, contextlib, tracemalloc
+from datetime import timedelta
+
+from core import bots
+import fetchData
+from statistics.algorithmAnalysis import Analyser
+from graph import figures
+from benchmarks.throughput import botTypes, datasetPath, datasetStart, getCommit, statisticsTables, resultsDirectory
+
+defaultSizes = [1000, 10000, 100000]
+megabyte = 1024*1024
+
+
+def getRss():
+    '''
+        returns the resident set size of this process in bytes, or None where it can't be read
+    '''
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class RssSampler:
+    '''
+    Samples the resident set size on another thread every interval seconds, keeping the highest
+    '''
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.peak = getRss()
+        self.running = False
+        self.thread = None
+
+    def __enter__(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._sample, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.running = False
+        self.thread.join()
+        self._update()
+
+    def _update(self):
+        rss = getRss()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+
+    def _sample(self):
+        while self.running:
+            self._update()
+            time.sleep(self.interval)
+
+
+def measure(function):
+    '''
+        calls function and returns (memory dict in MB, its result)
+        peak is the most traced memory in use during the call above what was in use before it,
+        retained is what's still in use once it returns, while its result is kept
+    '''
+    gc.collect()
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    rssBefore = getRss()
+    with RssSampler() as sampler:
+        result = function()
+    gc.collect()
+    after, peak = tracemalloc.get_traced_memory()
+    memory = {'peak': (peak - before) / megabyte, 'retained': (after - before) / megabyte}
+    if rssBefore is not None:
+        memory['rssPeak'] = (sampler.peak - rssBefore) / megabyte
+        memory['rssRetained'] = (getRss() - rssBefore) / megabyte
+    return memory, result
+
+
+def buildFigure(data, history):
+    # what GraphView does after a simulation, without the window
+    fig = figures.makeCandlestickFigure(data, 'ETH')
+    figures.addPortfolioTrace(fig, history)
+    figures.addBuySellTraces(fig, history)
+    return fig, figures.figureHtml(fig, 'plotly-latest.min.js')
+
+
+def benchmarkSize(numBars, botList=botTypes):
+    '''
+        returns a dict of the memory used by each stage for one dataset size
+    '''
+    path = datasetPath(numBars)
+    result = {'bars': numBars}
+    result['load'], data = measure(lambda: fetchData.readData(path))
+    result['normalise'], compact = measure(lambda: fetchData.compactData(data))
+    del compact
+
+    start = datasetStart(numBars) + timedelta(days=60)
+    end = datasetStart(numBars) + timedelta(days=numBars - 2)
+    # plotly builds its validators the first time a figure is made, which shouldn't count against the first bot
+    figures.makeCandlestickFigure(data.head(2), 'ETH')
+    result['bots'] = {}
+    for botType in botList:
+        stages = {}
+        bot = bots.createBot(botType, {'Start Trading Date': start, 'End Trading Date': end, 'Stop Loss': 100.0})
+        # no cached signals, so the run is measured from scratch
+        bots.clearSignalCache()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                stages['run'], history = measure(lambda: bot.processHistoricalData(data))
+        except Exception as e:
+            stages['error'] = type(e).__name__ + ': ' + str(e)
+            result['bots'][botType] = stages
+            continue
+        stages['states'] = len(history)
+        stages['analyse'], _ = measure(lambda: (Analyser(history).getSummary(), statisticsTables(Analyser(history))))
+        stages['figure'], _ = measure(lambda: buildFigure(data, history))
+        result['bots'][botType] = stages
+        del history
+    bots.clearSignalCache()
+    return result
+
+
+def runBenchmarks(sizes, botList=botTypes, log=print):
+    results = {
+        'commit': getCommit(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'sizes': [],
+    }
+    tracemalloc.start()
+    try:
+        for numBars in sizes:
+            log(f"{numBars} bars")
+            sizeResult = benchmarkSize(numBars, botList)
+            for stage in ['load', 'normalise']:
+                log(f"  {stage:15} peak {sizeResult[stage]['peak']:8.2f}MB  retained {sizeResult[stage]['retained']:8.2f}MB")
+            for botType, stages in sizeResult['bots'].items():
+                if 'error' in stages:
+                    log(f"  {botType:5} skipped, {stages['error']}")
+                    continue
+                for stage in ['run', 'analyse', 'figure']:
+                    log(f"  {botType:5} {stage:9} peak {stages[stage]['peak']:8.2f}MB  retained {stages[stage]['retained']:8.2f}MB")
+            results['sizes'].append(sizeResult)
+    finally:
+        tracemalloc.stop()
+    return results
+
+
+def saveResults(results, path=None):
+    if path is None:
+        if not os.path.isdir(resultsDirectory):
+            os.makedirs(resultsDirectory)
+        path = os.path.join(resultsDirectory, f"memory-{results['commit']}.json")
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+    return path
+
+def _flatten(results):
+    # returns {(bars, bot, stage): peak MB}
+    flat = {}
+    for size in results['sizes']:
+        for stage in ['load', 'normalise']:
+            flat[(size['bars'], '', stage)] = size[stage]['peak']
+        for botType, stages in size['bots'].items():
+            for stage in ['run', 'analyse', 'figure']:
+                if stage in stages:
+                    flat[(size['bars'], botType, stage)] = stages[stage]['peak']
+    return flat
+
+def compareResults(oldPath, newPath, threshold=1.1):
+    '''
+        prints the peak traced memory of each stage in both results, marking any above threshold times the old peak
+        returns the number of regressions
+    '''
+    with open(oldPath) as f:
+        old = _flatten(json.load(f))
+    with open(newPath) as f:
+        new = _flatten(json.load(f))
+    regressions = 0
+    for key in sorted(set(old) & set(new)):
+        ratio = new[key] / old[key] if old[key] > 0 else 1
+        flag = ''
+        if ratio > threshold:
+            flag = '  MORE'
+            regressions += 1
+        print(f"{key[0]:>8} {key[1]:5} {key[2]:9} {old[key]:9.2f}MB -> {new[key]:9.2f}MB  x{ratio:5.2f}{flag}")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure the memory each stage of a backtest uses on synthetic data')
+    parser.add_argument('--sizes', type=int, nargs='+', default=defaultSizes)
+    parser.add_argument('--bots', nargs='+', default=botTypes, choices=botTypes)
+    parser.add_argument('--output', default=None, help='JSON file for the results, by default named after the commit')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two result files instead')
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compareResults(*args.compare) else 0)
+    results = runBenchmarks(args.sizes, args.bots)
+    print('Saved to', saveResults(results, args.output))
@@ -0,0 +1,289 @@
+#!/usr/bin/python3
+'''
+Differential parity check of every backtest engine against the legacy bots.
+
+benchmarks/legacyBots.py is a frozen copy of the bots from before they were optimised,
+and is the reference. Each run picks a dataset, a bot and random parameters, runs the
+reference and every engine, and compares the BacktestHistory they return: the dates and
+actions exactly, and the cash, coins and price to within a tolerance. For each run that
+differs the first divergence is printed. The statistics of each history are also checked
+against benchmarks/legacyAnalysis.py, a frozen copy of the Analyser.
+Exits with status 1 if any engine or statistic differs.
+
+The datasets are synthetic, plus any CSV files already downloaded to the data folder.
+To check a new engine, add a function taking (botType, parameters, dataset) and returning
+a BacktestHistory to engines.
+
+    python3 -m benchmarks.parity --runs 100
+    python3 -m benchmarks.parity --engines bots ledgerKernel --no-downloaded
+'''
+import sys, os, io, glob, math, time, random, shutil, argparse, tempfile, contextlib
+from datetime import timedelta
+
+import pandas as pd
+
+from core import bots, ledgerKernel, chunked, checkpoints, riskMetrics
+from core.resultCache import ResultCache
+from core.paperTrading import PaperTrader, ReplayFeed
+import fetchData
+from benchmarks import legacyBots, legacyAnalysis
+from statistics.algorithmAnalysis import Analyser, Period
+from benchmarks.syntheticData import makeData, writeData
+
+botTypes = ['ROC', 'RSI', 'TMA', 'SMA', 'DEMA']
+
+
+class Dataset:
+    '''
+    A dataframe of historical data, and the CSV file it's in, for the engines which read files
+    '''
+    def __init__(self, name, data, path):
+        self.name = name
+        self.data = data
+        self.path = path
+        dates = pd.to_datetime(data['Date'])
+        self.firstDate = dates.min().to_pydatetime()
+        self.lastDate = dates.max().to_pydatetime()
+
+
+def makeCorpus(directory, numSynthetic=6, numBars=700, downloaded=True):
+    '''
+        returns a list of Datasets, the synthetic ones written to directory
+    '''
+    corpus = []
+    for seed in range(numSynthetic):
+        data = makeData(numBars, seed=seed, numGaps=8 if seed % 2 else 0)
+        path = os.path.join(directory, f"synthetic_{seed}.csv")
+        writeData(data, path)
+        corpus.append(Dataset(f"synthetic seed {seed}" + (" with gaps" if seed % 2 else ""), data, path))
+    if downloaded:
+        for path in sorted(glob.glob(os.path.join(fetchData.dataDirectory, '*.csv'))):
+            try:
+                corpus.append(Dataset(os.path.basename(path), fetchData.readData(path), path))
+            except Exception as e:
+                print(f"Skipping {path}, {type(e).__name__}: {e}")
+    return corpus
+
+
+def randomParameters(rng, botType, dataset):
+    first = dataset.firstDate + timedelta(days=60)
+    last = dataset.lastDate - timedelta(days=2)
+    start = first + timedelta(days=rng.randint(0, max(0, (last - first).days - 60)))
+    parameters = {
+        'Start Trading Date': start,
+        'End Trading Date': min(last, start + timedelta(days=rng.randint(30, 400))),
+        'Fee Per Trade': rng.choice([0.0, rng.uniform(0, 2)]),
+        'Amount To Trade': rng.uniform(50, 3000),
+        'Stop Loss': rng.choice([100.0, rng.uniform(1, 60)]),
+        'Cash Amount': rng.uniform(500, 20000),
+    }
+    if botType == 'ROC':
+        parameters.update({'Short ROC Interval': rng.randint(1, 8), 'Long ROC Interval': rng.randint(9, 40),
+                           'Consecutive Day Run': rng.randint(1, 4)})
+    elif botType == 'RSI':
+        parameters.update({'Upper Threshold': rng.randint(55, 80), 'Lower Threshold': rng.randint(20, 45),
+                           'Moving Avg Window Size': rng.randint(3, 20)})
+    elif botType == 'TMA':
+        parameters.update({'Short Moving Avg Days': rng.randint(2, 8), 'Medium Moving Avg Days': rng.randint(9, 20),
+                           'Long Moving Avg Days': rng.randint(21, 50)})
+    else:
+        parameters.update({'Short Moving Avg Days': rng.randint(2, 15), 'Long Moving Avg Days': rng.randint(16, 50)})
+    return parameters
+
+
+def runReference(botType, parameters, dataset):
+    bot = getattr(legacyBots, botType)()
+    for name, value in parameters.items():
+        bot.changeParam(name, value)
+    return bot.processHistoricalData(dataset.data)
+
+
+# the engines, each returns the BacktestHistory of botType with parameters on dataset
+
+def runBots(botType, parameters, dataset):
+    bots.clearSignalCache()
+    return bots.createBot(botType, parameters).processHistoricalData(dataset.data)
+
+def runCachedSignals(botType, parameters, dataset):
+    # the signals come from the cache, filled by a run with different execution parameters
+    bots.clearSignalCache()
+    other = dict(parameters)
+    other.update({'Cash Amount': parameters['Cash Amount']*2 + 1, 'Fee Per Trade': 1.5, 'Stop Loss': 100.0})
+    bots.createBot(botType, other).processHistoricalData(dataset.data)
+    return bots.createBot(botType, parameters).processHistoricalData(dataset.data)
+
+def runLedgerKernel(botType, parameters, dataset):
+    bot = bots.createBot(botType, parameters)
+    return ledgerKernel.runLedger(bot, bot.getSignals(dataset.data))
+
+def runPaperTrading(botType, parameters, dataset):
+    return PaperTrader(bots.createBot(botType, parameters), ReplayFeed(dataset.data)).run()
+
+def runChunked(botType, parameters, dataset):
+    with tempfile.TemporaryDirectory() as directory:
+        return chunked.runChunked(bots.createBot(botType, parameters), dataset.path, chunkSize=97,
+                                  columnsPath=os.path.join(directory, 'columns.bin'))
+
+def runCheckpoints(botType, parameters, dataset):
+    # checkpoints from a run ending earlier, then the run resumed from them
+    with tempfile.TemporaryDirectory() as directory:
+        store = ResultCache(directory)
+        earlier = dict(parameters)
+        days = (parameters['End Trading Date'] - parameters['Start Trading Date']).days
+        earlier['End Trading Date'] = parameters['Start Trading Date'] + timedelta(days=days*2//3)
+        checkpoints.runWithCheckpoints(bots.createBot(botType, earlier), dataset.data, store, interval=50)
+        return checkpoints.runWithCheckpoints(bots.createBot(botType, parameters), dataset.data, store, interval=50)
+
+engines = {
+    'bots': runBots,
+    'cachedSignals': runCachedSignals,
+    'ledgerKernel': runLedgerKernel,
+    'paperTrading': runPaperTrading,
+    'chunked': runChunked,
+    'checkpoints': runCheckpoints,
+}
+
+
+def _toDay(value):
+    if isinstance(value, str):
+        return pd.Timestamp(value).date()
+    return value.date() if hasattr(value, 'date') else value
+
+def historyRows(buySellData):
+    return [(_toDay(s.getDateStamp()), s.getAction().name, s.getCashBalance(), s.getCoinAmount(), s.getMarketPrice())
+            for s in buySellData]
+
+def riskMetricsDivergence(buySellData):
+    '''
+        returns None if the risk metrics kept as the history was built match those worked out
+        from the finished history, otherwise the name of the first metric which differs
+    '''
+    expected = riskMetrics.fromHistory(buySellData).getSummary()
+    for name, value in buySellData.getRiskMetrics().getSummary().items():
+        if not math.isclose(value, expected[name], rel_tol=1e-9, abs_tol=1e-9):
+            return name
+    return None
+
+def runEngine(engine, botType, parameters, dataset, checkRiskMetrics=True):
+    '''
+        returns ('rows', history rows) or ('error', name of the exception raised)
+        An engine whose history has the wrong risk metrics gives ('error', 'risk metrics: name of the metric'),
+        the legacy bots don't keep them so checkRiskMetrics is False for the reference
+    '''
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            buySellData = engine(botType, parameters, dataset)
+    except Exception as e:
+        return 'error', type(e).__name__
+    metric = riskMetricsDivergence(buySellData) if checkRiskMetrics else None
+    if metric is not None:
+        return 'error', 'risk metrics: ' + metric
+    return 'rows', historyRows(buySellData)
+
+fields = ['date', 'action', 'cash', 'coin', 'price']
+
+def firstDivergence(expected, actual, tolerance=1e-9):
+    '''
+        returns None if the outcomes match, otherwise a dict describing the first difference
+    '''
+    if expected[0] != actual[0] or expected[0] == 'error':
+        if expected == actual:
+            return None
+        return {'index': None, 'field': 'outcome', 'expected': expected[1] if expected[0] == 'error' else 'history',
+                'actual': actual[1] if actual[0] == 'error' else 'history'}
+    expectedRows, actualRows = expected[1], actual[1]
+    for i, (a, b) in enumerate(zip(expectedRows, actualRows)):
+        for field, x, y in zip(fields, a, b):
+            same = math.isclose(x, y, rel_tol=tolerance, abs_tol=tolerance) if field in ['cash', 'coin', 'price'] else x == y
+            if not same:
+                return {'index': i, 'field': field, 'date': a[0], 'expected': x, 'actual': y}
+    if len(expectedRows) != len(actualRows):
+        i = min(len(expectedRows), len(actualRows))
+        row = expectedRows[i] if i < len(expectedRows) else actualRows[i]
+        return {'index': i, 'field': 'length', 'date': row[0], 'expected': len(expectedRows), 'actual': len(actualRows)}
+    return None
+
+
+def analyserDivergence(buySellData):
+    '''
+        returns None if the Analyser gives the same statistics as the legacy Analyser for the history,
+        otherwise the name of the first statistic which differs
+        Only the periods the legacy Analyser got right are compared
+    '''
+    if len(buySellData) == 0:
+        return None
+    legacy, current = legacyAnalysis.Analyser(buySellData), Analyser(buySellData)
+    # the legacy summary doesn't have the risk metrics
+    summary = current.getSummary()
+    checks = [('summary', legacy.getSummary(), {k: summary[k] for k in legacy.getSummary()}),
+              ('max drawdown ($)', legacy.getMaxDrawdown(False), current.getMaxDrawdown(False)),
+              ('streamed max drawdown (%)', legacy.getMaxDrawdown(), buySellData.getRiskMetrics().getMaxDrawdown())]
+    for name in ['DAILY', 'MONTHLY', 'TOTAL']:
+        legacyPeriod, period = getattr(legacyAnalysis.Period, name), getattr(Period, name)
+        checks.append((name + ' gain ($)', legacy.getGain(legacyPeriod, False), current.getGain(period, False)))
+        checks.append((name + ' gain (%)', legacy.getGain(legacyPeriod, True), current.getGain(period, True)))
+        for action in bots.Action:
+            checks.append((f"{name} {action.name} trades", legacy.getNumTrades(legacyPeriod, action),
+                           current.getNumTrades(period, action)))
+        if name != 'TOTAL':
+            checks.append((name + ' value', legacy.getValue(legacyPeriod), current.getValue(period)))
+    for name, expected, actual in checks:
+        if repr(expected) != repr(actual):
+            return name
+    return None
+
+
+def checkParity(corpus, runs, seed, engineNames, tolerance=1e-9, analyser=True, log=print):
+    '''
+        returns {engine name: number of runs which differed from the reference}
+        with the number of histories whose statistics differed as 'analyser'
+    '''
+    rng = random.Random(seed)
+    failures = {name: 0 for name in engineNames}
+    if analyser:
+        failures['analyser'] = 0
+    for run in range(runs):
+        dataset = corpus[run % len(corpus)]
+        botType = botTypes[(run + run // len(corpus)) % len(botTypes)]
+        parameters = randomParameters(rng, botType, dataset)
+        expected = runEngine(runReference, botType, parameters, dataset, checkRiskMetrics=False)
+        for name in engineNames:
+            divergence = firstDivergence(expected, runEngine(engines[name], botType, parameters, dataset), tolerance)
+            if divergence is not None:
+                failures[name] += 1
+                log(f"{name} differs on run {run}: {botType} on {dataset.name}")
+                log(f"    parameters {parameters}")
+                log(f"    first divergence at state {divergence['index']}"
+                    + (f" ({divergence['date']})" if 'date' in divergence else '')
+                    + f", {divergence['field']}: expected {divergence['expected']}, got {divergence['actual']}")
+        if analyser and expected[0] == 'rows':
+            with contextlib.redirect_stdout(io.StringIO()):
+                statistic = analyserDivergence(runBots(botType, parameters, dataset))
+            if statistic is not None:
+                failures['analyser'] += 1
+                log(f"analyser differs on run {run}: {botType} on {dataset.name}, first in {statistic}")
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check every backtest engine matches the legacy bots')
+    parser.add_argument('--runs', type=int, default=60)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--engines', nargs='+', default=list(engines), choices=list(engines))
+    parser.add_argument('--tolerance', type=float, default=1e-9, help='relative and absolute tolerance on cash, coins and price')
+    parser.add_argument('--no-downloaded', action='store_true', help='only use synthetic datasets')
+    parser.add_argument('--no-analyser', action='store_true', help="don't check the statistics")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        startTime = time.perf_counter()
+        corpus = makeCorpus(directory, downloaded=not args.no_downloaded)
+        failures = checkParity(corpus, args.runs, args.seed, args.engines, args.tolerance, not args.no_analyser)
+        elapsed = time.perf_counter() - startTime
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    for name, count in failures.items():
+        print(f"{name:14} {args.runs - count:4}/{args.runs} runs match")
+    print(f"{len(corpus)} datasets, {elapsed:.1f}s")
+    sys.exit(1 if any(failures.values()) else 0)
@@ -0,0 +1,52 @@
+#!/usr/bin/python3
+'''
+Synthetic price data in the cryptodatadownload.com layout, for benchmarks.
+
+    python3 -m benchmarks.syntheticData out.csv --bars 5000
+'''
+import sys, argparse
+from datetime import datetime, timedelta
+
+
+def makeData(numBars=1500, seed=0, start=datetime(2015, 10, 8), symbol='ETHUSD', numGaps=0, hourly=False):
+    '''
+        returns a dataframe of numBars days of random walk prices, newest first like the downloaded files
+        numGaps bars are left out at random, away from both ends
+        If hourly is True the bars are an hour apart, and each date has a time as in the hourly files
+        Dates after 2262 can't be read by pandas, so choose start to suit numBars if the data is for ROC or RSI
+    '''
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    close = 100*np.exp(np.cumsum(rng.normal(0.001, 0.04, numBars)))
+    openPrice = close*np.exp(rng.normal(0, 0.01, numBars))
+    high = np.maximum(openPrice, close)*np.exp(np.abs(rng.normal(0, 0.02, numBars)))
+    low = np.minimum(openPrice, close)*np.exp(-np.abs(rng.normal(0, 0.02, numBars)))
+    # python dates, as long datasets go past the range of pandas timestamps
+    barLength, dateFormat = (timedelta(hours=1), '%Y-%m-%d %H:%M:%S') if hourly else (timedelta(days=1), '%Y-%m-%d')
+    dates = [(start + barLength*i).strftime(dateFormat) for i in range(numBars)]
+    data = pd.DataFrame({'Date': dates, 'Symbol': symbol,
+                         'Open': openPrice.round(2), 'High': high.round(2), 'Low': low.round(2), 'Close': close.round(2),
+                         'Volume ' + symbol[:-3]: rng.random(numBars)*1000, 'Volume USD': rng.random(numBars)*1e5})
+    if numGaps > 0:
+        data = data.drop(index=rng.choice(np.arange(50, numBars - 50), numGaps, replace=False))
+    return data.iloc[::-1].reset_index(drop=True)
+
+def writeData(data, path):
+    '''
+        writes a dataframe in the layout of the downloaded files, with the banner line before the header
+    '''
+    with open(path, 'w') as f:
+        f.write('https://www.CryptoDataDownload.com\n')
+        data.to_csv(f, index=False)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write a synthetic price file')
+    parser.add_argument('path')
+    parser.add_argument('--bars', type=int, default=1500)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--gaps', type=int, default=0)
+    parser.add_argument('--hourly', action='store_true', help='bars an hour apart instead of a day')
+    args = parser.parse_args()
+    writeData(makeData(args.bars, args.seed, numGaps=args.gaps, hourly=args.hourly), args.path)
@@ -0,0 +1,210 @@
+#!/usr/bin/python3
+'''
+Throughput benchmark for the bots, the Analyser and the BacktestHistory getters.
+
+Synthetic datasets in the cryptodatadownload.com layout are written once to benchmarks/data,
+then each stage is timed on each size. Sizes from hourlyFrom bars up are hourly bars, as that many
+days wouldn't fit in the dates pandas can read. The signal cache is cleared before every run of a bot,
+so each one is timed from scratch. Results are saved as JSON in benchmarks/results,
+named after the current commit, so runs from different commits can be compared.
+Nothing is downloaded and the GUI isn't imported.
+
+    python3 -m benchmarks.throughput --sizes 1000 10000 100000
+    python3 -m benchmarks.throughput --compare benchmarks/results/old.json benchmarks/results/new.json
+'''
+import sys, os, io, json, time, platform, argparse, contextlib, subprocess
+from datetime import datetime, timedelta
+
+from core import bots
+import fetchData
+from statistics.algorithmAnalysis import Analyser, Period
+from statistics import rollingAnalysis
+from benchmarks.syntheticData import makeData, writeData
+
+botTypes = ['ROC', 'RSI', 'TMA', 'SMA', 'DEMA']
+defaultSizes = [1000, 10000, 100000, 1000000]
+
+benchmarkDirectory = os.path.dirname(os.path.abspath(__file__))
+dataDirectory = os.path.join(benchmarkDirectory, "data")
+resultsDirectory = os.path.join(benchmarkDirectory, "results")
+
+historyGetters = ['getCashBalanceHistory', 'getDateHistory', 'getCoinHistory', 'getMarketPriceHistory',
+                  'getPortfolioValueHistory', 'getActionHistory']
+
+
+# pandas can read dates from 1677 to 2262, so from this size the datasets are hourly
+hourlyFrom = 200000
+
+def isHourly(numBars):
+    return numBars >= hourlyFrom
+
+def barLength(numBars):
+    return timedelta(hours=1) if isHourly(numBars) else timedelta(days=1)
+
+def datasetStart(numBars):
+    # a million hours is about 114 years
+    return datetime(1900, 1, 1) if isHourly(numBars) else datetime(1700, 1, 1)
+
+def datasetPath(numBars):
+    '''
+        returns the path of the synthetic dataset with numBars rows, writing it first if needed
+    '''
+    name = f"synthetic_{numBars}_1h.csv" if isHourly(numBars) else f"synthetic_{numBars}.csv"
+    path = os.path.join(dataDirectory, name)
+    if not os.path.exists(path):
+        if not os.path.isdir(dataDirectory):
+            os.makedirs(dataDirectory)
+        writeData(makeData(numBars, seed=numBars, start=datasetStart(numBars), hourly=isHourly(numBars)), path)
+    return path
+
+def getCommit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=benchmarkDirectory,
+                              capture_output=True, text=True).stdout.strip() or 'unknown'
+    except OSError:
+        return 'unknown'
+
+def timeCall(function, repeat=1):
+    '''
+        returns (best time in seconds, result of the last call)
+    '''
+    best = None
+    for _ in range(repeat):
+        startTime = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - startTime
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def statisticsTables(analyser):
+    # the same calls StatisticsView.showStats makes
+    analyser.getGain(Period.MONTHLY, False)
+    analyser.getValue(Period.MONTHLY)
+    analyser.getGain(Period.MONTHLY, True)
+    analyser.getNumTrades(Period.MONTHLY, bots.Action.BUY)
+    analyser.getNumTrades(Period.MONTHLY, bots.Action.SELL)
+    analyser.getPayBackPeriod()
+    analyser.getSumTrades(Period.TOTAL)
+
+
+def benchmarkSize(numBars, repeat=1, botList=botTypes):
+    '''
+        returns a dict of the timings for one dataset size
+    '''
+    path = datasetPath(numBars)
+    result = {'bars': numBars, 'hourly': isHourly(numBars)}
+    result['load'], data = timeCall(lambda: fetchData.readData(path), repeat)
+
+    start = datasetStart(numBars) + timedelta(days=60)
+    end = datasetStart(numBars) + barLength(numBars)*(numBars - 2)
+    result['bots'] = {}
+    for botType in botList:
+        timings = {}
+        bot = bots.createBot(botType, {'Start Trading Date': start, 'End Trading Date': end, 'Stop Loss': 100.0})
+        def run():
+            # a fresh bot and no cached signals each time, the bots change their cash amount as they run
+            bots.clearSignalCache()
+            return bots.createBot(botType, bot.getParameters()).processHistoricalData(data)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                timings['run'], history = timeCall(run, repeat)
+        except Exception as e:
+            timings['error'] = type(e).__name__ + ': ' + str(e)
+            result['bots'][botType] = timings
+            continue
+        timings['barsPerSecond'] = numBars / timings['run'] if timings['run'] > 0 else 0
+        timings['states'] = len(history)
+        timings['analyserSummary'], _ = timeCall(lambda: Analyser(history).getSummary(), repeat)
+        timings['statisticsTables'], _ = timeCall(lambda: statisticsTables(Analyser(history)), repeat)
+        # everything the views show, in the single pass they use
+        timings['statistics'], _ = timeCall(lambda: Analyser(history).getStatistics(), repeat)
+        timings['rolling'], _ = timeCall(lambda: rollingAnalysis.rollingAnalytics(history), repeat)
+        timings['getters'] = {}
+        for getter in historyGetters:
+            timings['getters'][getter], _ = timeCall(getattr(history, getter), repeat)
+        result['bots'][botType] = timings
+    return result
+
+def runBenchmarks(sizes, repeat=1, botList=botTypes, log=print):
+    results = {
+        'commit': getCommit(),
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'sizes': [],
+    }
+    for numBars in sizes:
+        log(f"{numBars} bars")
+        sizeResult = benchmarkSize(numBars, repeat, botList)
+        for botType, timings in sizeResult['bots'].items():
+            if 'error' in timings:
+                log(f"  {botType:5} skipped, {timings['error']}")
+            else:
+                log(f"  {botType:5} run {timings['run']:8.3f}s  {timings['barsPerSecond']:10.0f} bars/s  "
+                    f"analyser {timings['analyserSummary']:.3f}s  tables {timings['statisticsTables']:.3f}s  "
+                    f"statistics {timings['statistics']:.3f}s")
+        results['sizes'].append(sizeResult)
+    return results
+
+def saveResults(results, path=None):
+    if path is None:
+        if not os.path.isdir(resultsDirectory):
+            os.makedirs(resultsDirectory)
+        path = os.path.join(resultsDirectory, f"throughput-{results['commit']}.json")
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+    return path
+
+# entries of a bot's timings which aren't times
+notTimings = ['barsPerSecond', 'states', 'error']
+
+def _flatten(results):
+    # returns {(bars, bot, stage): seconds} of every stage recorded, each getter as a stage of its own
+    flat = {}
+    for size in results['sizes']:
+        flat[(size['bars'], '', 'load')] = size['load']
+        for botType, timings in size['bots'].items():
+            for stage, seconds in timings.items():
+                if stage in notTimings:
+                    continue
+                if isinstance(seconds, dict):
+                    for getter, getterSeconds in seconds.items():
+                        flat[(size['bars'], botType, getter)] = getterSeconds
+                else:
+                    flat[(size['bars'], botType, stage)] = seconds
+    return flat
+
+def compareResults(oldPath, newPath, threshold=1.1):
+    '''
+        prints the time of each stage in both results, marking any slower than threshold times the old time
+        returns the number of regressions
+    '''
+    with open(oldPath) as f:
+        old = _flatten(json.load(f))
+    with open(newPath) as f:
+        new = _flatten(json.load(f))
+    regressions = 0
+    for key in sorted(set(old) & set(new)):
+        ratio = new[key] / old[key] if old[key] > 0 else 1
+        flag = ''
+        if ratio > threshold:
+            flag = '  SLOWER'
+            regressions += 1
+        print(f"{key[0]:>8} {key[1]:5} {key[2]:24} {old[key]:9.4f}s -> {new[key]:9.4f}s  x{ratio:5.2f}{flag}")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time the bots, the Analyser and the history getters on synthetic data')
+    parser.add_argument('--sizes', type=int, nargs='+', default=defaultSizes)
+    parser.add_argument('--bots', nargs='+', default=botTypes, choices=botTypes)
+    parser.add_argument('--repeat', type=int, default=1, help='take the best of this many runs of each stage')
+    parser.add_argument('--output', default=None, help='JSON file for the results, by default named after the commit')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two result files instead')
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compareResults(*args.compare) else 0)
+    results = runBenchmarks(args.sizes, args.repeat, args.bots)
+    print('Saved to', saveResults(results, args.output))
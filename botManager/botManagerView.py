@@ -8,6 +8,7 @@ from statistics.algorithmAnalysis import *
 import importlib
 from statistics.statisticsView import StatisticsView
 from statistics.compareWindow import CompareWindow
+from statistics.compareRunner import CompareRunner
 import qdarkstyle
 from botManager.botManager import BotManager
 import fetchData
@@ -27,7 +28,7 @@ class BotManagerView(QWidget):
         self.botListView.itemChanged.connect(self.getSelectedBots)
         self.removeButton = QPushButton('Remove')
         self.removeButton.setEnabled(False)
-        self.compareButton = QPushButton('Select 2 Bots to Compare')
+        self.compareButton = QPushButton('Select 2 or More Bots to Compare')
         self.compareButton.setEnabled(False)
         self.botManager = BotManager(self)
         self.parent = parent
@@ -65,7 +66,7 @@ class BotManagerView(QWidget):
     def refresh(self):
         self.botListView.clear()
         self.compareList.clear()
-        self.compareButton.setText('Select 2 Bots to Compare')
+        self.compareButton.setText('Select 2 or More Bots to Compare')
         self.compareButton.setEnabled(False)
         self.removeButton.setEnabled(False)
         for b in self.botList:
@@ -128,11 +129,11 @@ class BotManagerView(QWidget):
             self.compareList[alias] = alias
         elif alias in self.compareList:
             del self.compareList[alias]
-        if len(self.compareList) == 2:
-            self.compareButton.setText('Compare Bots')
+        if len(self.compareList) >= 2:
+            self.compareButton.setText('Compare ' + str(len(self.compareList)) + ' Bots')
             self.compareButton.setEnabled(True)
         else:
-            self.compareButton.setText('Select 2 Bots to Compare')
+            self.compareButton.setText('Select 2 or More Bots to Compare')
             self.compareButton.setEnabled(False)
         if len(self.compareList) > 0:
             self.removeButton.setEnabled(True)
@@ -149,10 +150,10 @@ class BotManagerView(QWidget):
 
     def compareButtonPressed(self):
         self.removeMessage()
-        if len(self.compareList) != 2:
+        if len(self.compareList) < 2:
             msgBox = QMessageBox()
             msgBox.setIcon(QMessageBox.Warning)
-            msgBox.setText("Invalid number of bots selected - Please select 2 bots")
+            msgBox.setText("Invalid number of bots selected - Please select at least 2 bots")
             msgBox.setWindowTitle("Compare Bots")
             msgBox.setStandardButtons(QMessageBox.Ok)
             msgBox.exec()
@@ -162,27 +163,34 @@ class BotManagerView(QWidget):
         startDate, endDate, coin, ok = ComparisonInputDialog.getUserInput(self)
 
         if ok:
-            bot1 = list(self.compareList.keys())[0]
-            bot2 = list(self.compareList.keys())[1]
-            self.botOneObject = self.botManager.loadBot(bot1)
-            self.botTwoObject = self.botManager.loadBot(bot2)
-            self.botOneObject.changeParam('Start Trading Date', startDate)
-            self.botOneObject.changeParam('End Trading Date', endDate)
-            self.botTwoObject.changeParam('Start Trading Date', startDate)
-            self.botTwoObject.changeParam('End Trading Date', endDate)
-            if not self.checkBot(self.botOneObject):
-                return
-            if not self.checkBot(self.botTwoObject):
-                return
-            try:
-                self.data = fetchData.getData(exchange="Gemini", resolution="day", coin=coin)
-                buySellDataOne = self.botOneObject.processHistoricalData(self.data)
-                buySellDataTwo = self.botTwoObject.processHistoricalData(self.data)
-                window = CompareWindow(self.data, bot1, bot2, buySellDataOne, buySellDataTwo, coin, self.botManager)
-                self.windows.append(window)
-                window.show()
-            except IndexError as IE:
-                    self.displayMessage('Please select an appropriate date range', 'red')
+            botNames = list(self.compareList.keys())
+            botObjects = []
+            for alias in botNames:
+                bot = self.botManager.loadBot(alias)
+                bot.changeParam('Start Trading Date', startDate)
+                bot.changeParam('End Trading Date', endDate)
+                if not self.checkBot(bot):
+                    return
+                botObjects.append(bot)
+
+            self.data = fetchData.getData(exchange="Gemini", resolution="day", coin=coin)
+            window = CompareWindow(self.data, botNames, botObjects, coin)
+            self.windows.append(window)
+            window.show()
+
+            # the bots run in parallel, and each one is added to the window when it finishes
+            runner = CompareRunner(window)
+            runner.botFinished.connect(window.addResult)
+            runner.botFailed.connect(lambda index, error: self.compareFailed(window, index, error))
+            runner.run(botObjects, self.data)
+
+    def compareFailed(self, window, index, error):
+        if isinstance(error, IndexError):
+            self.displayMessage('Please select an appropriate date range', 'red')
+            window.addFailure(index, 'Invalid date range')
+        else:
+            window.addFailure(index, 'Failed: ' + str(error))
+
     def checkBot(self, bot):
         try:
             bot.checkParameters()
@@ -2,9 +2,9 @@
 import sys
 import qdarkstyle
 from PyQt5 import QtCore, QtWebEngineWidgets
-from PyQt5.QtWidgets import QApplication, QGroupBox, QVBoxLayout, QWidget, QPushButton, QGridLayout, QLabel, QComboBox, QScrollArea, QInputDialog, QCheckBox, QMessageBox,QHBoxLayout
+from PyQt5.QtWidgets import QApplication, QGroupBox, QVBoxLayout, QWidget, QPushButton, QGridLayout, QLabel, QComboBox, QScrollArea, QInputDialog, QCheckBox, QMessageBox,QHBoxLayout, QProgressBar, QSpinBox
 from PyQt5.QtWebEngineWidgets import QWebEngineView
-from PyQt5.QtCore import QDir, QUrl
+from PyQt5.QtCore import QDir, QUrl, QThreadPool
 from PyQt5 import QtGui
 
 from tkinter import messagebox
@@ -20,10 +20,15 @@ import exceptions
 
 from parameterView import formView
 from statistics.statisticsView import StatisticsView
-from statistics.algorithmAnalysis import Analyser, Period
+from statistics.algorithmAnalysis import Analyser, Period, getStatistics
+from statistics import rollingAnalysis, baselines
 from botManager.botManager import BotManager
 from botManager.botManagerView import BotManagerView
 from graph.graphView import GraphView
+from simulationWorker import SimulationWorker
+from diagnostics.diagnosticsView import DiagnosticsView
+from diagnostics.profileDialog import ProfileDialog
+from core import timing
 
 
 # Class for running simulations of bots on data, which then uses the graph to plot the data
@@ -36,9 +41,16 @@ class simulator():
         self.dropdown = dropdown
         self.data = historicalData
         self.parentWindow = parentWindow
+        self.worker = None
+        self.runSpan = None
+        self.buySellData = None # results shown on the graph, kept to redraw the rolling panels and baselines
 
     def setHistoricalData(self, data):
         self.data = data
+        self.buySellData = None
+
+    def clearResults(self):
+        self.buySellData = None
 
     def run(self):
         self.parentWindow.removeMessage()
@@ -46,17 +58,73 @@ class simulator():
         if not self._setup():
             return
 
-        try:
-            buySellData = self.bot.processHistoricalData(self.data)
+        # from pressing run to the results being shown
+        self.runSpan = timing.Span('simulation.total', bot=self.bot.getName())
+        # the bot runs on a worker thread, and the results come back to this thread by signal
+        self.worker = SimulationWorker(self.bot, self.data, profile=self.parentWindow.isProfiling())
+        self.worker.signals.progress.connect(self.parentWindow.showProgress)
+        self.worker.signals.profiled.connect(lambda report: self.parentWindow.showProfile(report, self.bot.getName()))
+        self.worker.signals.finished.connect(self.showResults)
+        self.worker.signals.error.connect(self.showError)
+        self.worker.signals.cancelled.connect(self.showCancelled)
+        self.parentWindow.simulationStarted()
+        QThreadPool.globalInstance().start(self.worker)
+
+    def cancel(self):
+        if self.worker is not None:
+            self.worker.cancel()
+
+    def showResults(self, buySellData):
+        self.parentWindow.simulationFinished()
+        with timing.span('simulation.graph', states=len(buySellData)):
+            # all the traces are added before the graph is drawn, once
             self.graph.clearFig()
-            self.graph.addBuySellLines(buySellData)
+            self.graph.addBuySellLines(buySellData, refresh=False)
+            self.graph.addPortfolioValue(buySellData, refresh=False)
+            self.buySellData = buySellData
+            self.showBaselines(refresh=False)
+            self.showRolling(refresh=False)
+            self.graph.refreshFig()
+        with timing.span('simulation.statistics', states=len(buySellData)):
             self.statsView.showStats(buySellData)
-            self.graph.addPortfolioValue(buySellData)
 
-            self.statsView.setTabGeneral()
+        self.statsView.setTabGeneral()
+        with timing.span('simulation.history', states=len(buySellData)):
             self.statsView.showHistory(buySellData)
-        except IndexError as IE:
+        self.runSpan.stop()
+
+    def showRolling(self, refresh=True):
+        '''
+            redraws the rolling panels under the graph with the window chosen in the main window
+        '''
+        if self.buySellData is None:
+            return
+        window = self.parentWindow.getRollingWindow()
+        rolling = rollingAnalysis.rollingAnalytics(self.buySellData, window) if window > 0 else None
+        self.graph.setRollingAnalytics(rolling, refresh=refresh)
+
+    def showBaselines(self, refresh=True):
+        '''
+            redraws buy and hold on the graph, and dollar cost averaging if it's ticked in the main window
+        '''
+        if self.buySellData is None:
+            return
+        shown = [baseline for name, baseline in getStatistics(self.buySellData).baselines.items()
+                 if name != baselines.dollarCostAveragingName or self.parentWindow.isShowingDollarCostAveraging()]
+        self.graph.setBaselines(shown, refresh=refresh)
+
+    def showError(self, error):
+        self.parentWindow.simulationFinished()
+        self.runSpan.stop(error=type(error).__name__)
+        if isinstance(error, IndexError):
             self.parentWindow.displayMessage('Invalid Dates - Please select an appropriate date range', 'red')
+        else:
+            self.parentWindow.displayMessage('Simulation failed - ' + str(error), 'red')
+
+    def showCancelled(self):
+        self.parentWindow.simulationFinished()
+        self.runSpan.stop(error='SimulationCancelled')
+        self.parentWindow.displayMessage('Simulation cancelled')
 
 
     def _setup(self):
@@ -167,6 +235,20 @@ class MainWindow(QWidget):
         self.grid_layout.addWidget(self.runButton, 4, 1, 1, 1)
         self.runButton.setMaximumWidth(_maxWidth-170)
 
+        # Progress of a running simulation, and a button to cancel it
+        self.progressBar = QProgressBar()
+        self.progressBar.setRange(0, 100)
+        self.progressBar.hide()
+        self.cancelButton = QPushButton('Cancel Simulation')
+        self.cancelButton.clicked.connect(self.cancelPressed)
+        self.cancelButton.hide()
+        progress_layout = QHBoxLayout()
+        progress_layout.addWidget(self.progressBar)
+        progress_layout.addWidget(self.cancelButton)
+        self.grid_layout.addLayout(progress_layout, 3, 2, 1, 4)
+        # widgets turned off while a simulation runs, with whether each was enabled before
+        self.lockedWidgets = None
+
         #Load Button
         self.loadButton = QPushButton('Import Bot')
         self.loadButton.setEnabled(True)
@@ -211,6 +293,26 @@ class MainWindow(QWidget):
         self.logCheckBox.setText("Logarithmic Y-axis")
         self.logCheckBox.toggled.connect(self.graph.setLog)
 
+        # profile check box, the next simulations are run under cProfile while it's ticked
+        self.profileCheckBox = QCheckBox()
+        self.profileCheckBox.setText("Profile Simulation")
+        self.profileCheckBox.setToolTip('Profile the simulation with cProfile and show the slowest functions')
+
+        # dollar cost averaging check box, buy and hold is always drawn with the results
+        self.dcaCheckBox = QCheckBox()
+        self.dcaCheckBox.setText("DCA Baseline")
+        self.dcaCheckBox.setToolTip('Show the value of spending the cash in equal parts at the start of each month')
+
+        # rolling window, in states, of the panels under the graph
+        self.rollingSpinBox = QSpinBox()
+        self.rollingSpinBox.setRange(0, 100000)
+        self.rollingSpinBox.setValue(rollingAnalysis.defaultWindow)
+        self.rollingSpinBox.setPrefix('Rolling window: ')
+        self.rollingSpinBox.setSpecialValueText('No rolling panels')
+        self.rollingSpinBox.setToolTip('Number of states in the window of the rolling return, volatility, Sharpe ratio '
+                                       'and drawdown shown under the graph, at least 3')
+        self.rollingSpinBox.setKeyboardTracking(False)
+
         # manage layout of dropdowns
         self.dropdown.setMaximumWidth(200)
         self.coinDropdown.setMaximumWidth(200)
@@ -219,6 +321,9 @@ class MainWindow(QWidget):
         horizontal_layout.addWidget(self.dropdown)
         horizontal_layout.addWidget(self.coinDropdown)
         horizontal_layout.addWidget(self.logCheckBox)
+        horizontal_layout.addWidget(self.profileCheckBox)
+        horizontal_layout.addWidget(self.dcaCheckBox)
+        horizontal_layout.addWidget(self.rollingSpinBox)
         horizontal_layout.addStretch(2)
         self.grid_layout.addLayout(horizontal_layout, 4, 3, 1, 1)
         self.grid_layout.setColumnStretch(2, 0)
@@ -238,8 +343,15 @@ class MainWindow(QWidget):
         self.statsView = StatisticsView(self)
         self.grid_layout.addWidget(self.statsView, 5, 2, 1, 4)
 
+        # how long each stage of the simulations took
+        self.diagnosticsView = DiagnosticsView(self)
+        self.statsView.tabs.addTab(self.diagnosticsView, "Diagnostics")
+
         # Link view with bot
         self.sim = simulator(self.graph, self.form, self.statsView, historicalData, self)
+        # the signals' values would be taken for showRolling and showBaselines' refresh argument
+        self.rollingSpinBox.valueChanged.connect(lambda value: self.sim.showRolling())
+        self.dcaCheckBox.toggled.connect(lambda checked: self.sim.showBaselines())
 
         # data source label
         self.data_source = QLabel()
@@ -269,9 +381,53 @@ class MainWindow(QWidget):
         self.error_msg.setStyleSheet('color: black')
         self.error_msg.hide()
 
+    def showProgress(self, percent):
+        self.progressBar.setValue(percent)
+
+    def isProfiling(self):
+        return self.profileCheckBox.isChecked()
+
+    def showProfile(self, report, botName):
+        dialog = ProfileDialog(self, report, botName)
+        dialog.show()
+
+    def isShowingDollarCostAveraging(self):
+        return self.dcaCheckBox.isChecked()
+
+    def getRollingWindow(self):
+        '''
+            returns the window of the rolling panels, or 0 if they are turned off
+        '''
+        window = self.rollingSpinBox.value()
+        return max(window, 3) if window > 0 else 0
+
+    def isSimulating(self):
+        return self.lockedWidgets is not None
+
+    def simulationStarted(self):
+        # the bot and data can't change under a running simulation, so choosing them is
+        # turned off until it finishes, then each widget is put back as it was
+        self.lockedWidgets = {widget: widget.isEnabled() for widget in
+                              [self.runButton, self.resetButton, self.loadButton, self.dropdown, self.coinDropdown]}
+        for widget in self.lockedWidgets:
+            widget.setEnabled(False)
+        self.progressBar.setValue(0)
+        self.progressBar.show()
+        self.cancelButton.setEnabled(True)
+        self.cancelButton.show()
+
+    def simulationFinished(self):
+        for widget, enabled in self.lockedWidgets.items():
+            widget.setEnabled(enabled)
+        self.lockedWidgets = None
+        self.progressBar.hide()
+        self.cancelButton.hide()
+
     def loadHistoricalData(self, coin):
         if(coin == 0):
             pass
+        elif self.isSimulating():
+            self.displayMessage('Cancel the simulation or wait for it to finish before changing the coin', 'red')
         else:
             historicalData = fetchData.getData(self.exchange, "day", self.coinList[coin-1])
             self.graph.addHistoricalData(historicalData, self.coinList[coin-1])
@@ -290,8 +446,11 @@ class MainWindow(QWidget):
 
 
     def loadBot(self, bot):
-        if bot is not None:
+        if self.isSimulating():
+            self.displayMessage('Cancel the simulation or wait for it to finish before loading another bot', 'red')
+        elif bot is not None:
             self.sim.setBot(bot)
+            self.sim.clearResults()
             self.graph.clearGraph()
             self.runButton.setEnabled(True)
             self.saveButton.setEnabled(True)
@@ -313,6 +472,9 @@ class MainWindow(QWidget):
 
 
     def loadSavedBot(self, alias):
+        if self.isSimulating():
+            self.displayMessage('Cancel the simulation or wait for it to finish before loading another bot', 'red')
+            return
         bot = self.botManager.loadBot(alias)
         if bot is not None:
             self.loadBot(bot)
@@ -330,6 +492,11 @@ class MainWindow(QWidget):
         if self.sim is not None:
             self.sim.run()
 
+    def cancelPressed(self):
+        if self.sim is not None:
+            self.cancelButton.setEnabled(False)
+            self.sim.cancel()
+
     def savePressed(self):
         placeholder = self.botManagerView.getSelected()
         text, ok = QInputDialog.getText(self, 'Name your bot', 'Enter a name:', text=placeholder)
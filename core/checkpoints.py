@@ -0,0 +1,152 @@
+#!/usr/bin/python3
+'''
+Checkpointed runs save snapshots of the signal generator and the ledger every so many bars,
+each with the trades made since the one before. When the same bot is run again with a different
+End Trading Date, or on data with new bars added, the run carries on from the latest snapshot that
+is still valid instead of starting again from the Start Trading Date, so a daily update only runs,
+hashes and saves the new bars.
+'''
+import os, json, copy, hashlib
+
+from core import bots
+from core.resultCache import ResultCache
+
+checkpointDirectory = os.path.join("cache", "checkpoints")
+
+
+class Checkpoint:
+    '''
+    The state of a run after the first barIndex bars, the last of which is dated lastDate.
+    states holds the BotStates the run recorded since the checkpoint before, so saving a
+    checkpoint only writes what is new
+    '''
+    def __init__(self, barIndex, lastDate, generator, ledgerSnapshot, states):
+        self.barIndex = barIndex
+        self.lastDate = lastDate
+        self.generator = generator
+        self.ledgerSnapshot = ledgerSnapshot
+        self.states = states
+
+
+class CheckpointIndex:
+    '''
+    What is saved under a bot's series key: the hash of the first bar, and (barIndex, lastDate, hash of the last bar)
+    of each checkpoint, oldest first. Each Checkpoint is saved under its own key, see checkpointKey
+    '''
+    def __init__(self, firstHash, entries):
+        self.firstHash = firstHash
+        self.entries = entries
+
+    def getEntries(self):
+        return self.entries
+
+
+def rowHash(data, row):
+    '''
+        returns the hash of one row of the data
+    '''
+    import pandas as pd
+    return int(pd.util.hash_pandas_object(data[['Date', 'Open', 'High', 'Low', 'Close']].iloc[[row]], index=False).values[0])
+
+def makeSeriesKey(bot):
+    '''
+        returns the key of the checkpoints for bot, which covers every parameter except the name and the End Trading Date
+    '''
+    parameters = bot.getSaveData()
+    parameters.pop('Name', None)
+    parameters.pop('End Trading Date', None)
+    keyData = {'botType': bot.getName(), 'parameters': parameters, 'engineVersion': bots.engineVersion}
+    return hashlib.sha256(json.dumps(keyData, sort_keys=True).encode()).hexdigest()
+
+def checkpointKey(seriesKey, barIndex):
+    return seriesKey + '-' + str(barIndex)
+
+def _toDate(date):
+    import pandas as pd
+    return pd.Timestamp(date).date()
+
+def _findCheckpoint(index, data, order, endTradingDate):
+    # returns the position in index of the latest checkpoint before the end date whose bars look unchanged,
+    # or None. Only the first bar and the checkpoint's last bar are hashed, as data is expected to grow at the end
+    if index is None or len(order) == 0 or index.firstHash != rowHash(data, order[0]):
+        return None
+    for position in range(len(index.entries) - 1, -1, -1):
+        barIndex, lastDate, lastHash = index.entries[position]
+        if barIndex <= len(order) and lastDate < endTradingDate.date() and lastHash == rowHash(data, order[barIndex-1]):
+            return position
+    return None
+
+def _loadStates(store, seriesKey, entries):
+    # returns the states of every checkpoint in entries, in order, and the last Checkpoint, or None if one was evicted
+    states = []
+    checkpoint = None
+    for barIndex, _, _ in entries:
+        checkpoint = store.get(checkpointKey(seriesKey, barIndex))
+        if checkpoint is None:
+            return None
+        states.extend(checkpoint.states)
+    return states, checkpoint
+
+
+def runWithCheckpoints(bot, data, store=None, interval=250):
+    '''
+        returns the same BacktestHistory as bot.processHistoricalData(data)
+        Carries on from a checkpoint of an earlier run of this bot if there is a usable one,
+        and saves checkpoints every interval bars for the next run.
+        Only the bars after the checkpoint are run, and only the checkpoints taken in this run are written
+    '''
+    import pandas as pd
+    store = store or ResultCache(checkpointDirectory)
+    order = pd.to_datetime(data.Date).values.argsort(kind='stable')
+    numBars = len(order)
+    if numBars == 0:
+        raise IndexError
+    dates = data['Date'].values
+    if _toDate(dates[order[0]]) > bot.startTradingDate.date() or _toDate(dates[order[-1]]) < bot.endTradingDate.date():
+        raise IndexError
+
+    key = makeSeriesKey(bot)
+    index = store.get(key)
+    if not isinstance(index, CheckpointIndex):
+        # saved before checkpoints were written one at a time
+        index = None
+    position = _findCheckpoint(index, data, order, bot.endTradingDate)
+    loaded = _loadStates(store, key, index.entries[:position+1]) if position is not None else None
+    if loaded is not None:
+        states, checkpoint = loaded
+        history = bots.BacktestHistory()
+        history.history = states
+        generator = copy.deepcopy(checkpoint.generator)
+        generator.setEndTradingDate(bot.endTradingDate)
+        ledger = bot.restoreLedger(checkpoint.ledgerSnapshot, history)
+        entries = index.entries[:position+1]
+        firstBar = checkpoint.barIndex
+    else:
+        generator = bot.createSignalGenerator()
+        ledger = bot.startLedger()
+        entries = []
+        firstBar = 0
+
+    # only the bars from firstBar on are read out of the data
+    tail = order[firstBar:]
+    columns = [data[c].values[tail] for c in ['Date', 'Open', 'High', 'Low', 'Close']]
+    savedStates = len(ledger['history'])
+    for i, bar in enumerate(zip(*columns), firstBar):
+        bot._updateProgress(i, numBars)
+        if i % interval == 0 and i > firstBar:
+            history = ledger['history']
+            store.put(checkpointKey(key, i), Checkpoint(i, _toDate(columns[0][i-firstBar-1]), copy.deepcopy(generator),
+                                                        bot.getLedgerSnapshot(ledger), history.history[savedStates:]))
+            entries.append((i, _toDate(columns[0][i-firstBar-1]), rowHash(data, order[i-1])))
+            savedStates = len(history)
+        for signal in generator.update(*bar):
+            if not bot.stepLedger(ledger, *signal):
+                ledger['stopped'] = True
+                break
+        if ledger['stopped'] or generator.isFinished():
+            break
+    if not ledger['stopped'] and generator.getFinalSignal() is not None:
+        bot.finishLedger(ledger, *generator.getFinalSignal())
+
+    store.put(key, CheckpointIndex(rowHash(data, order[0]), entries))
+    return ledger['history']
@@ -0,0 +1,111 @@
+#!/usr/bin/python3
+'''
+Chunked backtests, for datasets too big to load into memory as a dataframe.
+
+The CSV file is read in chunks once and written out as a flat binary file of
+(date, open, high, low, close) records, which is then memory mapped and fed to the bot
+a slice at a time, oldest first, carrying the signal generator and ledger across slices.
+Only one chunk of the data is in memory at a time, whatever the length of the file.
+'''
+import os, hashlib
+
+from core.resultCache import cacheDirectory
+
+columnsDirectory = os.path.join(os.path.dirname(cacheDirectory), "columns")
+
+
+def _recordType():
+    import numpy as np
+    return np.dtype([('Date', '<i8'), ('Open', '<f8'), ('High', '<f8'), ('Low', '<f8'), ('Close', '<f8')])
+
+
+def convertToColumns(csvPath, outPath=None, chunkSize=100000):
+    '''
+        writes the prices in a CSV file in the cryptodatadownload.com layout to a binary file of records,
+        reading chunkSize rows at a time
+        The file is only written again if the CSV file has changed since it was last converted
+        returns the path of the binary file
+    '''
+    import numpy as np
+    import pandas as pd
+    if outPath is None:
+        stat = os.stat(csvPath)
+        name = f"{os.path.abspath(csvPath)}:{stat.st_size}:{stat.st_mtime_ns}"
+        outPath = os.path.join(columnsDirectory, hashlib.sha256(name.encode()).hexdigest() + '.bin')
+        if os.path.exists(outPath):
+            return outPath
+    directory = os.path.dirname(outPath)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    tmpPath = outPath + '.tmp'
+    with open(tmpPath, 'wb') as f:
+        for chunk in pd.read_csv(csvPath, header=1, usecols=['Date', 'Open', 'High', 'Low', 'Close'], chunksize=chunkSize):
+            records = np.empty(len(chunk), dtype=_recordType())
+            records['Date'] = pd.to_datetime(chunk.Date).values.astype('datetime64[ns]').astype('<i8')
+            for column in ['Open', 'High', 'Low', 'Close']:
+                records[column] = chunk[column].values
+            records.tofile(f)
+    os.replace(tmpPath, outPath)
+    return outPath
+
+
+def openColumns(path):
+    '''
+        returns the records in a file written by convertToColumns, memory mapped
+    '''
+    import numpy as np
+    if os.path.getsize(path) == 0:
+        return np.empty(0, dtype=_recordType())
+    return np.memmap(path, dtype=_recordType(), mode='r')
+
+
+def iterChunks(records, chunkSize=100000):
+    '''
+        yields slices of at most chunkSize records, oldest first
+        The records must be sorted by date, oldest first or newest first
+    '''
+    if len(records) > 1 and records['Date'][0] > records['Date'][-1]:
+        for end in range(len(records), 0, -chunkSize):
+            yield records[max(0, end - chunkSize):end][::-1]
+    else:
+        for start in range(0, len(records), chunkSize):
+            yield records[start:start + chunkSize]
+
+
+def runChunked(bot, csvPath, chunkSize=100000, columnsPath=None):
+    '''
+        returns the same BacktestHistory as bot.processHistoricalData(data), where data is the CSV file
+        read into a dataframe, without ever loading the whole file
+        columnsPath is where the binary file is written, by default in the columns cache
+    '''
+    import numpy as np
+    import pandas as pd
+    records = openColumns(convertToColumns(csvPath, columnsPath, chunkSize))
+    if len(records) == 0:
+        raise IndexError
+    firstDate, lastDate = sorted([records['Date'][0], records['Date'][-1]])
+    if pd.Timestamp(firstDate) > bot.startTradingDate or pd.Timestamp(lastDate) < bot.endTradingDate:
+        raise IndexError
+
+    generator = bot.createSignalGenerator()
+    ledger = bot.startLedger()
+    done = 0
+    for chunk in iterChunks(records, chunkSize):
+        # copy the slice out of the memory map, so only this chunk is held in memory
+        dates = np.array(chunk['Date']).astype('datetime64[ns]')
+        columns = [np.array(chunk[c]) for c in ['Open', 'High', 'Low', 'Close']]
+        for bar in zip(dates, *columns):
+            for signal in generator.update(*bar):
+                if not bot.stepLedger(ledger, *signal):
+                    ledger['stopped'] = True
+                    break
+            if ledger['stopped'] or generator.isFinished():
+                break
+        done += len(chunk)
+        bot._updateProgress(done, len(records))
+        if ledger['stopped'] or generator.isFinished():
+            break
+    if not ledger['stopped'] and generator.getFinalSignal() is not None:
+        bot.finishLedger(ledger, *generator.getFinalSignal())
+    return ledger['history']
@@ -0,0 +1,10 @@
+from enum import Enum
+
+class InputType(Enum):
+    default = 0
+    date = 1
+    float = 2
+    int = 3
+    string = 4
+    currency = 5
+    percentage = 6
@@ -0,0 +1,279 @@
+#!/usr/bin/python3
+'''
+The ledgers of the bots written as plain loops over arrays, so they can be compiled with numba.
+
+Each kernel does exactly what the bot's stepLedger and finishLedger do, with the
+signals of a SignalStream as arrays. If numba is installed the kernels are compiled
+the first time they are used, otherwise the same functions run as ordinary Python.
+Use runLedger for a BacktestHistory, or sweep to try many execution parameters on the same signals.
+'''
+import numpy as np
+
+from core import bots
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+def _jit(function):
+    if njit is None:
+        return function
+    return njit(cache=True)(function)
+
+def isCompiled():
+    return njit is not None
+
+def kernelInput(array):
+    '''
+        returns an array in the form the kernels run fastest on, plain Python runs faster on lists
+    '''
+    return array if isCompiled() else array.tolist()
+
+
+# action codes in the arrays the kernels return
+BUY = 0
+SELL = 1
+NOACTION = 2
+EXIT = 3
+_actions = {BUY: bots.Action.BUY, SELL: bots.Action.SELL, NOACTION: bots.Action.NOACTION, EXIT: bots.Action.EXIT}
+
+# signal codes, buy and sell are -1 where the indicators couldn't be calculated
+NONE = -1
+
+
+@_jit
+def rocLedger(prices, buys, sells, cash, fee, amount, stopLoss):
+    '''
+        returns (rows, cashHistory, coinHistory, actions, botCash, coin, stopped)
+        rows is the index of the signal each recorded state came from
+    '''
+    n = len(prices)
+    rows = np.empty(n, np.int64)
+    cashHistory = np.empty(n, np.float64)
+    coinHistory = np.empty(n, np.float64)
+    actions = np.empty(n, np.int8)
+    count = 0
+    coin = 0.0
+    lastBuy = 0.0
+    stopped = False
+    for i in range(n):
+        price = prices[i]
+        if price < (1 - stopLoss/100)*lastBuy:
+            if coin > 0:
+                cash += (1-(fee/100))*price * coin
+                coin = 0.0
+                rows[count] = i; cashHistory[count] = cash; coinHistory[count] = coin; actions[count] = EXIT
+                count += 1
+            stopped = True
+            break
+        if buys[i] == NONE:
+            continue
+        elif buys[i] == 1:
+            if cash >= amount + amount*(fee/100):
+                cash -= amount
+                coin += amount / price
+                rows[count] = i; cashHistory[count] = cash; coinHistory[count] = coin; actions[count] = BUY
+                count += 1
+                lastBuy = price
+                cash -= amount*(fee/100)
+        elif sells[i] == 1:
+            if price != 0:
+                coinValue = coin * price
+                if coinValue - amount >= 0 and coin > amount*(fee/100):
+                    cash += amount
+                    coin -= amount / price
+                    rows[count] = i; cashHistory[count] = cash; coinHistory[count] = coin; actions[count] = SELL
+                    count += 1
+                    cash -= amount*(fee/100)
+        else:
+            rows[count] = i; cashHistory[count] = cash; coinHistory[count] = coin; actions[count] = NOACTION
+            count += 1
+    return rows[:count], cashHistory[:count], coinHistory[:count], actions[:count], cash, coin, stopped
+
+
+@_jit
+def rsiLedger(prices, buys, sells, cash, fee, amount, stopLoss):
+    '''
+        returns (rows, cashHistory, coinHistory, actions, botCash, coin, stopped)
+        As in RSI.stepLedger, fees come out of the bot's cash amount rather than the cash being traded
+    '''
+    n = len(prices)
+    rows = np.empty(n, np.int64)
+    cashHistory = np.empty(n, np.float64)
+    coinHistory = np.empty(n, np.float64)
+    actions = np.empty(n, np.int8)
+    count = 0
+    botCash = cash
+    coin = 0.0
+    lastBuy = 0.0
+    stopped = False
+    for i in range(n):
+        close = prices[i]
+        if close < (1 - stopLoss/100)*lastBuy:
+            cash += (1-(fee/100))*coin*close
+            coin = 0.0
+            rows[count] = i; cashHistory[count] = cash; coinHistory[count] = coin; actions[count] = EXIT
+            count += 1
+            stopped = True
+            break
+        if sells[i] == 1 and coin > amount/close and cash > amount*(fee/100):
+            cash += amount
+            coin -= amount/close
+            rows[count] = i; cashHistory[count] = cash; coinHistory[count] = coin; actions[count] = SELL
+            count += 1
+            botCash -= amount*(fee/100)
+        elif buys[i] == 1 and cash > amount + amount*(fee/100):
+            cash -= amount
+            coin += amount/close
+            rows[count] = i; cashHistory[count] = cash; coinHistory[count] = coin; actions[count] = BUY
+            count += 1
+            lastBuy = close
+            botCash -= amount*(fee/100)
+        else:
+            rows[count] = i; cashHistory[count] = cash; coinHistory[count] = coin; actions[count] = NOACTION
+            count += 1
+    return rows[:count], cashHistory[:count], coinHistory[:count], actions[:count], botCash, coin, stopped
+
+
+@_jit
+def crossoverLedger(prices, buys, sells, hasFinal, finalPrice, finalBuy, finalSell, cash, fee, amount, stopLoss):
+    '''
+        the ledger shared by TMA, SMA and DEMA
+        returns (rows, cashHistory, coinHistory, actions, botCash, coin, stopped)
+        the final signal's row is len(prices)
+    '''
+    n = len(prices)
+    rows = np.empty(n + 1, np.int64)
+    cashHistory = np.empty(n + 1, np.float64)
+    coinHistory = np.empty(n + 1, np.float64)
+    actions = np.empty(n + 1, np.int8)
+    count = 0
+    coin = 0.0
+    lastBuy = 0.0
+    previousAction = SELL
+    for i in range(n + 1):
+        if i == n:
+            if not hasFinal:
+                break
+            price = finalPrice
+            buy = finalBuy == 1
+            sell = finalSell == 1
+        else:
+            price = prices[i]
+            buy = buys[i] == 1
+            sell = sells[i] == 1
+        # a buy or sell that can't be afforded isn't recorded at all
+        action = NOACTION
+        record = False
+        if buy and previousAction == SELL:
+            if i < n:
+                previousAction = BUY
+            if cash >= amount + amount*(fee/100):
+                action = BUY
+                record = True
+        elif sell and previousAction == BUY:
+            if i < n:
+                previousAction = SELL
+            if cash > amount*(fee/100):
+                action = SELL
+                record = True
+        elif i < n and previousAction == BUY and lastBuy != 0 and (lastBuy - (lastBuy*(stopLoss/100))) > price:
+            previousAction = EXIT
+            action = EXIT
+            record = True
+        else:
+            record = True
+
+        if action == BUY:
+            cash -= amount
+            coin += amount / price
+            lastBuy = price
+        elif action == SELL:
+            cash += price * coin
+            coin = 0.0
+        elif action == EXIT:
+            cash += (1-(fee/100))*price * coin
+            coin = 0.0
+        if record:
+            rows[count] = i; cashHistory[count] = cash; coinHistory[count] = coin; actions[count] = action
+            count += 1
+        if action == BUY or action == SELL:
+            cash -= amount*(fee/100)
+    return rows[:count], cashHistory[:count], coinHistory[:count], actions[:count], cash, coin, False
+
+
+_kernels = {'ROC': rocLedger, 'RSI': rsiLedger, 'TMA': crossoverLedger, 'SMA': crossoverLedger, 'DEMA': crossoverLedger}
+
+
+def _code(value):
+    if value is None:
+        return NONE
+    return 1 if value else 0
+
+def signalArrays(signalStream):
+    '''
+        returns (dates, prices, buys, sells) of a SignalStream, with buys and sells as codes
+    '''
+    dates = [s[0] for s in signalStream]
+    prices = np.array([s[1] for s in signalStream], dtype=np.float64)
+    buys = np.array([_code(s[2]) for s in signalStream], dtype=np.int8)
+    sells = np.array([_code(s[3]) for s in signalStream], dtype=np.int8)
+    return dates, kernelInput(prices), kernelInput(buys), kernelInput(sells)
+
+def _runKernel(botType, signalStream, arrays, cash, fee, amount, stopLoss):
+    dates, prices, buys, sells = arrays
+    kernel = _kernels[botType]
+    if kernel is crossoverLedger:
+        final = signalStream.getFinalSignal()
+        if final is None:
+            return kernel(prices, buys, sells, False, 0.0, 0, 0, cash, fee, amount, stopLoss)
+        return kernel(prices, buys, sells, True, float(final[1]), _code(final[2]), _code(final[3]),
+                      cash, fee, amount, stopLoss)
+    return kernel(prices, buys, sells, cash, fee, amount, stopLoss)
+
+
+def runLedger(bot, signalStream):
+    '''
+        returns the same BacktestHistory as bot.runLedger(signalStream), using the kernel for the bot
+    '''
+    arrays = signalArrays(signalStream)
+    rows, cashHistory, coinHistory, actions, botCash, coin, stopped = _runKernel(
+            bot.getName(), signalStream, arrays, float(bot.cashAmount), float(bot.feePerTrade),
+            float(bot.amountToTrade), float(bot.stopLoss))
+    dates, prices = arrays[0], arrays[1]
+    final = signalStream.getFinalSignal()
+    buySellData = bots.BacktestHistory()
+    for row, cash, coinAmount, action in zip(rows.tolist(), cashHistory.tolist(), coinHistory.tolist(), actions.tolist()):
+        if row == len(dates):
+            buySellData.insertBotState(final[0], cash, coinAmount, final[1], _actions[action])
+        else:
+            buySellData.insertBotState(dates[row], cash, coinAmount, signalStream[row][1], _actions[action])
+    bot.cashAmount = botCash
+    bot.coinAmount = coin
+    return buySellData
+
+
+def sweep(bot, data, parameterSets):
+    '''
+        runs the ledger of bot once for each dict of execution parameters in parameterSets,
+        on the same signals, and returns the final portfolio value of each run
+        Parameters missing from a dict keep the bot's value
+    '''
+    signalStream = bot.getSignals(data)
+    arrays = signalArrays(signalStream)
+    final = signalStream.getFinalSignal()
+    results = []
+    for parameters in parameterSets:
+        values = dict(bot.getParameters())
+        values.update(parameters)
+        rows, cashHistory, coinHistory, actions, botCash, coin, stopped = _runKernel(
+                bot.getName(), signalStream, arrays, float(values['Cash Amount']), float(values['Fee Per Trade']),
+                float(values['Amount To Trade']), float(values['Stop Loss']))
+        if len(rows) == 0:
+            results.append(float(values['Cash Amount']))
+            continue
+        row = rows[-1]
+        price = final[1] if row == len(arrays[1]) else arrays[1][row]
+        results.append(cashHistory[-1] + price*coinHistory[-1])
+    return results
@@ -0,0 +1,200 @@
+#!/usr/bin/python3
+'''
+Bar by bar replay and paper trading.
+
+A PaperTrader feeds a bot one candle at a time from a feed, and trades on each signal as soon as
+its bar arrives, the same way it would when trading live. The feed can be a replay of a dataset,
+or candles read from a TCP socket, which stands in for an exchange's candle stream.
+
+    python3 -m core.paperTrading savedBots/myBot.json --data prices.csv
+    python3 -m core.paperTrading savedBots/myBot.json --data prices.csv --tcp --delay 0.01
+'''
+import sys, json, time, socket, threading, argparse
+from collections import deque
+
+from core import bots
+from core.signalGenerators import iterBars
+
+
+class ReplayFeed:
+    '''
+    Replays the bars of a dataframe of historical data oldest first, optionally waiting delay seconds between bars
+    '''
+    def __init__(self, data, delay=0):
+        self.data = data
+        self.delay = delay
+
+    def __iter__(self):
+        for bar in iterBars(self.data):
+            yield bar
+            if self.delay > 0:
+                time.sleep(self.delay)
+
+
+def _formatBar(bar):
+    date, openPrice, high, low, close = bar
+    return json.dumps({'Date': str(date), 'Open': float(openPrice), 'High': float(high),
+                       'Low': float(low), 'Close': float(close)}) + '\n'
+
+def _parseBar(line):
+    candle = json.loads(line)
+    return (candle['Date'], candle['Open'], candle['High'], candle['Low'], candle['Close'])
+
+
+class SocketFeed:
+    '''
+    Reads candles from a TCP socket, one JSON object per line with Date, Open, High, Low and Close
+    Stops when the other end closes the connection
+    '''
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+
+    def __iter__(self):
+        with socket.create_connection((self.host, self.port)) as connection:
+            for line in connection.makefile('r'):
+                if line.strip():
+                    yield _parseBar(line)
+
+
+class CandleServer:
+    '''
+    A local stand-in for an exchange, which sends the bars of a dataframe to the first client that connects
+    '''
+    def __init__(self, data, host='127.0.0.1', port=0, delay=0):
+        self.data = data
+        self.delay = delay
+        self.server = socket.create_server((host, port))
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+
+    def getAddress(self):
+        return self.server.getsockname()
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def _serve(self):
+        connection, _ = self.server.accept()
+        with connection:
+            for bar in ReplayFeed(self.data, self.delay):
+                try:
+                    connection.sendall(_formatBar(bar).encode())
+                except OSError:
+                    break
+        self.server.close()
+
+
+class PaperTrader:
+    '''
+    Runs a bot on a feed of candles, one bar at a time.
+
+    Only the bars the bot's indicators need are kept, plus the time taken to decide on
+    each of the last latencyWindow bars. The ledger still records a BotState for every bar
+    in the trading window, trade or not, so the history grows by one state per bar, as in a backtest.
+    onBar(date, state) is called after each bar with the latest BotState, if the bar produced one
+    '''
+    def __init__(self, bot, feed, onBar=None, latencyWindow=10000):
+        self.bot = bot
+        self.feed = feed
+        self.onBar = onBar
+        self.generator = bot.createSignalGenerator()
+        self.ledger = bot.startLedger()
+        self.latencies = deque(maxlen=latencyWindow)
+        self.numBars = 0
+        self.totalLatency = 0
+        self.maxLatency = 0
+        self.stopped = False
+
+    def stop(self):
+        '''
+        Stops a run which is in progress on another thread, after the current bar
+        '''
+        self.stopped = True
+
+    def processBar(self, bar):
+        '''
+        trades on one bar, returns the time taken in microseconds
+        '''
+        startTime = time.perf_counter_ns()
+        history = self.ledger['history']
+        numStates = len(history)
+        for signal in self.generator.update(*bar):
+            if not self.ledger['stopped'] and not self.bot.stepLedger(self.ledger, *signal):
+                self.ledger['stopped'] = True
+        latency = (time.perf_counter_ns() - startTime) / 1000
+
+        self.numBars += 1
+        self.totalLatency += latency
+        self.maxLatency = max(self.maxLatency, latency)
+        self.latencies.append(latency)
+        if self.onBar is not None:
+            self.onBar(bar[0], history[-1] if len(history) > numStates else None)
+        return latency
+
+    def run(self):
+        '''
+        trades on every bar of the feed, until the feed ends, the bot stops trading,
+        the End Trading Date is reached or stop() is called
+        returns the BacktestHistory of the trades
+        '''
+        for bar in self.feed:
+            self.processBar(bar)
+            if self.stopped or self.ledger['stopped'] or self.generator.isFinished():
+                break
+        if not self.ledger['stopped'] and self.generator.getFinalSignal() is not None:
+            self.bot.finishLedger(self.ledger, *self.generator.getFinalSignal())
+        return self.ledger['history']
+
+    def getHistory(self):
+        return self.ledger['history']
+
+    def getLatencyStats(self):
+        '''
+            returns a dict of the time taken to decide on each bar, in microseconds
+            the percentiles cover the last latencyWindow bars, the rest cover every bar
+        '''
+        ordered = sorted(self.latencies)
+        def percentile(p):
+            return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] if ordered else 0
+        return {
+            'bars': self.numBars,
+            'mean': self.totalLatency / self.numBars if self.numBars > 0 else 0,
+            'p50': percentile(50),
+            'p99': percentile(99),
+            'max': self.maxLatency,
+        }
+
+
+if __name__ == '__main__':
+    import pandas as pd
+    parser = argparse.ArgumentParser(description='Paper trade a saved bot on a replay of a dataset')
+    parser.add_argument('bot', help='saved bot file (.json)')
+    parser.add_argument('--data', required=True, help='CSV file in the cryptodatadownload.com layout')
+    parser.add_argument('--tcp', action='store_true', help='send the candles through a local TCP socket')
+    parser.add_argument('--delay', type=float, default=0, help='seconds between candles')
+    args = parser.parse_args()
+
+    with open(args.bot, 'r') as f:
+        botData = json.load(f)
+    bot = bots.createBot(botData['Bot Type'])
+    bot.setSaveData(botData)
+    data = pd.read_csv(args.data, header=1)
+
+    if args.tcp:
+        server = CandleServer(data, delay=args.delay).start()
+        feed = SocketFeed(*server.getAddress())
+    else:
+        feed = ReplayFeed(data, args.delay)
+
+    def printTrade(date, state):
+        if state is not None and state.getAction() != bots.Action.NOACTION:
+            print(date, state.getAction().name, round(state.getMarketPrice(), 2), round(state.getPortfolioValue(), 2))
+
+    trader = PaperTrader(bot, feed, onBar=printTrade)
+    history = trader.run()
+    stats = trader.getLatencyStats()
+    print(f"{stats['bars']} bars, decision latency mean {stats['mean']:.1f}us, "
+          f"p50 {stats['p50']:.1f}us, p99 {stats['p99']:.1f}us, max {stats['max']:.1f}us")
+    if len(history) > 0:
+        print("Final value", round(history.getLatestDataPoint().getPortfolioValue(), 2))
@@ -0,0 +1,147 @@
+#!/usr/bin/python3
+'''
+Profiles a single run with cProfile.
+
+Each profile is saved twice: as a .pstats file, for pstats, snakeviz or gprof2dot, and as
+collapsed stacks (one "outer;inner;function count" line per stack, with the count in
+microseconds), which flamegraph.pl, speedscope and inferno can draw as a flame graph.
+cProfile only records which function called which, so the stacks are rebuilt from those
+calls, splitting each function's time between its callers in proportion to their calls.
+'''
+import os, cProfile, pstats
+from datetime import datetime
+
+profileDirectory = os.path.join("logs", "profiles")
+
+
+class ProfileReport:
+    '''
+    The files a profile was saved to, and its slowest functions
+    '''
+    def __init__(self, pstatsPath, collapsedPath, topFunctions, totalTime):
+        self.pstatsPath = pstatsPath
+        self.collapsedPath = collapsedPath
+        self.topFunctions = topFunctions
+        self.totalTime = totalTime
+
+    def getPstatsPath(self):
+        return self.pstatsPath
+
+    def getCollapsedPath(self):
+        return self.collapsedPath
+
+    def getTopFunctions(self):
+        return self.topFunctions
+
+    def getTotalTime(self):
+        return self.totalTime
+
+
+def profileCall(function, name='run', directory=profileDirectory, limit=25):
+    '''
+        calls function with cProfile running on this thread, and saves the profile in directory
+        returns (the result of function, ProfileReport)
+        The profile is saved even if function raises
+    '''
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        result = function()
+    finally:
+        profiler.disable()
+        report = saveProfile(profiler, name, directory, limit)
+    return result, report
+
+
+def saveProfile(profiler, name='run', directory=profileDirectory, limit=25):
+    '''
+        writes the .pstats and collapsed stack files of a cProfile.Profile, returns a ProfileReport
+    '''
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    prefix = os.path.join(directory, f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+    stats = pstats.Stats(profiler)
+    stats.dump_stats(prefix + '.pstats')
+    writeCollapsedStacks(stats, prefix + '.collapsed.txt')
+    return ProfileReport(prefix + '.pstats', prefix + '.collapsed.txt', getTopFunctions(stats, limit), stats.total_tt)
+
+
+def functionName(function):
+    '''
+        returns a readable name for a pstats function key (file, line, name)
+    '''
+    path, line, name = function
+    if path == '~':
+        # built in functions
+        return name.strip('<>')
+    return f"{name} ({os.path.basename(path)}:{line})"
+
+
+def getTopFunctions(stats, limit=25, sortBy='tottime'):
+    '''
+        returns a list of dicts of the limit functions which took the most time, sorted by sortBy,
+        'tottime' for the time spent in the function itself or 'cumtime' to include what it called
+    '''
+    rows = []
+    for function, (primitiveCalls, calls, totalTime, cumulativeTime, callers) in stats.stats.items():
+        rows.append({'function': functionName(function), 'calls': calls, 'tottime': totalTime,
+                     'cumtime': cumulativeTime, 'percall': totalTime / calls if calls else 0})
+    rows.sort(key=lambda r: r[sortBy], reverse=True)
+    return rows[:limit]
+
+
+def collapseStacks(stats, minMicroseconds=1, maxDepth=100):
+    '''
+        returns {stack: microseconds} where a stack is the names of the functions from the outermost
+        to the one the time was spent in, joined by semicolons
+    '''
+    callees = {}
+    for function, (primitiveCalls, calls, totalTime, cumulativeTime, callers) in stats.stats.items():
+        for caller, edge in callers.items():
+            # edge is (primitive calls, calls, total time, cumulative time) of function when called from caller
+            callees.setdefault(caller, []).append((function, edge[3]))
+    roots = [f for f, s in stats.stats.items() if len(s[4]) == 0]
+    names = {f: functionName(f).replace(';', ',') for f in stats.stats}
+
+    stacks = {}
+    def walk(function, path, scale, onPath):
+        totalTime, cumulativeTime = stats.stats[function][2], stats.stats[function][3]
+        stack = path + [names[function]]
+        selfTime = totalTime * scale * 1e6
+        if selfTime >= minMicroseconds:
+            key = ';'.join(stack)
+            stacks[key] = stacks.get(key, 0) + selfTime
+        if len(stack) >= maxDepth:
+            return
+        for callee, edgeTime in callees.get(function, []):
+            if callee in onPath or stats.stats[callee][3] <= 0:
+                continue
+            # the share of the callee's time which came through this path
+            calleeScale = scale * edgeTime / stats.stats[callee][3]
+            if calleeScale * stats.stats[callee][3] * 1e6 < minMicroseconds:
+                continue
+            onPath.add(callee)
+            walk(callee, stack, calleeScale, onPath)
+            onPath.discard(callee)
+
+    for root in roots:
+        walk(root, [], 1.0, {root})
+    return stacks
+
+
+def writeCollapsedStacks(stats, path):
+    with open(path, 'w') as f:
+        for stack, microseconds in sorted(collapseStacks(stats).items()):
+            count = int(round(microseconds))
+            if count > 0:
+                f.write(f"{stack} {count}\n")
+
+
+def formatTopFunctions(topFunctions):
+    '''
+        returns the top functions as a table of text
+    '''
+    lines = [f"{'calls':>10} {'tottime':>9} {'cumtime':>9}  function"]
+    for row in topFunctions:
+        lines.append(f"{row['calls']:>10} {row['tottime']:9.4f} {row['cumtime']:9.4f}  {row['function']}")
+    return '\n'.join(lines)
@@ -0,0 +1,208 @@
+#!/usr/bin/python3
+import os, json, time, pickle, sqlite3, hashlib, tempfile
+
+from core import bots
+
+cacheDirectory = os.path.join("cache", "results")
+# the number of hits and misses of every process which has used a cache directory, not just this one,
+# are counted in this database, which stays the same size however many lookups there are
+statsName = 'stats.db'
+
+
+def datasetFingerprint(data):
+    '''
+        returns a hash of the contents of a dataframe of historical data
+    '''
+    import pandas as pd
+    h = hashlib.sha256()
+    h.update(json.dumps([str(c) for c in data.columns]).encode())
+    h.update(json.dumps([str(t) for t in data.dtypes]).encode())
+    h.update(pd.util.hash_pandas_object(data, index=False).values.tobytes())
+    return h.hexdigest()
+
+
+def makeKey(bot, data, fingerprint=None):
+    '''
+        returns the cache key for running bot over data
+        The key covers the bot type, every parameter which affects the result (the name doesn't),
+        the engine version and the contents of the data
+    '''
+    parameters = bot.getSaveData()
+    parameters.pop('Name', None)
+    keyData = {
+        'botType': bot.getName(),
+        'parameters': parameters,
+        'engineVersion': bots.engineVersion,
+        'dataset': fingerprint or datasetFingerprint(data),
+    }
+    return hashlib.sha256(json.dumps(keyData, sort_keys=True).encode()).hexdigest()
+
+
+class ResultCache:
+    '''
+    On-disk cache of backtest results, one file per result, named by the hash of everything the result depends on.
+
+    Entries are evicted when they are older than maxAgeDays, and least recently used entries
+    are evicted while the cache is larger than maxBytes.
+    Files are written atomically, so several processes can share one cache directory.
+    Hits and misses are counted by this object, and in the directory for every process.
+    '''
+    def __init__(self, path=cacheDirectory, maxBytes=500*1024*1024, maxAgeDays=30):
+        self.path = path
+        self.maxBytes = maxBytes
+        self.maxAgeDays = maxAgeDays
+        self.hits = 0
+        self.misses = 0
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def _entryPath(self, key):
+        return os.path.join(self.path, key + '.pickle')
+
+    def _connectStats(self):
+        connection = sqlite3.connect(os.path.join(self.path, statsName), timeout=10)
+        # the counts aren't worth waiting for the disk on every lookup
+        connection.execute('PRAGMA synchronous = OFF')
+        connection.execute('CREATE TABLE IF NOT EXISTS lookups (name TEXT PRIMARY KEY, count INTEGER NOT NULL)')
+        return connection
+
+    def _logLookup(self, hit):
+        # sqlite locks the file, so processes sharing the cache can count at the same time
+        try:
+            connection = self._connectStats()
+            try:
+                with connection:
+                    connection.execute('''
+                        INSERT INTO lookups VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET count = count + 1''',
+                        ('hits' if hit else 'misses',))
+            finally:
+                connection.close()
+        except sqlite3.Error:
+            pass
+
+    def _readLookups(self):
+        # returns the total (hits, misses) of every process
+        try:
+            connection = self._connectStats()
+            try:
+                counts = dict(connection.execute('SELECT name, count FROM lookups').fetchall())
+            finally:
+                connection.close()
+        except sqlite3.Error:
+            counts = {}
+        return counts.get('hits', 0), counts.get('misses', 0)
+
+    def get(self, key):
+        '''
+            returns the BacktestHistory stored under key, or None
+        '''
+        path = self._entryPath(key)
+        try:
+            with open(path, 'rb') as f:
+                buySellData = pickle.load(f)
+            os.utime(path) # mark as recently used
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            self.misses += 1
+            self._logLookup(False)
+            return None
+        self.hits += 1
+        self._logLookup(True)
+        return buySellData
+
+    def put(self, key, buySellData):
+        fd, tmpPath = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(buySellData, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmpPath, self._entryPath(key))
+        self.evict()
+
+    def _entries(self):
+        # returns a list of (last used time, size, path), least recently used first
+        entries = []
+        for name in os.listdir(self.path):
+            if not name.endswith('.pickle'):
+                continue
+            path = os.path.join(self.path, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        return entries
+
+    def evict(self):
+        '''
+            removes entries which are too old, then the least recently used entries until the cache fits in maxBytes
+        '''
+        entries = self._entries()
+        oldest = time.time() - self.maxAgeDays*24*60*60
+        total = sum(size for _, size, _ in entries)
+        for lastUsed, size, path in entries:
+            if lastUsed >= oldest and total <= self.maxBytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        for _, _, path in self._entries():
+            os.remove(path)
+        try:
+            os.remove(os.path.join(self.path, statsName))
+        except OSError:
+            pass
+
+    def getStats(self):
+        '''
+            returns a dict of the hits, misses and hit rate of this cache object, the same for every
+            process which has used the cache directory since it was cleared, and the size of the cache on disk
+        '''
+        entries = self._entries()
+        lookups = self.hits + self.misses
+        totalHits, totalMisses = self._readLookups()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hitRate': self.hits / lookups if lookups > 0 else 0,
+            'totalHits': totalHits,
+            'totalMisses': totalMisses,
+            'totalHitRate': totalHits / (totalHits + totalMisses) if totalHits + totalMisses > 0 else 0,
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+        }
+
+
+def formatStats(stats):
+    '''
+        returns a line describing a dict from ResultCache.getStats
+    '''
+    return (f"Result cache: {stats['totalHits']} hits, {stats['totalMisses']} misses "
+            f"({stats['totalHitRate']*100:.1f}% hit rate), {stats['entries']} entries, {stats['bytes']/1024/1024:.1f} MB")
+
+
+_defaultCache = None
+
+def getDefaultCache():
+    global _defaultCache
+    if _defaultCache is None:
+        _defaultCache = ResultCache()
+    return _defaultCache
+
+
+def runCached(bot, data, cache=None):
+    '''
+        returns bot.processHistoricalData(data), from the cache if this bot has already been run on this data
+    '''
+    cache = cache or getDefaultCache()
+    key = makeKey(bot, data)
+    buySellData = cache.get(key)
+    if buySellData is None:
+        buySellData = bot.processHistoricalData(data)
+        cache.put(key, buySellData)
+    else:
+        # a cached result is finished straight away, unless the run was cancelled first
+        bot._updateProgress(1, 1)
+    return buySellData
@@ -0,0 +1,181 @@
+#!/usr/bin/python3
+'''
+Risk metrics of a backtest, updated as each state is added to its BacktestHistory,
+so they are ready as soon as the run finishes without another pass over the history.
+
+Returns are the change in portfolio value from one state to the next. They are annualised
+with the number of states per year of the run, so hourly and daily data both work,
+and a year is 365 days since coins trade every day. The risk free rate is taken as 0.
+Ratios which can't be calculated, such as the Sharpe ratio of a run which never changed value, are 0.
+'''
+import math
+
+secondsPerYear = 365 * 24 * 60 * 60
+
+# name shown in the views : (RiskMetrics getter, True if larger values are better, False if smaller are,
+# None if neither, tool tip)
+objectives = {
+    'Max Drawdown (%)': ('getMaxDrawdown', False, 'Largest drop in portfolio value from a previous peak'),
+    'Max Drawdown Duration (days)': ('getMaxDrawdownDuration', False, 'Most days spent below a previous peak'),
+    'Volatility (%)': ('getVolatility', False, 'Annualised standard deviation of the returns'),
+    'Sharpe Ratio': ('getSharpeRatio', True, 'Annualised mean return divided by the standard deviation of the returns'),
+    'Sortino Ratio': ('getSortinoRatio', True, 'Annualised mean return divided by the deviation of the losing returns'),
+    'Calmar Ratio': ('getCalmarRatio', True, 'Compound annual return divided by the max drawdown'),
+    'Exposure (%)': ('getExposure', None, 'Percentage of the time coins were held'),
+}
+
+
+class RiskMetrics:
+    '''
+    Running totals of the portfolio value of a backtest, see update
+    '''
+    def __init__(self):
+        self.numStates = 0
+        self.firstDate = None
+        self.lastDate = None
+        self.firstValue = 0
+        self.lastValue = 0
+        # drawdown
+        self.peak = 0
+        self.peakDate = None
+        self.maxDrawdown = 0
+        self.maxDrawdownDuration = 0
+        # returns, with Welford's running mean and variance
+        self.numReturns = 0
+        self.meanReturn = 0
+        self.squaredDeviations = 0
+        self.downsideSquares = 0
+        # states holding coins
+        self.exposedStates = 0
+
+    def update(self, date, value, coin):
+        '''
+            adds the next state of the backtest, value is its portfolio value and coin the amount of coin held
+        '''
+        if self.numStates == 0:
+            self.firstDate = date
+            self.firstValue = value
+            self.peak = value
+            self.peakDate = date
+        else:
+            if self.lastValue > 0:
+                r = value / self.lastValue - 1
+                self.numReturns += 1
+                delta = r - self.meanReturn
+                self.meanReturn += delta / self.numReturns
+                self.squaredDeviations += delta * (r - self.meanReturn)
+                if r < 0:
+                    self.downsideSquares += r * r
+            if value >= self.peak:
+                self.peak = value
+                self.peakDate = date
+            else:
+                if self.peak != 0:
+                    drawdown = (self.peak - value) / self.peak * 100
+                    if drawdown > self.maxDrawdown:
+                        self.maxDrawdown = drawdown
+                # how long the portfolio has been below its peak
+                duration = (date - self.peakDate).days
+                if duration > self.maxDrawdownDuration:
+                    self.maxDrawdownDuration = duration
+        if coin > 0:
+            self.exposedStates += 1
+        self.numStates += 1
+        self.lastDate = date
+        self.lastValue = value
+
+    def copy(self):
+        metrics = RiskMetrics()
+        metrics.__dict__.update(self.__dict__)
+        return metrics
+
+    def getYears(self):
+        if self.numStates < 2:
+            return 0
+        return (self.lastDate - self.firstDate).total_seconds() / secondsPerYear
+
+    def getStatesPerYear(self):
+        years = self.getYears()
+        return self.numReturns / years if years > 0 else 0
+
+    def getMaxDrawdown(self):
+        '''
+            returns the largest drop in portfolio value from a previous peak, as a percentage of the peak
+        '''
+        return self.maxDrawdown
+
+    def getMaxDrawdownDuration(self):
+        '''
+            returns the most days the portfolio value spent below a previous peak
+        '''
+        return self.maxDrawdownDuration
+
+    def getVolatility(self):
+        '''
+            returns the annualised standard deviation of the returns, as a percentage
+        '''
+        if self.numReturns < 2:
+            return 0
+        return math.sqrt(self.squaredDeviations / (self.numReturns - 1) * self.getStatesPerYear()) * 100
+
+    def getAnnualReturn(self):
+        '''
+            returns the compound annual growth of the portfolio value, as a percentage
+        '''
+        years = self.getYears()
+        if years <= 0 or self.firstValue <= 0 or self.lastValue < 0:
+            return 0
+        return ((self.lastValue / self.firstValue) ** (1 / years) - 1) * 100
+
+    def getSharpeRatio(self):
+        if self.numReturns < 2 or self.squaredDeviations <= 0:
+            return 0
+        deviation = math.sqrt(self.squaredDeviations / (self.numReturns - 1))
+        return self.meanReturn / deviation * math.sqrt(self.getStatesPerYear())
+
+    def getSortinoRatio(self):
+        if self.numReturns < 2 or self.downsideSquares <= 0:
+            return 0
+        deviation = math.sqrt(self.downsideSquares / self.numReturns)
+        return self.meanReturn / deviation * math.sqrt(self.getStatesPerYear())
+
+    def getCalmarRatio(self):
+        if self.maxDrawdown <= 0:
+            return 0
+        return self.getAnnualReturn() / self.maxDrawdown
+
+    def getExposure(self):
+        '''
+            returns the percentage of states in which coins were held
+        '''
+        if self.numStates == 0:
+            return 0
+        return self.exposedStates / self.numStates * 100
+
+    def getObjective(self, name):
+        '''
+            returns the metric called name in objectives, negated if smaller values are better,
+            so an optimiser can always maximise it
+            Raises ValueError for a metric which is neither better larger nor smaller, such as the exposure
+        '''
+        getter, higherIsBetter, toolTip = objectives[name]
+        if higherIsBetter is None:
+            raise ValueError(name + ' describes a strategy, it is neither better larger nor smaller')
+        value = getattr(self, getter)()
+        return value if higherIsBetter else -value
+
+    def getSummary(self):
+        '''
+            returns a dict of every metric in objectives, keyed by its name
+        '''
+        return {name: getattr(self, objective[0])() for name, objective in objectives.items()}
+
+
+def fromHistory(history):
+    '''
+        returns the RiskMetrics of the states already in a BacktestHistory
+    '''
+    metrics = RiskMetrics()
+    for state in history:
+        metrics.update(state.getDateStamp(), state.getPortfolioValue(), state.getCoinAmount())
+    return metrics
@@ -0,0 +1,290 @@
+#!/usr/bin/python3
+'''
+Signal generators work out the same signals as Bot.computeSignals, but one bar at a time.
+
+Bars must be given oldest first. Each call to update returns the signals for that bar,
+as (date, price, buy, sell) tuples like the ones in a SignalStream. A generator only keeps
+the bars its indicators need, and it can be copied (copy.deepcopy or pickle) at any point
+to carry on from there later, which is what checkpoints, replays and chunked runs rely on.
+'''
+import math
+from collections import deque
+from datetime import datetime, timedelta
+
+
+def iterBars(data):
+    '''
+        yields (date, open, high, low, close) for every row of a dataframe of historical data, oldest first
+        The dates are left as they are in the dataframe
+    '''
+    import pandas as pd
+    order = pd.to_datetime(data.Date).values.argsort(kind='stable')
+    columns = [data[c].values[order] for c in ['Date', 'Open', 'High', 'Low', 'Close']]
+    yield from zip(*columns)
+
+
+def _toTimestamp(date):
+    import pandas as pd
+    return pd.Timestamp(date)
+
+def _toDate(date):
+    if isinstance(date, str) and len(date) == 10:
+        return datetime.strptime(date, '%Y-%m-%d').date()
+    return _toTimestamp(date).date()
+
+
+class SignalGenerator:
+    '''
+    Each of the following methods should be overridden by a child class
+    '''
+    def __init__(self, startTradingDate, endTradingDate):
+        self.startTradingDate = startTradingDate
+        self.endTradingDate = endTradingDate
+        self.finished = False
+        self.finalSignal = None
+
+    def update(self, date, openPrice, high, low, close):
+        '''
+        Overwrite this function
+        returns a list of the signals for this bar, empty once the generator has finished
+        '''
+        raise NotImplementedError()
+
+    def setEndTradingDate(self, endTradingDate):
+        '''
+        moves the end of the trading window, only allowed before the generator has finished
+        '''
+        self.endTradingDate = endTradingDate
+
+    def isFinished(self):
+        return self.finished
+
+    def getFinalSignal(self):
+        return self.finalSignal
+
+
+class ROCSignals(SignalGenerator):
+    def __init__(self, startTradingDate, endTradingDate, shortROCInterval, longROCInterval, consecDays):
+        super().__init__(startTradingDate, endTradingDate)
+        self.shortROCInterval = shortROCInterval
+        self.longROCInterval = longROCInterval
+        self.consecDays = consecDays
+        self.numDaysToBuy = consecDays
+        self.numDaysToSell = consecDays
+        # only the close prices within the longest interval are kept
+        self.closePrices = {}
+        self.closeDates = deque()
+
+    def _calculateNDayROC(self, currentValue, currentDate, numdays):
+        pastDate = currentDate - timedelta(days=numdays)
+        if pastDate in self.closePrices:
+            valDaysAgo = self.closePrices[pastDate]
+            return (currentValue - valDaysAgo) / valDaysAgo * 100
+        return None
+
+    def update(self, date, openPrice, high, low, close):
+        date = _toTimestamp(date)
+        if self.finished or date > self.endTradingDate:
+            self.finished = True
+            return []
+
+        self.closePrices[date] = close
+        self.closeDates.append(date)
+        oldest = date - timedelta(days=max(self.shortROCInterval, self.longROCInterval))
+        while self.closeDates[0] < oldest:
+            del self.closePrices[self.closeDates.popleft()]
+
+        if date < self.startTradingDate:
+            return []
+        shortROC = self._calculateNDayROC(close, date, self.shortROCInterval)
+        longROC = self._calculateNDayROC(close, date, self.longROCInterval)
+        if shortROC is None or longROC is None:
+            self.numDaysToSell = self.consecDays
+            self.numDaysToBuy = self.consecDays
+            return [(date, close, None, None)]
+
+        if shortROC < longROC:
+            self.numDaysToBuy -= 1
+            self.numDaysToSell = self.consecDays
+        elif shortROC > longROC:
+            self.numDaysToSell -= 1
+            self.numDaysToBuy = self.consecDays
+        else:
+            self.numDaysToSell = self.consecDays
+            self.numDaysToBuy = self.consecDays
+        buy = self.numDaysToBuy <= 0
+        sell = self.numDaysToSell <= 0 and not buy
+        if buy or sell:
+            self.numDaysToSell = self.consecDays
+            self.numDaysToBuy = self.consecDays
+        return [(date, close, buy, sell)]
+
+
+class RSISignals(SignalGenerator):
+    def __init__(self, startTradingDate, endTradingDate, upperThreshold, lowerThreshold, windowSize):
+        super().__init__(startTradingDate, endTradingDate)
+        self.upperThreshold = upperThreshold
+        self.lowerThreshold = lowerThreshold
+        self.windowSize = windowSize
+        self.firstDate = None
+        self.upClose = deque(maxlen=windowSize)
+        self.downClose = deque(maxlen=windowSize)
+        self.prevOverbought = True
+        self.prevOversold = True
+
+    def _calculateRSI(self, date):
+        # the RSI isn't defined until a full window after the first bar
+        if len(self.upClose) < self.windowSize or date <= self.firstDate + timedelta(days=self.windowSize):
+            return math.nan
+        up = math.fsum(self.upClose) / self.windowSize
+        down = math.fsum(self.downClose) / self.windowSize
+        if down == 0:
+            return 100.0 if up > 0 else math.nan
+        return 100 - (100/(1+up/down))
+
+    def update(self, date, openPrice, high, low, close):
+        date = _toTimestamp(date)
+        if self.firstDate is None:
+            self.firstDate = date
+        gain = close - openPrice
+        self.upClose.append(max(gain, 0))
+        self.downClose.append(-min(gain, 0))
+        if self.finished or date > self.endTradingDate:
+            self.finished = True
+            return []
+        if date < self.startTradingDate:
+            return []
+
+        rsi = self._calculateRSI(date)
+        overbought = rsi > self.upperThreshold
+        oversold = rsi < self.lowerThreshold
+        signal = (date, close, (not self.prevOversold) and oversold, (not self.prevOverbought) and overbought)
+        self.prevOverbought = overbought
+        self.prevOversold = oversold
+        return [signal]
+
+
+class MovingAverageSignals(SignalGenerator):
+    '''
+    Base class for the moving average bots, which use the average of the high and low price of each day.
+    Missing days are filled in with the average of the days either side of them.
+    Each child class sets windows, and overrides _startAverages and _updateAverages and _signal
+    '''
+    def __init__(self, startTradingDate, endTradingDate, windows):
+        super().__init__(startTradingDate, endTradingDate)
+        self.windows = windows
+        self.prices = deque(maxlen=max(windows) + 1)
+        self.sums = None
+        self.averages = None
+        self.prevDate = None
+
+    def update(self, date, openPrice, high, low, close):
+        date = _toDate(date)
+        price = (high + low)/2
+        signals = []
+        if self.prevDate is not None and date != self.prevDate + timedelta(1):
+            avg = (price + self.prices[-1]) / 2
+            for j in range((date - self.prevDate).days - 1):
+                signals += self._addDay(self.prevDate + timedelta(1 + j), avg)
+        signals += self._addDay(date, price)
+        self.prevDate = date
+        return signals
+
+    def _addDay(self, date, price):
+        if self.finished:
+            return []
+        self.prices.append(price)
+        if self.sums is None:
+            if date < self.startTradingDate.date():
+                return []
+            if len(self.prices) < max(self.windows):
+                raise IndexError
+            # sum each window from the newest day back, the same as computeSignals
+            self.sums = []
+            for window in self.windows:
+                total = 0
+                for k in range(1, window + 1):
+                    total += self.prices[-k]
+                self.sums.append(total)
+            self._startAverages()
+        else:
+            self._updateAverages(price)
+
+        if date < self.endTradingDate.date():
+            return [(date, price) + self._signal(False)]
+        self.finished = True
+        self.finalSignal = (date, price) + self._signal(True)
+        return []
+
+    def _tail(self, window):
+        # the price which has just left a window
+        return self.prices[-(window + 1)]
+
+
+class TMASignals(MovingAverageSignals):
+    def __init__(self, startTradingDate, endTradingDate, shortDays, mediumDays, longDays):
+        super().__init__(startTradingDate, endTradingDate, [shortDays, mediumDays, longDays])
+
+    def _startAverages(self):
+        self.averages = [self.sums[i] / self.windows[i] for i in range(3)]
+
+    def _updateAverages(self, price):
+        short, medium, long = self.windows
+        self.sums[0] += price
+        self.sums[0] -= self._tail(short)
+        # the medium sum drops the day leaving the short window, as computeSignals does
+        self.sums[1] += price
+        self.sums[1] -= self._tail(short)
+        self.sums[2] += price
+        self.sums[2] -= self._tail(long)
+        self._startAverages()
+
+    def _signal(self, final):
+        shortTermAvg, medTermAvg, longTermAvg = self.averages
+        if final:
+            return (shortTermAvg > longTermAvg, shortTermAvg < longTermAvg)
+        return ((shortTermAvg >= medTermAvg) and (medTermAvg >= longTermAvg),
+                ((shortTermAvg <= medTermAvg) and (medTermAvg <= longTermAvg)) or
+                ((shortTermAvg >= medTermAvg) and (medTermAvg <= longTermAvg)))
+
+
+class SMASignals(MovingAverageSignals):
+    def __init__(self, startTradingDate, endTradingDate, shortDays, longDays):
+        super().__init__(startTradingDate, endTradingDate, [shortDays, longDays])
+
+    def _startAverages(self):
+        self.averages = [self.sums[i] / self.windows[i] for i in range(2)]
+
+    def _updateAverages(self, price):
+        for i in range(2):
+            self.sums[i] += price
+            self.sums[i] -= self._tail(self.windows[i])
+        self._startAverages()
+
+    def _signal(self, final):
+        shortTermAvg, longTermAvg = self.averages
+        return (shortTermAvg > longTermAvg, shortTermAvg < longTermAvg)
+
+
+class DEMASignals(SMASignals):
+    def _updateAverages(self, price):
+        # Exponential Factor = 2/(N + 1)
+        for i in range(2):
+            self.averages[i] += 2/(self.windows[i] + 1)*(price - self.averages[i])
+
+
+def generateSignals(bot, data):
+    '''
+        returns the same SignalStream as bot.computeSignals(data), worked out one bar at a time
+    '''
+    from core.bots import SignalStream
+    generator = bot.createSignalGenerator()
+    signalStream = SignalStream()
+    for bar in iterBars(data):
+        for signal in generator.update(*bar):
+            signalStream.addSignal(*signal)
+        if generator.isFinished():
+            break
+    if generator.getFinalSignal() is not None:
+        signalStream.setFinalSignal(*generator.getFinalSignal())
+    return signalStream
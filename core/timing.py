@@ -0,0 +1,146 @@
+#!/usr/bin/python3
+'''
+Timing spans for the stages of a simulation.
+
+Each span records how long one stage took, e.g. loading the data, running the bot or filling
+the statistics tables. Spans are kept in memory for the rest of the session, and appended to
+a log file as one JSON object per line:
+
+    {"stage": "simulation.bot", "seconds": 0.412, "time": "2021-03-02T10:15:01", "session": "...", "bot": "ROC"}
+
+Spans can be recorded from any thread. Listeners are called on the thread that recorded the span.
+'''
+import os, json, time, threading, contextlib
+from collections import deque
+from datetime import datetime
+
+logPath = os.path.join("logs", "timings.jsonl")
+maxLogBytes = 5*1024*1024
+historyLength = 10000
+
+sessionId = datetime.now().strftime('%Y%m%d%H%M%S') + '-' + str(os.getpid())
+
+_history = deque(maxlen=historyLength)
+_listeners = []
+_lock = threading.Lock()
+
+
+class Span:
+    '''
+    A stage which started when the Span was created, and is recorded when stop() is called
+    Useful when a stage starts and ends in different functions
+    '''
+    def __init__(self, stage, **fields):
+        self.stage = stage
+        self.fields = fields
+        self.startTime = time.perf_counter()
+        self.stopped = False
+
+    def stop(self, **fields):
+        '''
+            records the span, with any extra fields, and returns its length in seconds
+            a span is only recorded once
+        '''
+        seconds = time.perf_counter() - self.startTime
+        if not self.stopped:
+            self.stopped = True
+            self.fields.update(fields)
+            record(self.stage, seconds, **self.fields)
+        return seconds
+
+
+@contextlib.contextmanager
+def span(stage, **fields):
+    '''
+        records how long the body of the with statement takes
+        If it raises, the span is recorded with the name of the exception as its error
+    '''
+    s = Span(stage, **fields)
+    try:
+        yield s
+    except BaseException as e:
+        s.stop(error=type(e).__name__)
+        raise
+    s.stop()
+
+
+def record(stage, seconds, **fields):
+    '''
+        records a span which has already been timed
+    '''
+    entry = {'stage': stage, 'seconds': seconds, 'time': datetime.now().isoformat(timespec='milliseconds'),
+             'session': sessionId}
+    entry.update(fields)
+    with _lock:
+        _history.append(entry)
+        listeners = list(_listeners)
+        _writeLog(entry)
+    for listener in listeners:
+        listener(entry)
+    return entry
+
+
+def _writeLog(entry):
+    global logPath
+    if logPath is None:
+        return
+    try:
+        directory = os.path.dirname(logPath)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        if os.path.exists(logPath) and os.path.getsize(logPath) > maxLogBytes:
+            os.replace(logPath, logPath + '.1')
+        with open(logPath, 'a') as f:
+            f.write(json.dumps(entry, default=str) + '\n')
+    except OSError:
+        # timing shouldn't stop a simulation, so stop logging if the file can't be written
+        logPath = None
+
+
+def setLogPath(path):
+    '''
+        sets the file spans are logged to, None stops logging to a file
+    '''
+    global logPath
+    logPath = path
+
+
+def addListener(listener):
+    '''
+        listener(entry) is called with the dict of each span as it's recorded
+    '''
+    with _lock:
+        _listeners.append(listener)
+
+def removeListener(listener):
+    with _lock:
+        if listener in _listeners:
+            _listeners.remove(listener)
+
+
+def getHistory(stage=None):
+    '''
+        returns the spans recorded this session, oldest first, optionally only those of one stage
+    '''
+    with _lock:
+        return [e for e in _history if stage is None or e['stage'] == stage]
+
+def clearHistory():
+    with _lock:
+        _history.clear()
+
+def getStageSummary():
+    '''
+        returns {stage: {'count', 'last', 'mean', 'max', 'total'}} in seconds, over the spans recorded this session
+    '''
+    summary = {}
+    for entry in getHistory():
+        seconds = entry['seconds']
+        stats = summary.setdefault(entry['stage'], {'count': 0, 'last': 0, 'mean': 0, 'max': 0, 'total': 0})
+        stats['count'] += 1
+        stats['last'] = seconds
+        stats['total'] += seconds
+        stats['max'] = max(stats['max'], seconds)
+    for stats in summary.values():
+        stats['mean'] = stats['total'] / stats['count']
+    return summary
@@ -0,0 +1,95 @@
+#!/usr/bin/python3
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QHeaderView, QPushButton, QLabel
+from PyQt5.QtCore import pyqtSignal
+
+from core import timing, resultCache
+
+class DiagnosticsView(QWidget):
+    '''
+    Shows how long each stage of the simulations run this session took.
+    The top table has a row per stage, selecting one lists every time it was recorded below.
+    The hit rate of the result cache, over every process which has used it, is shown underneath.
+    '''
+    spanRecorded = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.layout = QVBoxLayout(self)
+
+        self.stageTable = QTableWidget(0, 5)
+        self.stageTable.setHorizontalHeaderLabels(['Stage', 'Runs', 'Last (ms)', 'Mean (ms)', 'Max (ms)'])
+        self.stageTable.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.stageTable.setSelectionBehavior(QTableWidget.SelectRows)
+        self.stageTable.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.stageTable.itemSelectionChanged.connect(self.showStageHistory)
+        self.layout.addWidget(self.stageTable)
+
+        self.historyLabel = QLabel('Select a stage to see each time it ran')
+        self.layout.addWidget(self.historyLabel)
+        self.historyTable = QTableWidget(0, 3)
+        self.historyTable.setHorizontalHeaderLabels(['Time', 'Time Taken (ms)', 'Details'])
+        self.historyTable.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.historyTable.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.layout.addWidget(self.historyTable)
+
+        self.cacheLabel = QLabel()
+        self.layout.addWidget(self.cacheLabel)
+
+        buttons = QHBoxLayout()
+        buttons.addWidget(QLabel('Logged to ' + str(timing.logPath)))
+        buttons.addStretch(1)
+        self.clearButton = QPushButton('Clear')
+        self.clearButton.clicked.connect(self.clear)
+        buttons.addWidget(self.clearButton)
+        self.layout.addLayout(buttons)
+
+        # spans can be recorded on worker threads, the signal queues them to this widget's thread
+        self.spanRecorded.connect(self.refresh)
+        timing.addListener(self.spanRecorded.emit)
+        self.refresh()
+
+    def getSelectedStage(self):
+        rows = self.stageTable.selectionModel().selectedRows()
+        if len(rows) == 0:
+            return None
+        return self.stageTable.item(rows[0].row(), 0).text()
+
+    def refresh(self, entry=None):
+        selected = self.getSelectedStage()
+        summary = timing.getStageSummary()
+        self.stageTable.blockSignals(True)
+        self.stageTable.setRowCount(len(summary))
+        for row, stage in enumerate(sorted(summary)):
+            stats = summary[stage]
+            self.stageTable.setItem(row, 0, QTableWidgetItem(stage))
+            self.stageTable.setItem(row, 1, QTableWidgetItem(str(stats['count'])))
+            self.stageTable.setItem(row, 2, QTableWidgetItem("{0:,.1f}".format(stats['last']*1000)))
+            self.stageTable.setItem(row, 3, QTableWidgetItem("{0:,.1f}".format(stats['mean']*1000)))
+            self.stageTable.setItem(row, 4, QTableWidgetItem("{0:,.1f}".format(stats['max']*1000)))
+            if stage == selected:
+                self.stageTable.selectRow(row)
+        self.stageTable.blockSignals(False)
+        self.showStageHistory()
+        # the cache only changes during a simulation, so its stats are read once it has finished
+        if entry is None or entry['stage'] == 'simulation.total':
+            self.cacheLabel.setText(resultCache.formatStats(resultCache.getDefaultCache().getStats()))
+
+    def showStageHistory(self):
+        stage = self.getSelectedStage()
+        if stage is None:
+            self.historyTable.setRowCount(0)
+            return
+        self.historyLabel.setText(stage)
+        history = list(reversed(timing.getHistory(stage)))
+        self.historyTable.setRowCount(len(history))
+        for row, entry in enumerate(history):
+            details = ', '.join(f"{k}: {v}" for k, v in entry.items() if k not in ['stage', 'seconds', 'time', 'session'])
+            self.historyTable.setItem(row, 0, QTableWidgetItem(entry['time'].replace('T', ' ')))
+            self.historyTable.setItem(row, 1, QTableWidgetItem("{0:,.1f}".format(entry['seconds']*1000)))
+            self.historyTable.setItem(row, 2, QTableWidgetItem(details))
+
+    def clear(self):
+        timing.clearHistory()
+        self.stageTable.clearSelection()
+        self.historyLabel.setText('Select a stage to see each time it ran')
+        self.refresh()
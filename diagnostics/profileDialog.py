@@ -0,0 +1,37 @@
+#!/usr/bin/python3
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QHeaderView, QPushButton
+from PyQt5.QtCore import Qt
+
+class ProfileDialog(QDialog):
+    '''
+    Shows the functions which took the most time in a profiled simulation, and where the profile was saved
+    '''
+    def __init__(self, parent, report, botName):
+        super().__init__(parent)
+        self.setWindowTitle('Profile - ' + botName)
+        self.resize(800, 500)
+        self.layout = QVBoxLayout(self)
+
+        summary = QLabel(f"Total time {report.getTotalTime():,.3f}s<br>"
+                         f"Saved to {report.getPstatsPath()}<br>"
+                         f"Collapsed stacks for flame graphs in {report.getCollapsedPath()}")
+        summary.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        summary.setWordWrap(True)
+        self.layout.addWidget(summary)
+
+        topFunctions = report.getTopFunctions()
+        self.table = QTableWidget(len(topFunctions), 5)
+        self.table.setHorizontalHeaderLabels(['Function', 'Calls', 'Own Time (s)', 'Total Time (s)', 'Per Call (ms)'])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        for row, function in enumerate(topFunctions):
+            self.table.setItem(row, 0, QTableWidgetItem(function['function']))
+            self.table.setItem(row, 1, QTableWidgetItem("{0:,}".format(function['calls'])))
+            self.table.setItem(row, 2, QTableWidgetItem("{0:,.4f}".format(function['tottime'])))
+            self.table.setItem(row, 3, QTableWidgetItem("{0:,.4f}".format(function['cumtime'])))
+            self.table.setItem(row, 4, QTableWidgetItem("{0:,.4f}".format(function['percall']*1000)))
+        self.layout.addWidget(self.table)
+
+        closeButton = QPushButton('Close')
+        closeButton.clicked.connect(self.accept)
+        self.layout.addWidget(closeButton)
@@ -23,5 +23,10 @@ class InvalidIntervals(Exception):
 
 class InvalidThresholds(Exception):
     " Raised when there is InvalidInpt"
+    def __init__(self,*args,**kwargs):
+        Exception.__init__(self,*args,**kwargs)
+
+class SimulationCancelled(Exception):
+    " Raised inside a bot when a running simulation has been cancelled"
     def __init__(self,*args,**kwargs):
         Exception.__init__(self,*args,**kwargs)
\ No newline at end of file
@@ -4,21 +4,73 @@ from datetime import datetime
 import urllib.request
 import urllib.error
 import shutil
+import tempfile
 import os
 
+from core import timing
+
 dataDirectory = "data"
 
-def getData(exchange="Bitfinex", resolution="day", coin="BTC"):
+# the columns the bots use, the rest are dropped by the compact load mode
+usedColumns = ['Date', 'Symbol', 'Open', 'High', 'Low', 'Close']
+priceColumns = ['Open', 'High', 'Low', 'Close']
+
+# data already read in this process, keyed by (exchange, resolution, coin, compact, float32)
+_dataCache = {}
+
+def getData(exchange="Bitfinex", resolution="day", coin="BTC", compact=False, float32=False):
     '''
     Use this function to download and retrieve historical price data
     Returns a pandas dataframe of the data
+    The same dataframe is shared by every caller asking for the same data, so don't modify it
+    compact and float32 are passed on to readData
 
     TODO: figure out which exchanges/coins will work
     '''
-    filePath = downloadData(exchange, resolution, coin)
-    data = pd.read_csv(filePath,header=1)
+    key = (exchange, resolution, coin, compact, float32)
+    with timing.span('data.load', exchange=exchange, coin=coin, cached=key in _dataCache):
+        if key not in _dataCache:
+            filePath = downloadData(exchange, resolution, coin)
+            _dataCache[key] = readData(filePath, compact, float32)
+    return _dataCache[key]
+
+def readData(filePath, compact=False, float32=False):
+    '''
+    Reads a csv file in the cryptodatadownload.com layout
+    By default every column is read as pandas parses it, with the dates as strings.
+    If compact is True only the columns the bots use are read, with the dates as datetime64,
+    the symbol as a category, and the prices as float32 if float32 is True.
+    float32 prices use half the memory but can change results slightly, as the bots then do their sums in float32
+    '''
+    if not compact:
+        return pd.read_csv(filePath, header=1)
+    data = pd.read_csv(filePath, header=1, usecols=lambda c: c in usedColumns,
+                       dtype={'Symbol': 'category'})
+    return compactData(data, float32)
+
+def compactData(data, float32=False):
+    '''
+    Returns a copy of a dataframe of historical data in the form readData(compact=True) gives
+    '''
+    data = data[[c for c in usedColumns if c in data.columns]].copy()
+    data['Date'] = pd.to_datetime(data['Date'])
+    if 'Symbol' in data.columns:
+        data['Symbol'] = data['Symbol'].astype('category')
+    for column in priceColumns:
+        data[column] = data[column].astype('float32' if float32 else 'float64')
     return data
 
+def getBytesPerRow(data):
+    '''
+    Returns the memory used by a dataframe divided by its number of rows, counting the contents of strings
+    '''
+    if len(data) == 0:
+        return 0
+    return data.memory_usage(index=True, deep=True).sum() / len(data)
+
+def clearCache():
+    _dataCache.clear()
+
 def downloadData(exchange="Bitfinex", resolution="day", coin="BTC"):
     '''
     This function shouldn't be used outside of this module
@@ -41,24 +93,42 @@ def downloadData(exchange="Bitfinex", resolution="day", coin="BTC"):
     print("Downloading from {}".format(fullUrl))
 
     # make sure there is a data folder
-    if not os.path.isdir(dataDirectory):
-        os.mkdir(dataDirectory)
+    os.makedirs(dataDirectory, exist_ok=True)
 
-    # confirm url exists
+    # the file is downloaded under a temporary name and then renamed, so other
+    # processes downloading the same file never read one that is half written
+    fd, tmpPath = tempfile.mkstemp(dir=dataDirectory, suffix='.tmp')
     try:
-        with urllib.request.urlopen(fullUrl) as response:
-            with open(filePath, 'wb') as outFile:
-                print("Written")
-                shutil.copyfileobj(response, outFile)
-    except urllib.error.HTTPError:
-        print("Downloading from {}".format(altFullUrl))
-        with urllib.request.urlopen(altFullUrl) as response:
-            with open(filePath, 'wb') as outFile:
-                print("Written")
-                shutil.copyfileobj(response, outFile)
+        with os.fdopen(fd, 'wb') as outFile:
+            # confirm url exists
+            try:
+                with urllib.request.urlopen(fullUrl) as response:
+                    shutil.copyfileobj(response, outFile)
+            except urllib.error.HTTPError:
+                print("Downloading from {}".format(altFullUrl))
+                outFile.seek(0)
+                outFile.truncate()
+                with urllib.request.urlopen(altFullUrl) as response:
+                    shutil.copyfileobj(response, outFile)
+        os.replace(tmpPath, filePath)
+        print("Written")
     except urllib.error.URLError:
         print("Invalid URL, couldn't download data")
+        os.remove(tmpPath)
+        raise
+    except BaseException:
+        os.remove(tmpPath)
         raise
 
 
     return filePath
+
+
+if __name__ == '__main__':
+    import sys
+    filePath = sys.argv[1] if len(sys.argv) > 1 else downloadData()
+    full = readData(filePath)
+    print(f"{len(full)} rows")
+    print(f"default:          {getBytesPerRow(full):.1f} bytes per row")
+    print(f"compact:          {getBytesPerRow(readData(filePath, compact=True)):.1f} bytes per row")
+    print(f"compact, float32: {getBytesPerRow(readData(filePath, compact=True, float32=True)):.1f} bytes per row")
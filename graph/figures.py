@@ -0,0 +1,202 @@
+#!/usr/bin/python3
+'''
+Builds the plotly figures GraphView displays.
+
+Nothing here needs Qt, so figures can be built and rendered to HTML without a window,
+e.g. by the benchmarks.
+'''
+import plotly
+import plotly.graph_objs as go
+
+import bots
+from statistics import rollingAnalysis, baselines
+
+# colours and marker heights for each bot shown on the same graph, indexed by botNum - 1
+portfolioColours = ['#aae3c7', '#e377c2', '#bcbd22', '#9467bd', '#ff9896', '#8c564b']
+buyColours = ['#17BECF', 'yellow', '#2ca02c', '#9edae5', '#dbdb8d', '#c5b0d5']
+sellColours = ['#7F7F7F', 'orange', '#d62728', '#c49c94', '#f7b6d2', '#ff7f0e']
+stopColours = ['#ffffff', 'orange', '#d62728', '#c49c94', '#f7b6d2', '#ff7f0e']
+markerHeights = [0.2, 0.8, 0.5, 0.35, 0.65, 0.95]
+# line dash of each baseline, drawn in the colour of the bot's portfolio value
+baselineDashes = {baselines.buyAndHoldName: 'dash', baselines.dollarCostAveragingName: 'dot'}
+
+# the price and portfolio value share the top of the figure when there are rolling panels below them
+mainDomain = [0.45, 1]
+panelGap = 0.025
+
+def _botStyle(styles, botNum):
+    return styles[(botNum - 1) % len(styles)]
+
+
+def makeCandlestickFigure(historicalData, coinName, comparison=False):
+    data = historicalData
+    open_data = data['Open']
+    high_data = data['High']
+    low_data = data['Low']
+    close_data = data['Close']
+    dates = data['Date']
+
+    fig = go.Figure(data=[go.Candlestick(x=dates,
+                           name="Historical Data",
+                           open=open_data, high=high_data,
+                           low=low_data, close=close_data,
+                           increasing_line_color="#EE0000", decreasing_line_color="#00EE00")])
+    fig['layout']['legend'] = dict( orientation = 'h', yanchor='top',xanchor='center',y=1.3,x=0.5)
+    fig['layout']['margin'] = dict( t=40, b=40, r=40, l=40 )
+
+
+    fig.update_xaxes(title_text='Date')
+    fig.update_yaxes(title_text='Price (USD)')
+    fig['layout']['yaxis2'] = dict(title='Portfolio Value (USD)', overlaying='y', side='right')
+    fig['layout']['yaxis']['fixedrange'] = False
+    fig['layout']['yaxis2']['fixedrange'] = False
+    fig['layout']['yaxis2']['rangemode'] = 'tozero'
+    fig.update_layout(
+        title= coinName + ' Market Price History' if comparison == False else '',
+        paper_bgcolor='#19232D',
+        template='plotly_dark',
+    )
+    return fig
+
+def addPortfolioTrace(fig, buySellData, botName=None, botNum=1):
+    xData = buySellData.getDateHistory()
+    yData = buySellData.getPortfolioValueHistory()
+
+    fig.add_trace(
+        go.Scatter(x=xData, y=yData,
+        name= botName+' Portfolio Value (USD)' if botName is not None else 'Portfolio Value (USD)',
+        mode = 'lines',
+        hovertext = 'Portfolio Value (USD)',
+        yaxis='y2',
+        opacity=0.8,
+        line=dict(color=_botStyle(portfolioColours, botNum))
+        )
+    )
+
+def addBaselineTrace(fig, baseline, botName=None, botNum=1):
+    '''
+        adds the portfolio value of a baselines.Baseline, on the same axis as the bot's portfolio value
+    '''
+    name = baseline.getName() + ' (USD)'
+    fig.add_trace(
+        go.Scatter(x=baseline.getDates(), y=baseline.getValues(),
+        name=name if botName is None else botName + ' ' + name,
+        mode='lines',
+        hovertext=name,
+        yaxis='y2',
+        meta='baseline',
+        opacity=0.6,
+        line=dict(color=_botStyle(portfolioColours, botNum), width=1, dash=baselineDashes.get(baseline.getName(), 'dash'))
+        )
+    )
+
+def removeBaselineTraces(fig):
+    fig.data = [trace for trace in fig.data if trace.meta != 'baseline']
+
+def addBuySellTraces(fig, buySellData, botName=None, botNum=1):
+    buyDates = []
+    buyPrices = []
+    sellDates = []
+    sellPrices = []
+    stopDates = []
+    stopPrices = []
+    max = 0
+    scaler = _botStyle(markerHeights, botNum)
+    for t in buySellData:
+        if t.getMarketPrice() > max:
+            max = t.getMarketPrice()
+    for t in buySellData:
+        if t.getAction() is bots.Action.BUY:
+            buyDates.append(t.getDateStamp())
+            buyPrices.append(max*scaler)
+        elif t.getAction() is bots.Action.SELL:
+            sellDates.append(t.getDateStamp())
+            sellPrices.append(max*scaler)
+        elif t.getAction() is bots.Action.EXIT:
+            stopDates.append(t.getDateStamp())
+            stopPrices.append(max*scaler)
+
+
+    fig.add_trace(go.Scatter(x=buyDates,
+        y=buyPrices,
+        name="Buy" if botName is None else botName+" Buy",
+        mode='markers',
+        marker=dict(symbol=6, size=12),
+        marker_color=_botStyle(buyColours, botNum),
+        hovertemplate="Buy on %{x}" ))
+
+    fig.add_trace(go.Scatter(x=sellDates,
+        y=sellPrices,
+        name="Sell" if botName is None else botName+" Sell",
+        mode='markers',
+        marker=dict(symbol=5, size=12),
+        marker_color=_botStyle(sellColours, botNum),
+        hovertemplate="Sell on %{x}"))
+
+    if(len(stopDates) != 0):
+        fig.add_trace(go.Scatter(x=stopDates,
+            y=stopPrices,
+            name="Stop" if botName is None else botName+" Stop",
+            mode='markers',
+            marker=dict(symbol=204, size = 20),
+            marker_color=_botStyle(stopColours, botNum),
+            hovertemplate="Exit at %{x}"))
+
+    fig.update_layout(showlegend=True)
+
+def _panelAxes():
+    # the y axis of each rolling series, from the top panel down
+    return ['yaxis' + str(i) for i in range(3, 3 + len(rollingAnalysis.series))]
+
+def addRollingPanels(fig, rolling, botName=None, botNum=1):
+    '''
+        adds a panel under the portfolio value for each series of a RollingAnalytics,
+        shrinking the price and portfolio value to make room the first time
+    '''
+    axes = _panelAxes()
+    if fig['layout']['yaxis']['domain'] is None:
+        height = (mainDomain[0] - panelGap * len(axes)) / len(axes)
+        top = mainDomain[0] - panelGap
+        for axis, name in zip(axes, rollingAnalysis.series):
+            fig['layout'][axis] = dict(domain=[round(top - height, 4), round(top, 4)], title=dict(text=name, font=dict(size=10)),
+                                       fixedrange=False)
+            top -= height + panelGap
+        fig['layout']['yaxis']['domain'] = mainDomain
+        # the dates go under the bottom panel
+        fig['layout']['xaxis']['anchor'] = axes[-1].replace('axis', '')
+        fig['layout']['xaxis']['rangeslider']['visible'] = False
+
+    for axis, (name, getter) in zip(axes, rollingAnalysis.series.items()):
+        fig.add_trace(
+            go.Scatter(x=rolling.getDates(), y=getattr(rolling, getter)(),
+            name=name if botName is None else botName + ' ' + name,
+            mode='lines',
+            yaxis=axis.replace('axis', ''),
+            showlegend=False,
+            line=dict(color=_botStyle(portfolioColours, botNum), width=1),
+            hovertemplate="%{y:.3f} on %{x}, " + str(rolling.getWindow()) + " state window"
+            )
+        )
+
+def removeRollingPanels(fig):
+    '''
+        removes the rolling panels and their traces, giving the price its full height again
+    '''
+    axes = [axis.replace('axis', '') for axis in _panelAxes()]
+    fig.data = [trace for trace in fig.data if trace.yaxis not in axes]
+    for axis in _panelAxes():
+        fig['layout'][axis] = None
+    fig['layout']['yaxis']['domain'] = None
+    fig['layout']['xaxis']['anchor'] = None
+    fig['layout']['xaxis']['rangeslider']['visible'] = None
+
+def figureHtml(fig, plotlySource):
+    '''
+        returns the page GraphView displays for fig, loading plotly.js from plotlySource
+    '''
+    raw_html = '<html style="background-color: #31363b;"><head><meta charset="utf-8" />'
+    raw_html += '<script src="{}"></script></head>'.format(plotlySource)
+    raw_html += '<body style="margin: 0; padding: 0;">'
+    raw_html += plotly.offline.plot(fig, include_plotlyjs=False, output_type='div')
+    raw_html += '</body></html>'
+    return raw_html
@@ -0,0 +1,285 @@
+#!/usr/bin/python3
+import os, sys, json, time, sqlite3, argparse
+from enum import Enum
+from datetime import datetime
+from multiprocessing import Process
+
+import bots
+import fetchData
+from core import resultCache
+from statistics.algorithmAnalysis import Analyser, jsonSafe
+
+jobDirectory = "jobs"
+defaultQueuePath = os.path.join(jobDirectory, "jobs.db")
+
+
+class JobStatus(Enum):
+    PENDING = 0
+    RUNNING = 1
+    DONE = 2
+    FAILED = 3
+
+
+class JobQueue:
+    '''
+    A queue of backtest jobs, stored in an SQLite database so that it outlives the processes using it.
+
+    Each job holds a bot (as the JSON written by Bot.save), the dataset to run it on and
+    the trading window. Jobs are claimed highest priority first, then oldest first.
+    Any number of processes can share one queue, claiming a job is atomic.
+    '''
+    def __init__(self, path=defaultQueuePath):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self._createTables()
+
+    def _createTables(self):
+        self.connection.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                priority INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL,
+                botJson TEXT NOT NULL,
+                exchange TEXT NOT NULL,
+                resolution TEXT NOT NULL,
+                coin TEXT NOT NULL,
+                startDate TEXT NOT NULL,
+                endDate TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                worker TEXT,
+                createdAt REAL NOT NULL,
+                startedAt REAL,
+                finishedAt REAL
+            )''')
+        self.connection.execute('''
+            CREATE INDEX IF NOT EXISTS jobsByStatus ON jobs (status, priority DESC, id)''')
+
+    def close(self):
+        self.connection.close()
+
+    def addJob(self, botData, coin, startDate, endDate, exchange="Gemini", resolution="day", priority=0):
+        '''
+            botData: dict of parameters, as returned by Bot.getSaveData() or read from a saved bot file
+            startDate, endDate: datetime or 'YYYY-MM-DD' string
+            returns the id of the new job
+        '''
+        if isinstance(startDate, datetime):
+            startDate = startDate.strftime('%Y-%m-%d')
+        if isinstance(endDate, datetime):
+            endDate = endDate.strftime('%Y-%m-%d')
+        cursor = self.connection.execute('''
+            INSERT INTO jobs (priority, status, botJson, exchange, resolution, coin, startDate, endDate, createdAt)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+            (priority, JobStatus.PENDING.name, json.dumps(botData), exchange, resolution, coin,
+             startDate, endDate, time.time()))
+        return cursor.lastrowid
+
+    def addSavedBots(self, coins, windows, savedBotsPath='savedBots/', exchange="Gemini", resolution="day", priority=0):
+        '''
+            adds a job for every saved bot, on every coin, for every (startDate, endDate) window
+            returns the number of jobs added
+        '''
+        count = 0
+        for fileName in sorted(os.listdir(savedBotsPath)):
+            if not fileName.endswith('.json'):
+                continue
+            with open(os.path.join(savedBotsPath, fileName), 'r') as f:
+                botData = json.load(f)
+            for coin in coins:
+                for startDate, endDate in windows:
+                    self.addJob(botData, coin, startDate, endDate, exchange, resolution, priority)
+                    count += 1
+        return count
+
+    def claimJob(self, worker):
+        '''
+            marks the next pending job as running by this worker
+            returns the job as a dict, or None if there are no pending jobs
+        '''
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = self.connection.execute('''
+                SELECT * FROM jobs WHERE status = ? ORDER BY priority DESC, id LIMIT 1''',
+                (JobStatus.PENDING.name,)).fetchone()
+            if row is not None:
+                self.connection.execute('''
+                    UPDATE jobs SET status = ?, worker = ?, startedAt = ? WHERE id = ?''',
+                    (JobStatus.RUNNING.name, worker, time.time(), row['id']))
+            self.connection.execute('COMMIT')
+        except Exception:
+            self.connection.execute('ROLLBACK')
+            raise
+        return dict(row) if row is not None else None
+
+    def completeJob(self, jobId, result):
+        self.connection.execute('''
+            UPDATE jobs SET status = ?, result = ?, finishedAt = ? WHERE id = ?''',
+            (JobStatus.DONE.name, json.dumps(jsonSafe(result), allow_nan=False), time.time(), jobId))
+
+    def failJob(self, jobId, error):
+        self.connection.execute('''
+            UPDATE jobs SET status = ?, error = ?, finishedAt = ? WHERE id = ?''',
+            (JobStatus.FAILED.name, error, time.time(), jobId))
+
+    def requeueUnfinished(self):
+        '''
+            puts jobs left running by workers which were stopped back in the queue
+            only call this when no workers are using the queue
+            returns the number of jobs requeued
+        '''
+        cursor = self.connection.execute('''
+            UPDATE jobs SET status = ?, worker = NULL, startedAt = NULL WHERE status = ?''',
+            (JobStatus.PENDING.name, JobStatus.RUNNING.name))
+        return cursor.rowcount
+
+    def retryFailed(self):
+        cursor = self.connection.execute('''
+            UPDATE jobs SET status = ?, error = NULL, worker = NULL, startedAt = NULL, finishedAt = NULL
+            WHERE status = ?''', (JobStatus.PENDING.name, JobStatus.FAILED.name))
+        return cursor.rowcount
+
+    def getJob(self, jobId):
+        row = self.connection.execute('SELECT * FROM jobs WHERE id = ?', (jobId,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def getResult(self, jobId):
+        job = self.getJob(jobId)
+        if job is None or job['result'] is None:
+            return None
+        return json.loads(job['result'])
+
+    def getStatusCounts(self):
+        '''
+            returns a dict of JobStatus : number of jobs
+        '''
+        counts = {s: 0 for s in JobStatus}
+        for row in self.connection.execute('SELECT status, COUNT(*) AS n FROM jobs GROUP BY status'):
+            counts[JobStatus[row['status']]] = row['n']
+        return counts
+
+    def getThroughput(self, since=0):
+        '''
+            returns finished jobs per second, measured from the first job started
+            to the last job finished after the time since
+        '''
+        row = self.connection.execute('''
+            SELECT COUNT(*) AS n, MIN(startedAt) AS first, MAX(finishedAt) AS last
+            FROM jobs WHERE status IN (?, ?) AND finishedAt >= ?''',
+            (JobStatus.DONE.name, JobStatus.FAILED.name, since)).fetchone()
+        if row['n'] == 0 or row['last'] <= row['first']:
+            return 0
+        return row['n'] / (row['last'] - row['first'])
+
+
+def runJob(job):
+    '''
+        runs one job from the queue
+        returns a dict of the overall statistics from the Analyser
+    '''
+    botData = json.loads(job['botJson'])
+    bot = bots.createBot(botData['Bot Type'])
+    bot.setSaveData(botData)
+    bot.changeParam('Start Trading Date', datetime.strptime(job['startDate'], '%Y-%m-%d'))
+    bot.changeParam('End Trading Date', datetime.strptime(job['endDate'], '%Y-%m-%d'))
+    bot.checkParameters()
+
+    data = fetchData.getData(job['exchange'], job['resolution'], job['coin'])
+    buySellData = resultCache.runCached(bot, data)
+    return Analyser(buySellData).getSummary()
+
+
+def workerLoop(queuePath, worker):
+    # runs in a worker process until the queue has no pending jobs
+    queue = JobQueue(queuePath)
+    while True:
+        job = queue.claimJob(worker)
+        if job is None:
+            break
+        try:
+            result = runJob(job)
+        except Exception as e:
+            queue.failJob(job['id'], type(e).__name__ + ': ' + str(e))
+        else:
+            queue.completeJob(job['id'], result)
+    queue.close()
+
+
+class WorkerPool:
+    '''
+    A pool of worker processes which work through a JobQueue until it is empty.
+    Jobs left running when a previous pool was stopped are put back in the queue first.
+    '''
+    def __init__(self, queuePath=defaultQueuePath, numWorkers=None):
+        self.queuePath = queuePath
+        self.numWorkers = numWorkers or os.cpu_count() or 1
+
+    def run(self):
+        '''
+            returns a dict with the number of jobs finished, the time taken and the jobs per second
+        '''
+        queue = JobQueue(self.queuePath)
+        queue.requeueUnfinished()
+        before = queue.getStatusCounts()
+
+        startTime = time.time()
+        workers = [Process(target=workerLoop, args=(self.queuePath, f"worker-{os.getpid()}-{i}"))
+                   for i in range(self.numWorkers)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        elapsed = time.time() - startTime
+
+        after = queue.getStatusCounts()
+        queue.close()
+        finished = (after[JobStatus.DONE] + after[JobStatus.FAILED]) - (before[JobStatus.DONE] + before[JobStatus.FAILED])
+        return {
+            'jobs': finished,
+            'failed': after[JobStatus.FAILED] - before[JobStatus.FAILED],
+            'seconds': elapsed,
+            'jobsPerSecond': finished / elapsed if elapsed > 0 else 0,
+        }
+
+
+def _parseWindow(window):
+    startDate, endDate = window.split(':')
+    return (startDate, endDate)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Queue and run backtests of saved bots without the GUI')
+    parser.add_argument('--queue', default=defaultQueuePath, help='path of the job database')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    add = commands.add_parser('add', help='add a job for every saved bot, coin and window')
+    add.add_argument('--coins', nargs='+', default=["BTC", "ETH", "LTC", "ZEC"])
+    add.add_argument('--windows', nargs='+', type=_parseWindow, default=[('2017-01-01', '2018-01-01')],
+                     help='trading windows as START:END, e.g. 2017-01-01:2018-01-01')
+    add.add_argument('--priority', type=int, default=0)
+    add.add_argument('--saved-bots', default='savedBots/')
+
+    run = commands.add_parser('run', help='run all pending jobs')
+    run.add_argument('--workers', type=int, default=None)
+
+    commands.add_parser('status', help='show the number of jobs in each state')
+    commands.add_parser('retry', help='put failed jobs back in the queue')
+
+    args = parser.parse_args()
+    if args.command == 'add':
+        queue = JobQueue(args.queue)
+        print(queue.addSavedBots(args.coins, args.windows, args.saved_bots, priority=args.priority), "jobs added")
+    elif args.command == 'run':
+        stats = WorkerPool(args.queue, args.workers).run()
+        print(f"{stats['jobs']} jobs ({stats['failed']} failed) in {stats['seconds']:.2f}s, "
+              f"{stats['jobsPerSecond']:.2f} jobs/s")
+    elif args.command == 'status':
+        for status, count in JobQueue(args.queue).getStatusCounts().items():
+            print(status.name, count)
+        print(resultCache.formatStats(resultCache.getDefaultCache().getStats()))
+    elif args.command == 'retry':
+        print(JobQueue(args.queue).retryFailed(), "jobs requeued")
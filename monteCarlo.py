@@ -0,0 +1,193 @@
+#!/usr/bin/python3
+import os, math
+from enum import Enum
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+import bots
+from statistics.algorithmAnalysis import Analyser, Period
+
+
+class PathMethod(Enum):
+    BOOTSTRAP = 0
+    GBM = 1
+
+
+class MonteCarloResult:
+    '''
+    Holds the outcome of every simulated path, one entry per path
+    '''
+    def __init__(self):
+        self.finalValues = []
+        self.maxDrawdowns = []
+        self.numTrades = []
+
+    def addRun(self, finalValue, maxDrawdown, numTrades):
+        self.finalValues.append(finalValue)
+        self.maxDrawdowns.append(maxDrawdown)
+        self.numTrades.append(numTrades)
+
+    def getNumPaths(self):
+        return len(self.finalValues)
+    def getFinalValues(self):
+        return self.finalValues
+    def getMaxDrawdowns(self):
+        return self.maxDrawdowns
+    def getNumTrades(self):
+        return self.numTrades
+
+    def getPercentiles(self, values, percentiles=(5, 25, 50, 75, 95)):
+        '''
+            returns a dict of percentile:value for a list of results
+        '''
+        if len(values) == 0:
+            return {}
+        return dict(zip(percentiles, np.percentile(values, percentiles)))
+
+    def getSummary(self):
+        '''
+            returns a dict of metric name : dict of distribution statistics
+        '''
+        summary = {}
+        for name, values in (('Final Value', self.finalValues),
+                             ('Max Drawdown (%)', self.maxDrawdowns),
+                             ('Number of Trades', self.numTrades)):
+            if len(values) == 0:
+                continue
+            arr = np.asarray(values, dtype=float)
+            summary[name] = {
+                'mean': float(arr.mean()),
+                'std': float(arr.std()),
+                'min': float(arr.min()),
+                'max': float(arr.max()),
+                'percentiles': {p: float(v) for p, v in self.getPercentiles(arr).items()},
+            }
+        return summary
+
+
+class MonteCarloSimulation:
+    '''
+    Runs a bot over many synthetic price paths resampled from one historical dataset.
+
+    Paths are made either by a block bootstrap of the daily returns (which keeps short term
+    autocorrelation), or by a geometric brownian motion fitted to those returns.
+    Each path keeps the layout of the original data (same dates, same row order), so every bot
+    can process it without changes. Paths are generated one batch at a time, so memory use
+    depends on the batch size rather than on the number of paths.
+    '''
+    def __init__(self, bot, historicalData, method=PathMethod.BOOTSTRAP, blockSize=20, seed=None):
+        self.botType = bot.getName()
+        self.parameters = dict(bot.getParameters())
+        self.method = method
+        self.blockSize = blockSize
+        self.rng = np.random.default_rng(seed)
+        self._prepare(historicalData)
+
+    def _prepare(self, data):
+        # work in chronological order, but remember how to write paths back in the original order
+        self.template = data.reset_index(drop=True)
+        order = np.argsort(pd.to_datetime(self.template.Date).values, kind='stable')
+        self.order = order
+
+        close = self.template.Close.values[order].astype(float)
+        if len(close) < 2:
+            raise ValueError('Need at least two data points to generate price paths')
+        self.startClose = close[0]
+        self.logReturns = np.diff(np.log(close))
+        # shape of each candle relative to its close price
+        self.openRatio = self.template.Open.values[order] / close
+        self.highRatio = self.template.High.values[order] / close
+        self.lowRatio = self.template.Low.values[order] / close
+
+    def _bootstrapIndices(self, batchSize):
+        # returns (batchSize, numReturns) indices into the return series, made of whole blocks
+        numReturns = len(self.logReturns)
+        blockSize = max(1, min(self.blockSize, numReturns))
+        numBlocks = math.ceil(numReturns / blockSize)
+        starts = self.rng.integers(0, numReturns - blockSize + 1, size=(batchSize, numBlocks))
+        idx = (starts[:, :, None] + np.arange(blockSize)).reshape(batchSize, -1)
+        return idx[:, :numReturns]
+
+    def _makeBatch(self, batchSize):
+        numReturns = len(self.logReturns)
+        if self.method == PathMethod.BOOTSTRAP:
+            idx = self._bootstrapIndices(batchSize)
+            returns = self.logReturns[idx]
+            shapeIdx = idx + 1
+        else:
+            mu = self.logReturns.mean()
+            sigma = self.logReturns.std()
+            returns = self.rng.normal(mu, sigma, size=(batchSize, numReturns))
+            shapeIdx = self.rng.integers(1, numReturns + 1, size=(batchSize, numReturns))
+
+        close = np.empty((batchSize, numReturns + 1))
+        close[:, 0] = self.startClose
+        close[:, 1:] = self.startClose * np.exp(np.cumsum(returns, axis=1))
+        shapeIdx = np.concatenate([np.zeros((batchSize, 1), dtype=int), shapeIdx], axis=1)
+
+        paths = []
+        for i in range(batchSize):
+            path = self.template.copy()
+            for column, ratio in (('Open', self.openRatio), ('High', self.highRatio), ('Low', self.lowRatio)):
+                values = np.empty(len(path))
+                values[self.order] = close[i] * ratio[shapeIdx[i]]
+                path[column] = values
+            values = np.empty(len(path))
+            values[self.order] = close[i]
+            path['Close'] = values
+            paths.append(path)
+        return paths
+
+    def generatePaths(self, numPaths, batchSize=100):
+        '''
+            generator which yields lists of at most batchSize price paths until numPaths have been made
+        '''
+        remaining = numPaths
+        while remaining > 0:
+            size = min(batchSize, remaining)
+            yield self._makeBatch(size)
+            remaining -= size
+
+    def run(self, numPaths, batchSize=100, workers=None, progressCallback=None):
+        '''
+            runs the bot over numPaths generated paths using a pool of worker processes
+            progressCallback(pathsDone, numPaths) is called after each batch
+            returns a MonteCarloResult
+        '''
+        workers = workers or os.cpu_count() or 1
+        result = MonteCarloResult()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for batch in self.generatePaths(numPaths, batchSize):
+                chunkSize = math.ceil(len(batch) / workers)
+                chunks = [batch[i:i+chunkSize] for i in range(0, len(batch), chunkSize)]
+                for runs in executor.map(_runPaths, repeat(self.botType), repeat(self.parameters), chunks):
+                    for r in runs:
+                        result.addRun(*r)
+                if progressCallback is not None:
+                    progressCallback(result.getNumPaths(), numPaths)
+        return result
+
+
+def _runPaths(botType, parameters, paths):
+    # runs in a worker process, so only plain data is passed in and out
+    runs = []
+    for path in paths:
+        bot = bots.createBot(botType, parameters)
+        buySellData = bot.processHistoricalData(path)
+        analyser = Analyser(buySellData)
+        runs.append((analyser.getFinalValue(),
+                     analyser.getMaxDrawdown(),
+                     analyser.getSumTrades(Period.TOTAL)))
+    return runs
+
+
+if __name__ == '__main__':
+    import fetchData
+
+    data = fetchData.getData("Gemini", "day", "ETH")
+    sim = MonteCarloSimulation(bots.ROC(), data, PathMethod.BOOTSTRAP, seed=0)
+    result = sim.run(1000, progressCallback=lambda done, total: print(f"{done}/{total} paths"))
+    for metric, stats in result.getSummary().items():
+        print(metric, stats)
@@ -4,16 +4,7 @@ from PyQt5.QtWidgets import QGridLayout, QGroupBox, QPushButton, QDoubleSpinBox
 from PyQt5.QtGui import QIcon
 from PyQt5.QtCore import pyqtSlot, QDate
 from datetime import date, datetime
-from enum import Enum
-
-class InputType(Enum):
-    default = 0
-    date = 1
-    float = 2
-    int = 3
-    string = 4
-    currency = 5
-    percentage = 6
+from core.inputType import InputType
 
 
 class FormView(QWidget):
@@ -0,0 +1,236 @@
+#!/usr/bin/python3
+import os
+from enum import Enum
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+import bots
+from bots import Action, BacktestHistory
+
+
+class CashAllocation(Enum):
+    SPLIT = 0   # starting cash is divided between the coins, each coin trades its own share
+    POOL = 1    # every coin trades out of one cash balance, a buy can't spend cash another coin has spent
+
+
+class PortfolioHistory(BacktestHistory):
+    '''
+    Combined result of running one bot over several coins.
+
+    Each row holds the total cash of the portfolio, and the USD value of all coins held
+    as the coin amount (with a market price of 1), so getPortfolioValue() and the Analyser
+    work as they do for a single coin. The per-coin results are kept as well.
+    '''
+    def __init__(self, coinHistories, startingCash):
+        super().__init__()
+        self.coinHistories = coinHistories  # dict of coin name : BacktestHistory
+        self.startingCash = startingCash    # dict of coin name : cash that coin started with
+
+    def getCoins(self):
+        return list(self.coinHistories.keys())
+    # not getCoinHistory, which is the coin amount of every state, as for any BacktestHistory
+    def getHistoryOfCoin(self, coin):
+        return self.coinHistories[coin]
+    def getCoinHistories(self):
+        return self.coinHistories
+    def getStartingCash(self, coin):
+        return self.startingCash[coin]
+
+    def getNumTrades(self, coin=None):
+        '''
+            returns the number of buy, sell and exit actions, for one coin or for all of them
+        '''
+        coins = [coin] if coin is not None else self.getCoins()
+        count = 0
+        for c in coins:
+            for state in self.coinHistories[c]:
+                if state.getAction() is not Action.NOACTION:
+                    count += 1
+        return count
+
+
+def alignData(dataByCoin):
+    '''
+        returns a dict of coin : data, where every frame only keeps the dates all coins have in common
+    '''
+    commonDates = None
+    for coin in dataByCoin:
+        dates = set(pd.to_datetime(dataByCoin[coin].Date))
+        commonDates = dates if commonDates is None else commonDates & dates
+
+    aligned = {}
+    for coin in dataByCoin:
+        data = dataByCoin[coin]
+        keep = pd.to_datetime(data.Date).isin(commonDates).values
+        aligned[coin] = data[keep].reset_index(drop=True)
+    return aligned
+
+
+class PortfolioBacktest:
+    '''
+    Runs one bot over several coins on a shared, aligned date index.
+
+    Every coin is backtested in its own worker process, with the bot's Cash Amount
+    either split between the coins (by weight, equal by default) or pooled.
+    Pooled coins share one cash balance, so only their signals are worked out in the workers,
+    and their ledgers are then stepped together in date order, each trade seeing the cash
+    the trades before it left. Coins acting on the same date trade in the order they were given.
+    The results are combined into a PortfolioHistory which keeps the per-coin breakdown.
+    '''
+    def __init__(self, bot, dataByCoin, allocation=CashAllocation.SPLIT, weights=None):
+        self.botType = bot.getName()
+        self.parameters = dict(bot.getParameters())
+        self.dataByCoin = alignData(dataByCoin)
+        self.allocation = allocation
+
+        coins = list(self.dataByCoin.keys())
+        if weights is None:
+            weights = {c: 1 for c in coins}
+        total = sum(weights[c] for c in coins)
+        self.weights = {c: weights[c] / total for c in coins}
+
+    def getStartingCash(self):
+        cash = self.parameters['Cash Amount']
+        if self.allocation == CashAllocation.POOL:
+            return {c: cash for c in self.dataByCoin}
+        return {c: cash * self.weights[c] for c in self.dataByCoin}
+
+    def run(self, workers=None):
+        '''
+            backtests every coin in parallel
+            returns a PortfolioHistory
+        '''
+        startingCash = self.getStartingCash()
+        coins = list(self.dataByCoin.keys())
+        workers = min(workers or os.cpu_count() or 1, len(coins))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            for coin in coins:
+                parameters = dict(self.parameters)
+                parameters['Cash Amount'] = startingCash[coin]
+                if self.allocation == CashAllocation.POOL:
+                    # the signals don't depend on the cash, so they can still be worked out in parallel
+                    futures[coin] = executor.submit(_computeSignals, self.botType, parameters, self.dataByCoin[coin])
+                else:
+                    futures[coin] = executor.submit(_runCoin, self.botType, parameters, self.dataByCoin[coin])
+            results = {coin: futures[coin].result() for coin in coins}
+
+        if self.allocation == CashAllocation.POOL:
+            coinHistories, poolCash = self._runPooled(results)
+            return self._combine(coinHistories, startingCash, poolCash)
+        return self._combine(results, startingCash)
+
+    def _runPooled(self, signalsByCoin):
+        '''
+            trades every coin's SignalStream in date order out of one cash balance
+            returns (dict of coin : BacktestHistory, list of (date, pool cash of each state) in date order)
+            As in a single coin's history, a fee taken after a trade is recorded shows from the next state
+        '''
+        coins = list(signalsByCoin.keys())
+        botsByCoin = {coin: bots.createBot(self.botType, self.parameters) for coin in coins}
+        ledgers = {coin: botsByCoin[coin].startLedger() for coin in coins}
+
+        # every signal of every coin, by date and then by the order of the coins
+        dates = np.concatenate([pd.to_datetime([s[0] for s in signalsByCoin[coin]]).values for coin in coins])
+        owners = np.concatenate([np.full(len(signalsByCoin[coin]), i) for i, coin in enumerate(coins)])
+        positions = np.concatenate([np.arange(len(signalsByCoin[coin])) for coin in coins])
+        order = np.lexsort((owners, dates))
+
+        cash = self.parameters['Cash Amount']
+        poolCash = []
+        for i in order:
+            coin = coins[owners[i]]
+            bot, ledger = botsByCoin[coin], ledgers[coin]
+            if ledger['stopped']:
+                continue
+            history = ledger['history']
+            numStates = len(history)
+            bot.setLedgerCash(ledger, cash)
+            if not bot.stepLedger(ledger, *signalsByCoin[coin][positions[i]]):
+                ledger['stopped'] = True
+            cash = bot.getLedgerCash(ledger)
+            if len(history) > numStates:
+                poolCash.append((dates[i], history[-1].getCashBalance()))
+
+        for coin in coins:
+            bot, ledger = botsByCoin[coin], ledgers[coin]
+            finalSignal = signalsByCoin[coin].getFinalSignal()
+            if not ledger['stopped'] and finalSignal is not None:
+                numStates = len(ledger['history'])
+                bot.setLedgerCash(ledger, cash)
+                bot.finishLedger(ledger, *finalSignal)
+                cash = bot.getLedgerCash(ledger)
+                if len(ledger['history']) > numStates:
+                    poolCash.append((pd.Timestamp(finalSignal[0]).to_datetime64(), ledger['history'][-1].getCashBalance()))
+        poolCash.sort(key=lambda state: state[0])
+        return {coin: ledgers[coin]['history'] for coin in coins}, poolCash
+
+    def _combine(self, coinHistories, startingCash, poolCash=None):
+        result = PortfolioHistory(coinHistories, startingCash)
+
+        # every date on which any coin has a row, in order
+        dateLookup = {}
+        for h in coinHistories.values():
+            for d in h.getDateHistory():
+                dateLookup.setdefault(pd.Timestamp(d), d)
+        allDates = sorted(dateLookup.keys())
+        timeline = pd.DatetimeIndex(allDates).values
+
+        totalCash = np.zeros(len(allDates))
+        totalCoinValue = np.zeros(len(allDates))
+        actions = [Action.NOACTION] * len(allDates)
+        for coin, h in coinHistories.items():
+            dates = pd.to_datetime(h.getDateHistory()).values
+            cash = np.array(h.getCashBalanceHistory(), dtype=float)
+            coinValue = np.array(h.getCoinHistory(), dtype=float) * np.array(h.getMarketPriceHistory(), dtype=float)
+
+            # each coin keeps its last known state until its next row
+            idx = np.searchsorted(dates, timeline, side='right') - 1
+            started = idx >= 0
+            idx = np.maximum(idx, 0)
+            totalCash += np.where(started, cash[idx], startingCash[coin])
+            totalCoinValue += np.where(started, coinValue[idx], 0)
+
+            rowOfDate = np.searchsorted(timeline, dates)
+            for row, action in zip(rowOfDate, h.getActionHistory()):
+                actions[row] = _combineActions(actions[row], action)
+
+        if poolCash is not None:
+            # each coin's cash is the shared pool, so the total is the pool after the last trade up to each date
+            poolDates = np.array([d for d, c in poolCash], dtype='datetime64[ns]')
+            poolValues = np.array([c for d, c in poolCash], dtype=float)
+            idx = np.searchsorted(poolDates, timeline, side='right') - 1
+            totalCash = np.where(idx >= 0, poolValues[np.maximum(idx, 0)], self.parameters['Cash Amount'])
+
+        for i, d in enumerate(allDates):
+            result.insertBotState(dateLookup[d], totalCash[i], totalCoinValue[i], 1, actions[i])
+        return result
+
+
+def _combineActions(current, new):
+    # when several coins act on the same day, show the most significant action
+    priority = [Action.NOACTION, Action.BUY, Action.SELL, Action.EXIT]
+    return new if priority.index(new) > priority.index(current) else current
+
+
+def _computeSignals(botType, parameters, data):
+    # runs in a worker process
+    return bots.createBot(botType, parameters).getSignals(data)
+
+
+def _runCoin(botType, parameters, data):
+    # runs in a worker process
+    bot = bots.createBot(botType, parameters)
+    return bot.processHistoricalData(data)
+
+
+if __name__ == '__main__':
+    import fetchData
+
+    coinList = ["BTC", "ETH", "LTC", "ZEC"]
+    dataByCoin = {coin: fetchData.getData("Gemini", "day", coin) for coin in coinList}
+    result = PortfolioBacktest(bots.RSI(), dataByCoin).run()
+    print("Final Value:", result.getLatestDataPoint().getPortfolioValue())
+    for coin in result.getCoins():
+        print(coin, result.getHistoryOfCoin(coin).getLatestDataPoint().getPortfolioValue())
@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal, pyqtSlot
+
+import exceptions
+from core import resultCache, timing, profiling
+from statistics.algorithmAnalysis import getStatistics
+
+
+class WorkerSignals(QObject):
+    '''
+    Signals emitted by a SimulationWorker. They are queued to the thread
+    the receiving widgets live in, so slots can safely update the GUI.
+    '''
+    progress = pyqtSignal(int)          # percent of the data processed
+    finished = pyqtSignal(object)       # BacktestHistory
+    error = pyqtSignal(object)          # exception raised by the bot
+    cancelled = pyqtSignal()
+    profiled = pyqtSignal(object)       # ProfileReport of a profiled run, before finished
+
+
+class SimulationWorker(QRunnable):
+    '''
+    Runs bot.processHistoricalData on a QThreadPool thread, then calculates the statistics
+    of the results so the views only have to show them.
+    Call cancel() from the GUI thread to stop the run early.
+    Results are looked up in, and saved to, the result cache unless useCache is False
+    If profile is True the run is profiled with cProfile, and never taken from the cache
+    '''
+    def __init__(self, bot, data, useCache=True, profile=False):
+        super().__init__()
+        self.bot = bot
+        self.data = data
+        self.useCache = useCache and not profile
+        self.profile = profile
+        self.signals = WorkerSignals()
+        # here rather than in run, so a cancel before the pool starts the worker isn't lost
+        self.bot.resetCancel()
+
+    def cancel(self):
+        self.bot.cancel()
+
+    @pyqtSlot()
+    def run(self):
+        self.bot.setProgressCallback(self.signals.progress.emit)
+        try:
+            with timing.span('simulation.bot', bot=self.bot.getName(), bars=len(self.data), profiled=self.profile):
+                if self.profile:
+                    buySellData = self._runProfiled()
+                elif self.useCache:
+                    buySellData = resultCache.runCached(self.bot, self.data)
+                else:
+                    buySellData = self.bot.processHistoricalData(self.data)
+            with timing.span('simulation.analyser', bot=self.bot.getName(), states=len(buySellData)):
+                getStatistics(buySellData)
+        except exceptions.SimulationCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.error.emit(e)
+        else:
+            self.signals.finished.emit(buySellData)
+        finally:
+            self.bot.setProgressCallback(None)
+
+    def _runProfiled(self):
+        # processHistoricalData without the signal cache, so the profile covers working out the signals,
+        # as it skips the result cache, and the signals cached for other runs are kept
+        buySellData, report = profiling.profileCall(
+            lambda: self.bot.runLedger(self.bot.computeSignals(self.data)), self.bot.getName())
+        self.signals.profiled.emit(report)
+        return buySellData
@@ -1,8 +1,10 @@
 from enum import Enum
 from datetime import datetime, date, timedelta
 from dateutil.relativedelta import relativedelta
-import math
+import math, bisect
+import numpy as np
 from bots import Action
+from statistics import tradeAnalysis, baselines
 
 class Period(Enum):
     DAILY = 2
@@ -12,7 +14,91 @@ class Period(Enum):
     TOTAL = 6
 
 
+# changed whenever the Analyser's results change, so statistics kept on an older history are recalculated
+statisticsVersion = 4
+
+
+class Statistics:
+    '''
+    Every statistic the views show for a BacktestHistory, from Analyser.getStatistics.
+    The monthly lists have one entry per one-month period, starting from the first state of each period, in order
+    '''
+    def __init__(self):
+        self.version = statisticsVersion
+        self.monthlyDates = []
+        self.monthlyGain = []
+        self.monthlyGainPct = []
+        self.monthlyValue = []
+        self.monthlyBuys = []
+        self.monthlySells = []
+        self.finalValue = 0
+        self.finalCash = 0
+        self.finalCoins = 0
+        self.finalPrice = 0
+        self.gain = 0
+        self.gainPct = 0
+        self.payback = -1
+        self.numTrades = 0
+        self.maxDrawdown = 0
+        self.riskMetrics = {}   # name : value of each metric in core.riskMetrics.objectives
+        self.tradeIndex = tradeAnalysis.TradeIndex()
+        self.tradeSummary = {}  # name : value of each statistic in tradeAnalysis.directions
+        self.baselines = {}     # name : baselines.Baseline of the same coin and dates
+        self.baselineSummary = {}   # baseline name : dict of name : value of each of baselines.comparisons
+
+    def getSummary(self):
+        """
+            returns a dict of the overall statistics of the backtest, keyed by a readable name
+            the values are plain numbers, so the dict can be written out as JSON
+        """
+        return {
+            'Final Value': self.finalValue,
+            'Final Cash Amount': self.finalCash,
+            'Final Coin Amount': self.finalCoins,
+            'Number of Trades': self.numTrades,
+            'Gain ($)': self.gain,
+            'Gain (%)': self.gainPct,
+            'Payback Period (days)': self.payback,
+            'Max Drawdown (%)': self.maxDrawdown,
+            **self.riskMetrics,
+            **self.tradeSummary,
+            **{name + ' vs ' + baseline: value for baseline, summary in self.baselineSummary.items()
+               for name, value in summary.items()},
+        }
+
+
+def getStatistics(bth):
+    '''
+        returns the Statistics of a BacktestHistory, calculated the first time and then kept on the history
+        Worker threads and processes can call this before handing the history to the views,
+        so the views only read the results
+    '''
+    statistics = getattr(bth, 'statistics', None)
+    if statistics is None or statistics.version != statisticsVersion:
+        statistics = Analyser(bth).getStatistics()
+        bth.statistics = statistics
+    return statistics
+
+
+def jsonSafe(row):
+    '''
+        returns a copy of a dict of statistics, such as Analyser.getSummary, with the numbers JSON
+        can't hold as None, such as the infinite profit factor when no sale lost money
+    '''
+    return {key: None if isinstance(value, float) and not math.isfinite(value) else value
+            for key, value in row.items()}
+
+
 class Analyser():
+    '''
+    Statistics of a BacktestHistory.
+
+    The dates, portfolio values and actions of the history are read once, into lists and arrays.
+    A period starts at a data point and ends a day, a week, a month or a year after its date,
+    and the next period starts at the first data point after that, so finding where each
+    period starts is one binary search of the dates. The per period statistics then only
+    look at the first data point of each period, or at running counts of the actions.
+    '''
     def __init__(self, bth):
         self.dailyDict = {}
         self.monthlyDict = {}
@@ -21,6 +107,12 @@ class Analyser():
         self.initialCapital = self.datalist.getEarliestDataPoint().getPortfolioValue()
         self.setupDict()
 
+        self.dates = bth.getDateHistory()
+        self.values = bth.getPortfolioValueHistory()
+        self.actions = bth.getActionHistory()
+        self.periods = {}
+        self.actionCounts = {}
+
 
     def setupDict(self):
         #dailyDict returns how many days in a PERIOD that is smaller than a month
@@ -30,13 +122,41 @@ class Analyser():
         self.dailyDict[Period.YEARLY] = 0
         self.dailyDict[Period.TOTAL] = 0
 
-        #monthly returns how many months in a PERIOD that is smaller than a year
+        #monthly returns how many months in a PERIOD
         self.monthlyDict[Period.DAILY] = 0
-        self.dailyDict[Period.WEEKLY] = 0
+        self.monthlyDict[Period.WEEKLY] = 0
         self.monthlyDict[Period.MONTHLY] = 1
-        self.monthlyDict[Period.YEARLY] = 0
+        self.monthlyDict[Period.YEARLY] = 12
         self.monthlyDict[Period.TOTAL] = 0
 
+    def getPeriods(self, period):
+        """
+            returns (starts, ends), where starts is the index of the first data point of each period,
+            and ends is the date each period but the last ends on
+            The dates must be in order, as the bots record them
+        """
+        if period not in self.periods:
+            delta = relativedelta(months = self.monthlyDict[period], days=self.dailyDict[period])
+            starts = [0]
+            ends = []
+            while True:
+                end = self.dates[starts[-1]] + delta
+                # the first data point after the end of the period starts the next one
+                nextStart = bisect.bisect_right(self.dates, end, starts[-1])
+                if nextStart >= len(self.dates):
+                    break
+                starts.append(nextStart)
+                ends.append(end)
+            self.periods[period] = (starts, ends)
+        return self.periods[period]
+
+    def _countActions(self, action):
+        # returns counts, where counts[i] is the number of data points before i with the action
+        if action not in self.actionCounts:
+            isAction = np.fromiter((a == action for a in self.actions), dtype=np.int64, count=len(self.actions))
+            self.actionCounts[action] = np.concatenate(([0], np.cumsum(isAction))).tolist()
+        return self.actionCounts[action]
+
     def extractData(self):
         datalist = []
 
@@ -69,28 +189,20 @@ class Analyser():
             return self.getROI(isPercentage)
         retval = []
 
-
-        initialDataPoint = self.datalist.getEarliestDataPoint()
-        initialDate = initialDataPoint.getDateStamp()
-        initialValue = initialDataPoint.getPortfolioValue()
-
-        currentGain = 0
-        for d in self.datalist:
-            finalValue = d.getPortfolioValue()
-            if d.getDateStamp() > (initialDate+relativedelta(months = self.monthlyDict[period], days=self.dailyDict[period])):
-                currentGain = finalValue - initialValue
-                if (isPercentage):
-                    currentGain = currentGain / initialValue * 100
-                value = [(initialDate+relativedelta(months = self.monthlyDict[period], days=self.dailyDict[period])), currentGain,3]
-                retval.append(value)
-                currentGain = 0
-                initialDate = d.getDateStamp()
-                initialValue = d.getPortfolioValue()
-
-        currentGain = finalValue - initialValue
+        # each period's gain runs from its first data point to the first data point of the next period
+        starts, ends = self.getPeriods(period)
+        for i, end in enumerate(ends):
+            initialValue = self.values[starts[i]]
+            currentGain = self.values[starts[i+1]] - initialValue
+            if (isPercentage):
+                currentGain = currentGain / initialValue * 100
+            retval.append([end, currentGain,3])
+
+        initialValue = self.values[starts[-1]]
+        currentGain = self.values[-1] - initialValue
         if (isPercentage):
             currentGain = currentGain / initialValue * 100
-        value = [self.datalist[-1].getDateStamp(), currentGain,3]
+        value = [self.dates[-1], currentGain,3]
         retval.append(value)
         return retval
 
@@ -118,17 +230,29 @@ class Analyser():
             returns number of days it took to earn back the initialCapital
             returns payback period in days. If no payback, return -1
         """
-        initialDataPoint = self.datalist.getEarliestDataPoint()
-
         paidBack = self.initialCapital*2
-        gain = 0
-        for d in self.datalist:
-            value = d.getPortfolioValue()
-            if (value >= paidBack):
-                return (d.getDateStamp() - initialDataPoint.getDateStamp()).days
+        paidBackIndex = np.flatnonzero(np.asarray(self.values) >= paidBack)
+        if len(paidBackIndex) > 0:
+            return (self.dates[paidBackIndex[0]] - self.dates[0]).days
 
         return -1
 
+    def getMaxDrawdown(self, isPercentage=True):
+        """
+            returns the largest drop in portfolio value from a previous peak
+            isPercentage: if true, return drop as a percentage of the peak, otherwise in dollars
+            returns 0 if the portfolio value never dropped
+        """
+        values = np.asarray(self.values, dtype=np.float64)
+        peaks = np.maximum.accumulate(values)
+        drawdowns = peaks - values
+        if (isPercentage):
+            nonZero = peaks != 0
+            drawdowns = np.divide(drawdowns, peaks, out=np.zeros_like(drawdowns), where=nonZero) * 100
+        maxDrawdown = drawdowns.max()
+
+        return float(maxDrawdown) if maxDrawdown > 0 else 0
+
 
     def getNumTrades(self, period, buyOrSell):
         """
@@ -136,44 +260,23 @@ class Analyser():
             period: enum Period.HOURLY, DAILY, WEEKLY, MONTHLY
             returns ordered list of tuples(datetime, numTrades)
         """
-        initialDataPoint = self.datalist.getEarliestDataPoint()
+        counts = self._countActions(buyOrSell)
         if period == Period.TOTAL:
-            retval = []
-            numTrades = 0
-            for d in self.datalist:
-                if d.getAction() == buyOrSell:
-                    numTrades += 1
-
-            value = [self.datalist.getLatestDataPoint().getDateStamp(), numTrades]
-            retval.append(value)
-
-        else:
-            retval = []
-            numTrades = 0
-            initialDate = initialDataPoint.getDateStamp()
-            endDate = (initialDate+relativedelta(months = self.monthlyDict[period], days=self.dailyDict[period]))
-
-            for d in self.datalist:
-                if (d.getDateStamp() <= endDate) and (d.getAction() == buyOrSell):
-                    numTrades += 1
-
-                #special case where exiting the market involves selling everything
-                if d.getAction() == Action.EXIT and buyOrSell == Action.SELL:
-                    numTrades += 1
-                if (d.getDateStamp() > endDate):
-
-                    value = [endDate, numTrades]
-                    if d.getAction() == buyOrSell:
-                        numTrades = 1
-                    else:
-                        numTrades = 0
-                    initialDate = d.getDateStamp()
-                    endDate = (initialDate+relativedelta(months = self.monthlyDict[period], days=self.dailyDict[period]))
-                    retval.append(value)
-
-            value = [self.datalist[-1].getDateStamp(), numTrades]
-            retval.append(value)
+            return [[self.dates[-1], counts[-1]]]
 
+        retval = []
+        starts, ends = self.getPeriods(period)
+        starts = starts + [len(self.dates)]
+        exitCounts = self._countActions(Action.EXIT) if buyOrSell == Action.SELL else None
+        for i in range(len(starts) - 1):
+            numTrades = counts[starts[i+1]] - counts[starts[i]]
+            if exitCounts is not None:
+                # exiting the market sells everything, so it counts as a sell, and an exit
+                # which starts a period is counted in the period before
+                first = starts[i] + 1 if i > 0 else 0
+                last = min(starts[i+1] + 1, len(self.dates))
+                numTrades += exitCounts[last] - exitCounts[first]
+            retval.append([ends[i] if i < len(ends) else self.dates[-1], numTrades])
 
         return retval
 
@@ -197,19 +300,50 @@ class Analyser():
 
     def getValue(self, period):
         if (period == Period.TOTAL):
-            return getFinalValue()
+            return self.getFinalValue()
 
-        retval = []
-        initialDate = self.datalist.getEarliestDataPoint().getDateStamp()
-        #this exposes internal implementation of BackTestHistory
-        for d in self.datalist:
-            if d.getDateStamp() > (initialDate+relativedelta(months = self.monthlyDict[period], days=self.dailyDict[period])):
-                finalValue = d.getPortfolioValue()
-                value = [(initialDate+relativedelta(months = self.monthlyDict[period], days=self.dailyDict[period])), finalValue]
-                retval.append(value)
-
-                initialDate = d.getDateStamp()
-        finalValue = d.getPortfolioValue()
-        value = [self.datalist[-1].getDateStamp(), finalValue]
-        retval.append(value)
+        # the value at the first data point after the end of each period
+        starts, ends = self.getPeriods(period)
+        retval = [[end, self.values[start]] for start, end in zip(starts[1:], ends)]
+        retval.append([self.dates[-1], self.values[-1]])
         return retval
+
+    def getStatistics(self):
+        """
+            returns a Statistics with every monthly and overall statistic the views show,
+            sharing the monthly periods and the counts of each action between them
+        """
+        statistics = Statistics()
+        monthlyGain = self.getGain(Period.MONTHLY, False)
+        statistics.monthlyDates = [x[0] for x in monthlyGain]
+        statistics.monthlyGain = [x[1] for x in monthlyGain]
+        statistics.monthlyGainPct = [x[1] for x in self.getGain(Period.MONTHLY, True)]
+        statistics.monthlyValue = [x[1] for x in self.getValue(Period.MONTHLY)]
+        statistics.monthlyBuys = [x[1] for x in self.getNumTrades(Period.MONTHLY, Action.BUY)]
+        statistics.monthlySells = [x[1] for x in self.getNumTrades(Period.MONTHLY, Action.SELL)]
+
+        statistics.finalValue = self.getFinalValue()
+        statistics.finalCash = self.datalist.getFinalCashAmount()
+        statistics.finalCoins = self.datalist.getFinalCointAmount()
+        statistics.finalPrice = self.datalist.getFinalMarketPrice()
+        statistics.gain = self.getGain(Period.TOTAL, False)
+        statistics.gainPct = self.getGain(Period.TOTAL, True)
+        statistics.payback = self.getPayBackPeriod()
+        statistics.numTrades = self.getSumTrades(Period.TOTAL)
+        statistics.maxDrawdown = self.getMaxDrawdown()
+        # kept up to date by the history as the bot ran
+        statistics.riskMetrics = self.datalist.getRiskMetrics().getSummary()
+        statistics.tradeIndex = tradeAnalysis.buildTradeIndex(self.datalist)
+        statistics.tradeSummary = statistics.tradeIndex.getSummary()
+        statistics.baselines = baselines.buildBaselines(self.dates, self.datalist.getMarketPriceHistory(), self.initialCapital)
+        statesPerYear = self.datalist.getRiskMetrics().getStatesPerYear()
+        for name, baseline in statistics.baselines.items():
+            statistics.baselineSummary[name] = baselines.trackingStatistics(self.values, baseline, statesPerYear)
+        return statistics
+
+    def getSummary(self):
+        """
+            returns a dict of the overall statistics of the backtest, keyed by a readable name
+            the values are plain numbers, so the dict can be written out as JSON
+        """
+        return self.getStatistics().getSummary()
@@ -0,0 +1,132 @@
+#!/usr/bin/python3
+'''
+Baselines a bot's results can be judged against: what the same money would have been worth
+trading the same coin over the same dates without a bot.
+
+Buy and hold spends everything on coins at the first state and keeps them. Dollar cost averaging
+splits the money into equal deposits, spending one at the first state of each calendar month.
+Both are worked out from the prices the bot saw, with array operations over the whole history,
+and neither pays fees, since the history doesn't record the bot's fee.
+
+The tracking statistics compare the returns between consecutive states of the bot with
+those of the baseline, annualised with the states per year of the run, as in core.riskMetrics.
+'''
+import math
+import numpy as np
+
+# name of each baseline, in the order they are shown
+buyAndHoldName = 'Buy and Hold'
+dollarCostAveragingName = 'Dollar Cost Averaging'
+
+# name in trackingStatistics : tool tip
+comparisons = {
+    'Baseline Final Value (USD)': 'Final value of the baseline portfolio',
+    'Baseline Gain (%)': 'Total gain of the baseline',
+    'Excess Return (%)': 'Gain of the bot minus the gain of the baseline',
+    'Tracking Error (%)': 'Annualised standard deviation of the bot\'s returns minus the baseline\'s',
+    'Information Ratio': 'Annualised mean of the bot\'s returns minus the baseline\'s, divided by the tracking error',
+    'Beta': 'How much the bot\'s returns move with the baseline\'s',
+    'Correlation': 'Correlation of the bot\'s returns with the baseline\'s',
+}
+
+
+class Baseline:
+    '''
+    The portfolio value of a baseline at each state of a BacktestHistory
+    '''
+    def __init__(self, name, dates, values):
+        self.name = name
+        self.dates = dates
+        self.values = values
+
+    def getName(self):
+        return self.name
+    def getDates(self):
+        return self.dates
+    def getValues(self):
+        return self.values
+    def getFinalValue(self):
+        return float(self.values[-1]) if len(self.values) else 0
+
+
+def buyAndHold(dates, prices, initialValue):
+    '''
+        returns the Baseline of spending initialValue on coins at the first price and keeping them
+    '''
+    prices = np.asarray(prices, dtype=np.float64)
+    coins = initialValue / prices[0] if len(prices) and prices[0] > 0 else 0
+    return Baseline(buyAndHoldName, dates, coins * prices)
+
+
+def dollarCostAveraging(dates, prices, initialValue):
+    '''
+        returns the Baseline of spending an equal part of initialValue at the first state of each
+        calendar month, keeping the rest as cash until then
+    '''
+    prices = np.asarray(prices, dtype=np.float64)
+    if len(prices) == 0:
+        return Baseline(dollarCostAveragingName, dates, prices)
+    # converting the dates to numpy is far slower than reading their months
+    months = np.fromiter((d.year * 12 + d.month for d in dates), dtype=np.int64, count=len(dates))
+    isDeposit = np.ones(len(months), dtype=bool)
+    isDeposit[1:] = months[1:] != months[:-1]
+    deposit = initialValue / np.count_nonzero(isDeposit)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bought = np.where(isDeposit & (prices > 0), deposit / prices, 0)
+    spent = np.cumsum(np.where(isDeposit & (prices > 0), deposit, 0))
+    return Baseline(dollarCostAveragingName, dates, initialValue - spent + np.cumsum(bought) * prices)
+
+
+def _stepReturns(values):
+    # the return from each state to the next, 0 after a state worth nothing
+    returns = np.zeros(max(len(values) - 1, 0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns[:] = np.where(values[:-1] > 0, values[1:] / values[:-1] - 1, 0)
+    return returns
+
+
+def trackingStatistics(values, baseline, statesPerYear):
+    '''
+        returns a dict of each of comparisons, comparing the portfolio values of a bot with a Baseline
+        Ratios which can't be calculated, such as the beta of a baseline which never changed value, are 0
+    '''
+    values = np.asarray(values, dtype=np.float64)
+    baselineValues = baseline.getValues()
+    initialValue = values[0] if len(values) else 0
+    gainPct = (values[-1] / initialValue - 1) * 100 if initialValue > 0 else 0
+    baselineGainPct = (baselineValues[-1] / initialValue - 1) * 100 if initialValue > 0 else 0
+
+    returns = _stepReturns(values)
+    baselineReturns = _stepReturns(baselineValues)
+    excess = returns - baselineReturns
+    trackingError = informationRatio = beta = correlation = 0
+    if len(excess) >= 2:
+        deviation = excess.std(ddof=1)
+        trackingError = deviation * math.sqrt(statesPerYear) * 100
+        if deviation > 0:
+            informationRatio = excess.mean() / deviation * math.sqrt(statesPerYear)
+        covariance = np.cov(returns, baselineReturns)
+        if covariance[1, 1] > 0:
+            beta = covariance[0, 1] / covariance[1, 1]
+            if covariance[0, 0] > 0:
+                correlation = covariance[0, 1] / math.sqrt(covariance[0, 0] * covariance[1, 1])
+    return {
+        'Baseline Final Value (USD)': baseline.getFinalValue(),
+        'Baseline Gain (%)': float(baselineGainPct),
+        'Excess Return (%)': float(gainPct - baselineGainPct),
+        'Tracking Error (%)': float(trackingError),
+        'Information Ratio': float(informationRatio),
+        'Beta': float(beta),
+        'Correlation': float(correlation),
+    }
+
+
+def buildBaselines(dates, prices, initialValue, withDollarCostAveraging=True):
+    '''
+        returns a dict of name : Baseline for the dates and market prices of a BacktestHistory,
+        starting with initialValue, the value of its first state
+    '''
+    result = {buyAndHoldName: buyAndHold(dates, prices, initialValue)}
+    if withDollarCostAveraging:
+        result[dollarCostAveragingName] = dollarCostAveraging(dates, prices, initialValue)
+    return result
@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+import os, time, threading
+from concurrent.futures import ProcessPoolExecutor
+from PyQt5.QtCore import QObject, pyqtSignal
+
+import bots
+from core import resultCache, timing
+from statistics.algorithmAnalysis import getStatistics
+
+
+class CompareRunner(QObject):
+    '''
+    Runs several bots over the same data in a pool of worker processes.
+    The data is handed to each worker once as it starts, not with every bot.
+    A signal is emitted as each bot finishes, in whatever order they finish,
+    so results can be shown without waiting for the slowest bot.
+    '''
+    botFinished = pyqtSignal(int, object)   # index of the bot, BacktestHistory
+    botFailed = pyqtSignal(int, object)     # index of the bot, exception raised by the bot
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.executor = None
+        self.botNames = []
+        self.remaining = 0
+        self.lock = threading.Lock()
+        self.span = None
+
+    def run(self, botList, data):
+        workers = min(len(botList), os.cpu_count() or 1)
+        self.botNames = [bot.getName() for bot in botList]
+        self.remaining = len(botList)
+        # until the last bot finishes
+        self.span = timing.Span('compare.total', bots=len(botList), workers=workers)
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_setData, initargs=(data,))
+        for i, bot in enumerate(botList):
+            future = self.executor.submit(runBot, bot.getName(), dict(bot.getParameters()))
+            # done callbacks run on a pool thread, emitting queues the result to the GUI thread
+            future.add_done_callback(lambda f, i=i: self._done(i, f))
+        self.executor.shutdown(wait=False)
+
+    def _done(self, index, future):
+        with self.lock:
+            self.remaining -= 1
+            if self.remaining == 0:
+                self.span.stop()
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            self.botFailed.emit(index, error)
+        else:
+            buySellData, seconds = future.result()
+            # timed in the worker process, so recorded here where the session's spans are kept
+            timing.record('compare.bot', seconds, bot=self.botNames[index], index=index)
+            self.botFinished.emit(index, buySellData)
+
+
+# the data every bot in this worker process runs over, set by _setData when the worker starts
+_data = None
+
+def _setData(data):
+    global _data
+    _data = data
+
+
+def runBot(botType, parameters):
+    # runs in a worker process, returns the BacktestHistory, with its statistics, and the time taken to get them
+    startTime = time.perf_counter()
+    bot = bots.createBot(botType, parameters)
+    buySellData = resultCache.runCached(bot, _data)
+    getStatistics(buySellData)
+    return buySellData, time.perf_counter() - startTime
@@ -7,24 +7,24 @@ from statistics.comparisonView import ComparisonView
 import fetchData
 from graph.graphView import GraphView
 from parameterView.formView import InputType
+from core import timing
 
 class CompareWindow(QWidget):
-    def __init__(self, historical, bot_1, bot_2, data1, data2, coin, botManager):
+    '''
+    Shows the results of several bots run over the same data.
+    The window is created before the bots have finished, and each bot's
+    results are added with addResult as they arrive.
+    '''
+    def __init__(self, historical, botNames, botList, coin):
         super().__init__()
         self.resize(700, 750)
-        self.setWindowTitle(coin + ': ' + bot_1 + ' vs ' + bot_2)
+        self.setWindowTitle(coin + ': ' + ' vs '.join(botNames))
         self.layout = QVBoxLayout()
         self.setLayout(self.layout)
-        self.bot_1 = bot_1
-        self.bot_2 = bot_2
-        self.botManager = botManager
+        self.botNames = botNames
 
         # Plotly graph
         self.graph = GraphView(self, historical, coin, True)
-        self.graph.addBuySellLines(data1, bot_1, 1)
-        self.graph.addBuySellLines(data2, bot_2, 2)
-        self.graph.addPortfolioValue(data1, bot_1, 1)
-        self.graph.addPortfolioValue(data2, bot_2, 2)
         self.graph.page().settings().setAttribute(QtWebEngineWidgets.QWebEngineSettings.ShowScrollBars, False)
         self.layout.addWidget(self.graph)
         self.graph.setMinimumWidth(500)
@@ -35,10 +35,16 @@ class CompareWindow(QWidget):
         self.logCheckBox.toggled.connect(self.graph.setLog)
         self.layout.addWidget(self.logCheckBox)
 
-        # Get the bot objects
-        bot1 = self.botManager.loadBot(self.bot_1)
-        bot2 = self.botManager.loadBot(self.bot_2)
-
-        self.table = ComparisonView(self, bot1, bot2)
-        self.table.showStats(data1, data2)
+        self.table = ComparisonView(self, botList, botNames)
         self.layout.addWidget(self.table)
+
+    def addResult(self, index, buySellData):
+        botName = self.botNames[index]
+        with timing.span('compare.graph', bot=botName, states=len(buySellData)):
+            self.graph.addBuySellLines(buySellData, botName, index+1, refresh=False)
+            self.graph.addPortfolioValue(buySellData, botName, index+1)
+        with timing.span('compare.statistics', bot=botName, states=len(buySellData)):
+            self.table.showStats(buySellData, index)
+
+    def addFailure(self, index, message):
+        self.table.showFailure(index, message)
@@ -1,18 +1,22 @@
 #!/usr/bin/python3
+import math
 from statistics.algorithmAnalysis import *
 from PyQt5 import QtCore
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QIcon, QFont, QBrush, QColor
 from PyQt5.QtWidgets import QHBoxLayout, QVBoxLayout, QTableWidget, QWidget, QTableWidgetItem, QGridLayout, QTabWidget, QHeaderView
 from parameterView.formView import InputType
+from core import riskMetrics
+from statistics import tradeAnalysis
 
 class ComparisonView(QWidget):
-    def __init__(self, parent, bot1, bot2):
+    def __init__(self, parent, botList, botNames):
         super(QWidget, self).__init__(parent)
         self.layout = QVBoxLayout(self)
         self.parent = parent
-        self.bot1 = bot1
-        self.bot2 = bot2
+        self.botList = botList
+        self.botNames = botNames
+        self.results = {} # column : dict of the numbers shown in that column
 
         self.tabs = QTabWidget()
         self.tab1 = QWidget()
@@ -36,7 +40,7 @@ class ComparisonView(QWidget):
         self.setLayout(self.layout)
 
     def buildParameterTable(self):
-        self.paramsTable = QTableWidget(0,2)
+        self.paramsTable = QTableWidget(0,len(self.botList))
         self.paramsTable.horizontalHeader().hide()
         self.paramsTable.horizontalHeader().setStretchLastSection(True)
 
@@ -46,15 +50,12 @@ class ComparisonView(QWidget):
         self.paramsTable.setColumnWidth(0,180)
         self.paramsTable.setRowCount(0)
 
-        # Collect a list of the parameters from both bots
-        bot1params = self.bot1.getParameters()
-        bot2params = self.bot2.getParameters()
+        # Collect a list of the parameters from all bots
         paramsList = []
-        for p in bot1params.keys():
-            paramsList.append(p)
-        for p in bot2params.keys():
-            if p not in paramsList:
-                paramsList.append(p)
+        for bot in self.botList:
+            for p in bot.getParameters().keys():
+                if p not in paramsList:
+                    paramsList.append(p)
 
         # Add each parameter to the tables left-most column
         row = 0
@@ -65,16 +66,14 @@ class ComparisonView(QWidget):
             self.paramsTable.setVerticalHeaderItem(row, widget)
             row += 1
 
-        bot1paramTypes = self.bot1.getParameterTypes()
-        bot2paramTypes = self.bot2.getParameterTypes()
-        for i in range(row):
-            p = self.paramsTable.verticalHeaderItem(i).text()
-            if p in bot1params:
-                item = self._makeTableWidget(bot1params[p], bot1paramTypes[p])
-                self.paramsTable.setItem(i, 0, item)
-            if p in bot2params:
-                item = self._makeTableWidget(bot2params[p], bot2paramTypes[p])
-                self.paramsTable.setItem(i, 1, item)
+        for col, bot in enumerate(self.botList):
+            botParams = bot.getParameters()
+            botParamTypes = bot.getParameterTypes()
+            for i in range(row):
+                p = self.paramsTable.verticalHeaderItem(i).text()
+                if p in botParams:
+                    item = self._makeTableWidget(botParams[p], botParamTypes[p])
+                    self.paramsTable.setItem(i, col, item)
 
     def _makeTableWidget(self, value, paramType):
         if (paramType == InputType.date):
@@ -91,16 +90,19 @@ class ComparisonView(QWidget):
             return QTableWidgetItem(str(value) + '%')
 
     def buildResultTable(self):
-        self.comparisonTable = QTableWidget(7, 3, None)
+        self.diffCol = len(self.botNames)
+        self.tradeRow = 7 + len(riskMetrics.objectives)
+        self.comparisonTable = QTableWidget(self.tradeRow + len(tradeAnalysis.directions), self.diffCol + 1, None)
         #  self.comparisonTable.verticalHeader().setStretchLastSection(True)
         self.comparisonTable.verticalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.comparisonTable.verticalHeader().setDefaultAlignment(Qt.AlignVCenter|Qt.AlignRight)
         self.comparisonTable.horizontalHeader().setStretchLastSection(True)
 
         # Column titles
-        self.comparisonTable.setHorizontalHeaderItem(0, QTableWidgetItem(self.parent.bot_1))
-        self.comparisonTable.setHorizontalHeaderItem(1, QTableWidgetItem(self.parent.bot_2))
-        self.comparisonTable.setHorizontalHeaderItem(2, QTableWidgetItem("Difference"))
+        for col, name in enumerate(self.botNames):
+            self.comparisonTable.setHorizontalHeaderItem(col, QTableWidgetItem(name))
+            self.comparisonTable.setItem(0, col, QTableWidgetItem("Running..."))
+        self.comparisonTable.setHorizontalHeaderItem(self.diffCol, QTableWidgetItem("Difference"))
 
         # Row titles
         finalValue = QTableWidgetItem("Final Value:")
@@ -133,6 +135,14 @@ class ComparisonView(QWidget):
         payback.setToolTip('Number of days to earn back initial capital')
         self.comparisonTable.setVerticalHeaderItem(6, payback)
 
+        for row, (name, objective) in enumerate(riskMetrics.objectives.items(), 7):
+            header = QTableWidgetItem(name + ':')
+            header.setToolTip(objective[2])
+            self.comparisonTable.setVerticalHeaderItem(row, header)
+
+        for row, name in enumerate(tradeAnalysis.directions, self.tradeRow):
+            self.comparisonTable.setVerticalHeaderItem(row, QTableWidgetItem(name + ':'))
+
     def insertFinalValue(self, value, col):
         self.comparisonTable.setItem(0, col, QTableWidgetItem(value))
 
@@ -169,122 +179,103 @@ class ComparisonView(QWidget):
             value = 'Payback not earned.'
         self.comparisonTable.setItem(6, col, QTableWidgetItem(value))
 
-    def showStats(self, backtestData_1, backtestData_2):
-        analyser_1 = Analyser(backtestData_1)
-        analyser_2 = Analyser(backtestData_2)
-
-        col = 0
-        for b in (backtestData_1, backtestData_2):
-            finalCash = str(round(b.getFinalCashAmount(), 3))
-            finalCoins = str(round(b.getFinalCointAmount(), 3))
-            finalPrice = str(round(b.getFinalMarketPrice(),3))
-            self.insertCashAmount(finalCash, col)
-            self.insertCoinAmount(finalCoins, col)
-            col += 1
-
-        col = 0
-        for analyser in (analyser_1, analyser_2):
-            finalGainDollars = analyser.getGain(Period.TOTAL, False)
-            finalGainPct = analyser.getGain(Period.TOTAL, True)
-            payback = analyser.getPayBackPeriod()
-            totalTrades = analyser.getSumTrades(Period.TOTAL)
-
-            self.insertFinalValue(str(round(analyser.getFinalValue(),3)), col)
-            self.insertOverallTrades(str(round(totalTrades,3)), col)
-            self.insertOverallGainDollars(str(round(finalGainDollars,3)), col)
-            self.insertOverallGainPercent(str(round(finalGainPct,3)), col)
-            self.insertPaybackPeriod(str(round(payback,3)), col)
-            col += 1
-
-        # Final Value Difference
-        finalValueDiff = round(abs(float(self.comparisonTable.item(0, 0).text()) - float(self.comparisonTable.item(0, 1).text())),2)
-        bot1FinalVal = float(self.comparisonTable.item(0, 0).text())
-        bot2FinalVal = float(self.comparisonTable.item(0, 1).text())
-        if bot1FinalVal < bot2FinalVal:
-            finalValStr = self.parent.bot_2 +" earned $" + str(finalValueDiff) +" more"
-        elif bot1FinalVal > bot2FinalVal:
-            finalValStr = self.parent.bot_1 +" earned $" + str(finalValueDiff) +" more"
-        else: finalValStr = "No difference"
-
-
-        #Cash Difference
-        finalCash1 = backtestData_1.getFinalCashAmount()
-        finalCash2 = backtestData_2.getFinalCashAmount()
-        finalCashDiff = round(abs(finalCash1 - finalCash2),3)
-        if finalCash1 < finalCash2:
-            finalCashStr = self.parent.bot_2 +" has $" + str(finalCashDiff) +" more cash"
-        elif finalCash1 > finalCash2:
-            finalCashStr = self.parent.bot_1 +" has $" + str(finalCashDiff) +" more cash"
-        else:
-            finalCashStr = "No Difference"
-
-
-        #Coin Difference
-        finalCoin1 = backtestData_1.getFinalCointAmount()
-        finalCoin2 = backtestData_2.getFinalCointAmount()
-
-        finalCoinDiff = round(abs(finalCoin1 - finalCoin2),3)
-        if finalCoin1 < finalCoin2:
-            finalCoinStr = self.parent.bot_2 +" has " + str(finalCoinDiff) +" more coins"
-        elif finalCoin1 > finalCoin2:
-            finalCoinStr = self.parent.bot_1 +" has " + str(finalCoinDiff) +" more coins"
-        else:
-            finalCoinStr = "No Difference"
-
-
-        # Trade Difference
-        tradesDiff = round(abs(float(self.comparisonTable.item(3, 0).text()) - float(self.comparisonTable.item(3, 1).text())),2)
-        bot1TradeVal = float(self.comparisonTable.item(3, 0).text())
-        bot2TradeVal = float(self.comparisonTable.item(3, 1).text())
-        if bot1TradeVal < bot2TradeVal:
-            tradeValStr = self.parent.bot_2 +" had " + str(tradesDiff) +" more trades"
-        elif bot1TradeVal > bot2TradeVal:
-            tradeValStr= self.parent.bot_1 +" had " + str(tradesDiff) +" more trades"
-        else: tradeValStr = "No difference"
-
-        # Gain in Dollars Difference
-        gainDollarsDiff = round(abs(float(self.comparisonTable.item(4, 0).text()) - float(self.comparisonTable.item(4, 1).text())),2)
-        bot1GainDoll = float(self.comparisonTable.item(4, 0).text())
-        bot2GainDoll = float(self.comparisonTable.item(4, 1).text())
-        if bot1GainDoll < bot2GainDoll:
-            gainValStr = self.parent.bot_2 +" earned $" + str(gainDollarsDiff) +" more gain"
-        elif bot1GainDoll > bot2GainDoll:
-            gainValStr= self.parent.bot_1 +" earned $" + str(gainDollarsDiff) +" more gain"
-        else: gainValStr = "No difference"
-
-        # Gain in Percentage Difference
-        gainPercentDiff = round(abs(float(self.comparisonTable.item(5, 0).text()) - float(self.comparisonTable.item(5, 1).text())),2)
-        bot1GainPerc = float(self.comparisonTable.item(5, 0).text())
-        bot2GainPerc = float(self.comparisonTable.item(5, 1).text())
-        if bot1GainPerc < bot2GainPerc:
-            gainPValStr = self.parent.bot_2 +" earned " + str(gainPercentDiff) +"% more gain"
-        elif bot1GainPerc > bot2GainPerc:
-            gainPValStr= self.parent.bot_1 +" earned " + str(gainPercentDiff) +"% more gain"
-        else: gainPValStr = "No difference"
-
-        # Payback Period Difference
-        bot1PayBackDiff = self.comparisonTable.item(6, 0).text()
-        bot2PayBackDiff = self.comparisonTable.item(6, 1).text()
-        if bot1PayBackDiff != 'Payback not earned.' and bot2PayBackDiff != 'Payback not earned.':
-            difference = abs(float(bot1PayBackDiff) - float(bot2PayBackDiff))
-            if float(bot1PayBackDiff) == float(bot2PayBackDiff):
-                paybackPeriodDiff = "No difference."
-            elif float(bot1PayBackDiff) < float(bot2PayBackDiff):
-                paybackPeriodDiff = self.parent.bot_1 + " reached payback " +str(difference) +" days sooner"
-            else:
-                paybackPeriodDiff = self.parent.bot_2 + " reached payback " +str(difference) +" days sooner"
-        elif bot1PayBackDiff != 'Payback not earned.' and bot2PayBackDiff == 'Payback not earned.':
-            paybackPeriodDiff = self.parent.bot_1 + " reached payback " + bot1PayBackDiff + " days sooner"
-        elif bot1PayBackDiff == 'Payback not earned.' and bot2PayBackDiff != 'Payback not earned.':
-            paybackPeriodDiff = self.parent.bot_2 + " reached payback " + bot2PayBackDiff + " days sooner"
-        else: paybackPeriodDiff = 'Not Applicable'
-
-
-
-        self.comparisonTable.setItem(0, 2, QTableWidgetItem(finalValStr))
-        self.comparisonTable.setItem(1, 2, QTableWidgetItem(finalCashStr))
-        self.comparisonTable.setItem(2, 2, QTableWidgetItem(finalCoinStr))
-        self.comparisonTable.setItem(3, 2, QTableWidgetItem(tradeValStr))
-        self.comparisonTable.setItem(4, 2, QTableWidgetItem(str(gainValStr)))
-        self.comparisonTable.setItem(5, 2, QTableWidgetItem(str(gainPValStr)))
-        self.comparisonTable.setItem(6, 2, QTableWidgetItem(str(paybackPeriodDiff)))
+    def showFailure(self, col, message):
+        self.comparisonTable.setItem(0, col, QTableWidgetItem(message))
+
+    def showStats(self, backtestData, col):
+        statistics = getStatistics(backtestData)
+
+        finalCash = statistics.finalCash
+        finalCoins = statistics.finalCoins
+        self.insertCashAmount(str(round(finalCash, 3)), col)
+        self.insertCoinAmount(str(round(finalCoins, 3)), col)
+
+        finalValue = round(statistics.finalValue,3)
+        finalGainDollars = round(statistics.gain,3)
+        finalGainPct = round(statistics.gainPct,3)
+        payback = round(statistics.payback,3)
+        totalTrades = round(statistics.numTrades,3)
+
+        self.insertFinalValue(str(finalValue), col)
+        self.insertOverallTrades(str(totalTrades), col)
+        self.insertOverallGainDollars(str(finalGainDollars), col)
+        self.insertOverallGainPercent(str(finalGainPct), col)
+        self.insertPaybackPeriod(str(payback), col)
+        for row, name in enumerate(riskMetrics.objectives, 7):
+            self.comparisonTable.setItem(row, col, QTableWidgetItem(str(round(statistics.riskMetrics[name], 3))))
+        for row, name in enumerate(tradeAnalysis.directions, self.tradeRow):
+            self.comparisonTable.setItem(row, col, QTableWidgetItem(str(round(statistics.tradeSummary[name], 3))))
+
+        self.results[col] = {
+            'finalValue': finalValue,
+            'finalCash': finalCash,
+            'finalCoins': finalCoins,
+            'trades': totalTrades,
+            'gainDollars': finalGainDollars,
+            'gainPct': finalGainPct,
+            'payback': payback,
+            'riskMetrics': statistics.riskMetrics,
+            'tradeSummary': statistics.tradeSummary,
+        }
+        self.showDifferences()
+
+    def _topTwo(self, key, cols):
+        # returns the columns with the largest and second largest value of key
+        ranked = sorted(cols, key=lambda c: self.results[c][key], reverse=True)
+        return ranked[0], ranked[1]
+
+    def _directedDifference(self, group, name, higherIsBetter):
+        # compares the best bot with the runner up, or the largest with the second largest if neither is better
+        ranked = sorted(self.results, key=lambda c: self.results[c][group][name], reverse=higherIsBetter is not False)
+        best, second = ranked[0], ranked[1]
+        diff = abs(self.results[best][group][name] - self.results[second][group][name])
+        if math.isnan(diff):
+            return "Not Applicable"
+        if math.isinf(diff):
+            return "{} has more".format(self.botNames[best]) if higherIsBetter is None else "{} is better".format(self.botNames[best])
+        diff = round(diff, 3)
+        if diff == 0:
+            return "No difference"
+        if higherIsBetter is None:
+            return "{} has {} more".format(self.botNames[best], diff)
+        return "{} is better by {}".format(self.botNames[best], diff)
+
+    def _difference(self, key, decimals, template):
+        best, second = self._topTwo(key, list(self.results.keys()))
+        diff = round(abs(self.results[best][key] - self.results[second][key]), decimals)
+        if diff == 0:
+            return "No difference"
+        return template.format(self.botNames[best], diff)
+
+    def _paybackDifference(self):
+        earned = [c for c in self.results if self.results[c]['payback'] >= 0]
+        if len(earned) == 0:
+            return 'Not Applicable'
+        earned.sort(key=lambda c: self.results[c]['payback'])
+        best = earned[0]
+        if len(earned) == 1:
+            return self.botNames[best] + " reached payback in " + str(self.results[best]['payback']) + " days; others did not"
+        difference = abs(self.results[best]['payback'] - self.results[earned[1]]['payback'])
+        if difference == 0:
+            return "No difference."
+        return self.botNames[best] + " reached payback " + str(difference) + " days sooner"
+
+    def showDifferences(self):
+        '''
+            fills the difference column, comparing the best bot with the runner up for each row
+        '''
+        if len(self.results) < 2:
+            return
+        rows = [
+            self._difference('finalValue', 2, "{} earned ${} more"),
+            self._difference('finalCash', 3, "{} has ${} more cash"),
+            self._difference('finalCoins', 3, "{} has {} more coins"),
+            self._difference('trades', 2, "{} had {} more trades"),
+            self._difference('gainDollars', 2, "{} earned ${} more gain"),
+            self._difference('gainPct', 2, "{} earned {}% more gain"),
+            self._paybackDifference(),
+        ]
+        rows += [self._directedDifference('riskMetrics', name, objective[1]) for name, objective in riskMetrics.objectives.items()]
+        rows += [self._directedDifference('tradeSummary', name, direction) for name, direction in tradeAnalysis.directions.items()]
+        for row, text in enumerate(rows):
+            self.comparisonTable.setItem(row, self.diffCol, QTableWidgetItem(text))
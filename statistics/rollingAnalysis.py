@@ -0,0 +1,138 @@
+#!/usr/bin/python3
+'''
+Rolling statistics of a backtest's portfolio value, over a window of the last few states.
+
+Every statistic is worked out in a single pass, whatever the size of the window:
+the sums of the returns and of their squares come from running totals, and the peak
+in the window from a deque of the states which could still become the peak.
+So they stay quick on minute data, where windows can be thousands of states long.
+Until the window is full each statistic is NaN.
+'''
+import math
+from collections import deque
+import numpy as np
+
+defaultWindow = 30
+
+# name shown on the graph and in exports : RollingAnalytics getter
+series = {
+    'Rolling Return (%)': 'getReturn',
+    'Rolling Volatility (%)': 'getVolatility',
+    'Rolling Sharpe Ratio': 'getSharpeRatio',
+    'Rolling Drawdown (%)': 'getDrawdown',
+}
+
+
+class RollingAnalytics:
+    '''
+    The rolling statistics of a BacktestHistory, one value per state, see rollingAnalytics
+    '''
+    def __init__(self, window, dates, returns, volatility, sharpe, drawdown):
+        self.window = window
+        self.dates = dates
+        self.returns = returns
+        self.volatility = volatility
+        self.sharpe = sharpe
+        self.drawdown = drawdown
+
+    def getWindow(self):
+        return self.window
+    def getDates(self):
+        return self.dates
+    def getReturn(self):
+        return self.returns
+    def getVolatility(self):
+        return self.volatility
+    def getSharpeRatio(self):
+        return self.sharpe
+    def getDrawdown(self):
+        return self.drawdown
+
+    def getRows(self):
+        '''
+            returns a list of dicts, one per state, with the date and each of the series,
+            None until the window is full
+        '''
+        columns = [(name, getattr(self, getter)()) for name, getter in series.items()]
+        rows = []
+        for i, date in enumerate(self.dates):
+            row = {'Date': date.strftime('%Y-%m-%d %H:%M:%S') if hasattr(date, 'strftime') else str(date)}
+            for name, values in columns:
+                row[name] = None if math.isnan(values[i]) else float(values[i])
+            rows.append(row)
+        return rows
+
+
+def windowSums(values, window):
+    '''
+        returns the sum of each window of values ending at each index, NaN before the first full window
+        The sums are differences of a running total
+    '''
+    sums = np.full(len(values), np.nan)
+    if window <= len(values):
+        total = np.concatenate(([0.0], np.cumsum(values)))
+        sums[window-1:] = total[window:] - total[:-window]
+    return sums
+
+def windowMaxima(values, window):
+    '''
+        returns the largest of each window of values ending at each index, NaN before the first full window
+        The deque holds the indexes of values larger than every value after them in the window,
+        so each value is added and removed once
+    '''
+    maxima = np.full(len(values), np.nan)
+    values = list(values)
+    candidates = deque()
+    for i, value in enumerate(values):
+        while candidates and values[candidates[-1]] <= value:
+            candidates.pop()
+        candidates.append(i)
+        if candidates[0] <= i - window:
+            candidates.popleft()
+        if i >= window - 1:
+            maxima[i] = values[candidates[0]]
+    return maxima
+
+
+def rollingAnalytics(buySellData, window=defaultWindow):
+    '''
+        returns the RollingAnalytics of a BacktestHistory over windows of window states
+        Returns are between consecutive states, volatility and the Sharpe ratio are annualised
+        with the states per year of the whole run, as in core.riskMetrics
+    '''
+    if window < 3:
+        # two returns are needed for a volatility
+        raise ValueError('the rolling window must be at least 3 states')
+    dates = buySellData.getDateHistory()
+    values = np.asarray(buySellData.getPortfolioValueHistory(), dtype=np.float64)
+    n = len(values)
+    statesPerYear = buySellData.getRiskMetrics().getStatesPerYear()
+
+    returns = np.full(n, np.nan)
+    drawdown = np.full(n, np.nan)
+    volatility = np.full(n, np.nan)
+    sharpe = np.full(n, np.nan)
+    if n >= window:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            start = values[:n-window+1]
+            returns[window-1:] = np.where(start > 0, values[window-1:] / start - 1, np.nan) * 100
+
+            peaks = windowMaxima(values, window)
+            drawdown = np.where(peaks > 0, (peaks - values) / peaks, 0) * 100
+            drawdown[:window-1] = np.nan
+
+            # the window of states holds window - 1 returns between them
+            stepReturns = np.zeros(n)
+            stepReturns[1:] = np.where(values[:-1] > 0, values[1:] / values[:-1] - 1, 0)
+            count = window - 1
+            sums = windowSums(stepReturns[1:], count)
+            squares = windowSums(stepReturns[1:] ** 2, count)
+            mean = sums / count
+            variance = np.maximum(squares - sums * mean, 0) / (count - 1)
+            deviation = np.sqrt(variance)
+            volatility[1:] = deviation * math.sqrt(statesPerYear) * 100
+            sharpe[1:] = np.where(deviation > 0, mean / deviation, 0) * math.sqrt(statesPerYear)
+            # NaN until the window is full
+            volatility[1:][np.isnan(sums)] = np.nan
+            sharpe[1:][np.isnan(sums)] = np.nan
+    return RollingAnalytics(window, dates, returns, volatility, sharpe, drawdown)
@@ -6,7 +6,10 @@ from PyQt5.QtWidgets import QScrollArea
 from PyQt5.QtGui import QIcon, QFont, QBrush, QColor
 from PyQt5.QtCore import pyqtSlot, Qt
 from bots import Action
+from core import timing, riskMetrics
+from statistics import baselines
 from datetime import datetime
+import math
 
 class StatisticsView(QWidget):
     def __init__(self, parent):
@@ -17,6 +20,7 @@ class StatisticsView(QWidget):
         self.tab1 = QWidget()
         self.tab2 = QWidget()
         self.tab3 = QWidget()
+        self.tab4 = QWidget()
         #  self.tabs.resize(100,100)
         self.tabs.setSizePolicy(QSizePolicy.Ignored,QSizePolicy.Ignored)
 
@@ -28,30 +32,38 @@ class StatisticsView(QWidget):
 
         self.tabs.addTab(scroll, "Description")
         self.tabs.addTab(self.tab1, "Bot Performance Statistics")
-        self.tabs.addTab(self.tab2, "30-day Breakdown")
+        self.tabs.addTab(self.tab2, "Monthly Breakdown")
         self.tabs.addTab(self.tab3, "Trading History")
+        self.tabs.addTab(self.tab4, "Baselines")
 
         self.tab1.layout = QHBoxLayout()
         self.tab2.layout = QHBoxLayout()
-        self.tab3.layout = QHBoxLayout()
+        self.tab3.layout = QVBoxLayout()
+        self.tab4.layout = QHBoxLayout()
 
         self.buildTableGeneral()
         self.buildTableMonthly()
         self.buildTableHistory()
+        self.buildTableBaselines()
 
         #putting table into tab
+        self.tradeSummary = QLabel()
+        self.tradeSummary.setWordWrap(True)
+        self.tab3.layout.addWidget(self.tradeSummary)
         self.tab3.layout.addWidget(self.tableHistory)
         self.tab3.setLayout(self.tab3.layout)
         self.tab1.layout.addWidget(self.tableGeneral)
         self.tab1.setLayout(self.tab1.layout)
         self.tab2.layout.addWidget(self.tableMonthly)
         self.tab2.setLayout(self.tab2.layout)
+        self.tab4.layout.addWidget(self.tableBaselines)
+        self.tab4.setLayout(self.tab4.layout)
         self.layout.addWidget(self.tabs)
         self.setLayout(self.layout)
 
 
     def buildTableHistory(self):
-        self.tableHistory = QTableWidget(1, 5)
+        self.tableHistory = QTableWidget(1, 8)
         self.tableHistory.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
 
         self.tableHistory.setHorizontalHeaderItem(0, QTableWidgetItem("Date"))
@@ -59,6 +71,34 @@ class StatisticsView(QWidget):
         self.tableHistory.setHorizontalHeaderItem(2, QTableWidgetItem("Coins Traded"))
         self.tableHistory.setHorizontalHeaderItem(3, QTableWidgetItem("Portfolio Value"))
         self.tableHistory.setHorizontalHeaderItem(4, QTableWidgetItem("Action"))
+        self.tableHistory.setHorizontalHeaderItem(5, QTableWidgetItem("Fee (USD)"))
+        profit = QTableWidgetItem("Profit (USD)")
+        profit.setToolTip('Money made by a sale, after fees, over the cost of the coins it sold, oldest coins first')
+        self.tableHistory.setHorizontalHeaderItem(6, profit)
+        daysHeld = QTableWidgetItem("Days Held")
+        daysHeld.setToolTip('Average number of days the coins a sale sold were held')
+        self.tableHistory.setHorizontalHeaderItem(7, daysHeld)
+
+    def buildTableBaselines(self):
+        self.tableBaselines = QTableWidget(len(baselines.comparisons), 0)
+        self.tableBaselines.verticalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.tableBaselines.verticalHeader().setDefaultAlignment(Qt.AlignVCenter|Qt.AlignRight)
+        self.tableBaselines.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        for row, (name, toolTip) in enumerate(baselines.comparisons.items()):
+            header = QTableWidgetItem(name + ':')
+            header.setToolTip(toolTip)
+            self.tableBaselines.setVerticalHeaderItem(row, header)
+
+    def showBaselines(self, baselineSummary):
+        '''takes a dict of baseline name : dict of comparison name : number, with a column for each baseline'''
+        self.tableBaselines.setColumnCount(len(baselineSummary))
+        for col, (baseline, summary) in enumerate(baselineSummary.items()):
+            self.tableBaselines.setHorizontalHeaderItem(col, QTableWidgetItem(baseline))
+            for row, name in enumerate(baselines.comparisons):
+                widget = QTableWidgetItem("{0:,.3f}".format(summary[name]))
+                if name == 'Excess Return (%)':
+                    widget.setForeground(QBrush(QColor(0,255,0) if summary[name] > 0 else QColor(255,0,0)))
+                self.tableBaselines.setItem(row, col, widget)
 
     def setTabDescription(self):
         self.tabs.setCurrentIndex(0)
@@ -87,7 +127,7 @@ class StatisticsView(QWidget):
         self.tabDescription.setText(description)
 
     def buildTableGeneral(self):
-        self.tableGeneral = QTableWidget(7, 1,None)
+        self.tableGeneral = QTableWidget(7 + len(riskMetrics.objectives), 1,None)
         self.tableGeneral.verticalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.tableGeneral.verticalHeader().setDefaultAlignment(Qt.AlignVCenter|Qt.AlignRight)
         self.tableGeneral.horizontalHeader().setStretchLastSection(True)
@@ -133,6 +173,11 @@ class StatisticsView(QWidget):
         payback.setToolTip(self.paybackToolTip)
         self.tableGeneral.setVerticalHeaderItem(6, payback)
 
+        for row, (name, objective) in enumerate(riskMetrics.objectives.items(), 7):
+            header = QTableWidgetItem(name + ':')
+            header.setToolTip(objective[2])
+            self.tableGeneral.setVerticalHeaderItem(row, header)
+
 
     def buildTableMonthly(self):
         #building tab 2
@@ -172,22 +217,25 @@ class StatisticsView(QWidget):
 
 
     def showHistory(self, backtestHistory):
-        row = 0
-        prevCoinsHeld = 0
-        self.tableHistory.setRowCount(0)
-        for d in backtestHistory:
-            if d.getAction() is not Action.NOACTION:
-                self.tableHistory.insertRow(row)
-                date = datetime.strftime(d.getDateStamp(), '%d/%m/%Y')
-                coinsTraded = "{0:,.3f}".format(d.getCoinAmount() - prevCoinsHeld)
-
-                self.tableHistory.setItem(row, 0, QTableWidgetItem(date))
-                self.tableHistory.setItem(row, 1, QTableWidgetItem(str("{0:,.3f}".format(d.getMarketPrice()))))
-                self.tableHistory.setItem(row, 2, QTableWidgetItem(str(coinsTraded)))
-                self.tableHistory.setItem(row, 3, QTableWidgetItem(str("{0:,.3f}".format(d.getPortfolioValue()))))
-                self.tableHistory.setItem(row, 4, QTableWidgetItem(d.getAction().name))
-                row += 1
-            prevCoinsHeld = d.getCoinAmount()
+        statistics = getStatistics(backtestHistory)
+        trades = statistics.tradeIndex
+        self.tradeSummary.setText('    '.join(name + ': ' + ("{0:,.3f}".format(value) if isinstance(value, float) else str(value))
+                                            for name, value in statistics.tradeSummary.items()))
+        self.tableHistory.setRowCount(len(trades))
+        profits = trades.getProfits()
+        daysHeld = trades.getDaysHeld()
+        for row, date in enumerate(trades.getDates()):
+            self.tableHistory.setItem(row, 0, QTableWidgetItem(datetime.strftime(date, '%d/%m/%Y')))
+            self.tableHistory.setItem(row, 1, QTableWidgetItem("{0:,.3f}".format(trades.getPrices()[row])))
+            self.tableHistory.setItem(row, 2, QTableWidgetItem("{0:,.3f}".format(trades.getCoinsTraded()[row])))
+            self.tableHistory.setItem(row, 3, QTableWidgetItem("{0:,.3f}".format(trades.getPortfolioValues()[row])))
+            self.tableHistory.setItem(row, 4, QTableWidgetItem(trades.getActions()[row].name))
+            self.tableHistory.setItem(row, 5, QTableWidgetItem("{0:,.3f}".format(trades.getFees()[row])))
+            if not math.isnan(profits[row]):
+                widget = QTableWidgetItem("{0:,.3f}".format(profits[row]))
+                widget.setForeground(QBrush(QColor(0,255,0)) if profits[row] > 0 else QBrush(QColor(255,0,0)))
+                self.tableHistory.setItem(row, 6, widget)
+                self.tableHistory.setItem(row, 7, QTableWidgetItem("{0:,.1f}".format(daysHeld[row])))
 
     def updateMonthlyColCount(self, newCount):
         colPosition = self.tableMonthly.columnCount()
@@ -281,6 +329,13 @@ class StatisticsView(QWidget):
         widget.setToolTip(self.numTradesToolTip)
         self.tableGeneral.setItem(3, 0, widget)
 
+    def updateRiskMetrics(self, values):
+        '''takes a dict of risk metric name : number. Updates relevant portion in table'''
+        for row, (name, objective) in enumerate(riskMetrics.objectives.items(), 7):
+            widget = QTableWidgetItem("{0:,.3f}".format(values[name]))
+            widget.setToolTip(objective[2])
+            self.tableGeneral.setItem(row, 0, widget)
+
     def updateFinalValue(self, value):
         '''takes a string. Updates relevant portion in table'''
         widget = QTableWidgetItem(value)
@@ -293,50 +348,44 @@ class StatisticsView(QWidget):
 
     def showStats(self, backtestData):
         self.resetTables()
-        analyser = Analyser(backtestData)
-        monthlyPeriod = Period.MONTHLY
-
-        #monthly stats
-        gainData = analyser.getGain(monthlyPeriod, False)
-
-        dates = [x[0] for x in gainData]
-        gainData = ["{0:,.3f}".format(x[1]) for x in gainData]
-        self.showMonthlyDates(dates)
-        self.showMonthylGainDollars(gainData)
-
-        valueData = analyser.getValue(monthlyPeriod)
-        valueData = ["{0:,.3f}".format(x[1]) for x in valueData]
-        self.showMonthlyValue(valueData)
-
-        gainData = analyser.getGain(monthlyPeriod, True)
-        gainData = ["{0:,.3f}".format(x[1]) for x in gainData]
-        self.showMonthylGainPct(gainData)
-
-        numBuys = analyser.getNumTrades(monthlyPeriod, Action.BUY)
-        self.showMonthlyBuys([x[1] for x in numBuys])
-
-        numSells = analyser.getNumTrades(monthlyPeriod, Action.SELL)
-        self.showMonthlySells(x[1] for x in numSells)
-
-
-        #general stats
-
-        finalGainDollars = "{0:,.3f}".format(analyser.getGain(Period.TOTAL, False))
-        finalGainPct = "{0:,.3f}".format(analyser.getGain(Period.TOTAL, True))
-        finalValue = "{0:,.3f}".format(analyser.getFinalValue())
-        finalCash = "{0:,.3f}".format(backtestData.getFinalCashAmount())
-        finalCoins = "{0:,.3f}".format(backtestData.getFinalCointAmount())
-        finalPrice = "{0:,.3f}".format(backtestData.getFinalMarketPrice())
-        self.updateFinalValue(finalValue)
-        payback = analyser.getPayBackPeriod()
-        totalTrades = analyser.getSumTrades(Period.TOTAL)
-
-        self.updateCashAmount(str(finalCash))
-        self.updateCoinAmount(str(finalCoins) + ' @ $' + str(finalPrice) + 'ea.')
-        self.updatePaybackPeriod(str(payback))
-        self.updateOverallGainDollars(finalGainDollars)
-        self.updateOverallGainPercent(finalGainPct)
-        self.updateOverallTrades(str(totalTrades))
+
+        # usually already calculated by the worker which ran the bot
+        with timing.span('statistics.analyser', states=len(backtestData)):
+            statistics = getStatistics(backtestData)
+
+            #general stats
+            finalGainDollars = "{0:,.3f}".format(statistics.gain)
+            finalGainPct = "{0:,.3f}".format(statistics.gainPct)
+            finalValue = "{0:,.3f}".format(statistics.finalValue)
+            finalCash = "{0:,.3f}".format(statistics.finalCash)
+            finalCoins = "{0:,.3f}".format(statistics.finalCoins)
+            finalPrice = "{0:,.3f}".format(statistics.finalPrice)
+            payback = statistics.payback
+            totalTrades = statistics.numTrades
+
+        with timing.span('statistics.tables', months=len(statistics.monthlyDates)):
+            gainData = ["{0:,.3f}".format(x) for x in statistics.monthlyGain]
+            self.showMonthlyDates(statistics.monthlyDates)
+            self.showMonthylGainDollars(gainData)
+
+            valueData = ["{0:,.3f}".format(x) for x in statistics.monthlyValue]
+            self.showMonthlyValue(valueData)
+
+            gainData = ["{0:,.3f}".format(x) for x in statistics.monthlyGainPct]
+            self.showMonthylGainPct(gainData)
+
+            self.showMonthlyBuys(statistics.monthlyBuys)
+            self.showMonthlySells(statistics.monthlySells)
+
+            self.updateFinalValue(finalValue)
+            self.updateCashAmount(str(finalCash))
+            self.updateCoinAmount(str(finalCoins) + ' @ $' + str(finalPrice) + 'ea.')
+            self.updatePaybackPeriod(str(payback))
+            self.updateOverallGainDollars(finalGainDollars)
+            self.updateOverallGainPercent(finalGainPct)
+            self.updateOverallTrades(str(totalTrades))
+            self.updateRiskMetrics(statistics.riskMetrics)
+            self.showBaselines(statistics.baselineSummary)
 
 
     def showMonthlyDates(self, data):
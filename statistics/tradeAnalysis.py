@@ -0,0 +1,220 @@
+#!/usr/bin/python3
+'''
+An index of the trades in a backtest, and the profit of each sale.
+
+Every buy adds a lot of coins, and every sell or exit sells the oldest coins first.
+Working along the total number of coins ever bought, the cost of the first q coins is
+piecewise linear in q, so the cost of the coins a sale used is found by interpolating
+that cost at the totals sold before and after it. Their purchase date is found the same way,
+from the total of coins times purchase date, giving the average time the coins were held.
+
+The bots take the fee of a buy or sell from the cash after recording the trade, so it shows
+as an unexplained drop in cash at the next state, while an exit's fee is in its own state.
+The fees are found from those drops, and are part of the cost of the coins bought,
+or taken from the money a sale made.
+'''
+import numpy as np
+
+from bots import Action
+
+secondsPerDay = 24 * 60 * 60
+
+# name in TradeIndex.getSummary : True if larger values are better, False if smaller are, None if neither
+directions = {
+    'Sales': None,
+    'Win Rate (%)': True,
+    'Profit Factor': True,
+    'Average Profit per Sale ($)': True,
+    'Average Days Held': None,
+    'Longest Winning Streak': True,
+    'Longest Losing Streak': False,
+    'Fees Paid ($)': False,
+}
+
+
+class TradeIndex:
+    '''
+    The trades of a BacktestHistory, one entry per trade in each list, see buildTradeIndex
+    The profit and days held are NaN for buys
+    '''
+    def __init__(self):
+        self.rows = np.zeros(0, dtype=np.int64)     # index of the trade's state in the history
+        self.dates = []
+        self.actions = []
+        self.prices = np.zeros(0)
+        self.coinsTraded = np.zeros(0)              # positive for buys, negative for sales
+        self.portfolioValues = np.zeros(0)
+        self.fees = np.zeros(0)
+        self.profits = np.zeros(0)
+        self.daysHeld = np.zeros(0)
+        self.openCoins = 0
+
+    def __len__(self):
+        return len(self.rows)
+
+    def getRows(self):
+        return self.rows
+    def getDates(self):
+        return self.dates
+    def getActions(self):
+        return self.actions
+    def getPrices(self):
+        return self.prices
+    def getCoinsTraded(self):
+        return self.coinsTraded
+    def getPortfolioValues(self):
+        return self.portfolioValues
+    def getFees(self):
+        return self.fees
+    def getProfits(self):
+        return self.profits
+    def getDaysHeld(self):
+        return self.daysHeld
+    def getOpenCoins(self):
+        '''
+            returns the coins bought but not sold by the end of the backtest
+        '''
+        return self.openCoins
+
+    def getSaleProfits(self):
+        return self.profits[~np.isnan(self.profits)]
+
+    def getNumSales(self):
+        return len(self.getSaleProfits())
+
+    def getWinRate(self):
+        '''
+            returns the percentage of sales which made a profit, 0 if nothing was sold
+        '''
+        profits = self.getSaleProfits()
+        if len(profits) == 0:
+            return 0
+        return float(np.count_nonzero(profits > 0) / len(profits) * 100)
+
+    def getProfitFactor(self):
+        '''
+            returns the total profit of the winning sales over the total loss of the losing sales,
+            infinite if nothing lost money, and 0 if nothing was sold
+        '''
+        profits = self.getSaleProfits()
+        losses = -profits[profits < 0].sum()
+        wins = profits[profits > 0].sum()
+        if losses == 0:
+            return float('inf') if wins > 0 else 0
+        return float(wins / losses)
+
+    def getAverageProfit(self):
+        profits = self.getSaleProfits()
+        return float(profits.mean()) if len(profits) else 0
+
+    def getAverageDaysHeld(self):
+        held = self.daysHeld[~np.isnan(self.daysHeld)]
+        return float(held.mean()) if len(held) else 0
+
+    def getLongestStreaks(self):
+        '''
+            returns (most winning sales in a row, most losing sales in a row)
+        '''
+        profits = self.getSaleProfits()
+        return _longestRun(profits > 0), _longestRun(profits < 0)
+
+    def getSummary(self):
+        '''
+            returns a dict of the statistics of the sales, keyed by a readable name
+        '''
+        winStreak, lossStreak = self.getLongestStreaks()
+        return {
+            'Sales': self.getNumSales(),
+            'Win Rate (%)': self.getWinRate(),
+            'Profit Factor': self.getProfitFactor(),
+            'Average Profit per Sale ($)': self.getAverageProfit(),
+            'Average Days Held': self.getAverageDaysHeld(),
+            'Longest Winning Streak': winStreak,
+            'Longest Losing Streak': lossStreak,
+            'Fees Paid ($)': float(self.fees.sum()),
+        }
+
+
+def _longestRun(flags):
+    # the most Trues in a row, from where each run of Trues starts and stops
+    if len(flags) == 0:
+        return 0
+    edges = np.diff(np.concatenate(([0], flags.astype(np.int8), [0])))
+    starts, stops = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    return int((stops - starts).max()) if len(starts) else 0
+
+
+def buildTradeIndex(buySellData):
+    '''
+        returns the TradeIndex of a BacktestHistory
+    '''
+    index = TradeIndex()
+    n = len(buySellData)
+    if n == 0:
+        return index
+    actions = buySellData.getActionHistory()
+    dates = buySellData.getDateHistory()
+    cash = np.asarray(buySellData.getCashBalanceHistory(), dtype=np.float64)
+    coins = np.asarray(buySellData.getCoinHistory(), dtype=np.float64)
+    prices = np.asarray(buySellData.getMarketPriceHistory(), dtype=np.float64)
+    values = prices * coins + cash
+    # seconds since the first state, as seconds since 1970 are too big to add up as floats without losing precision
+    seconds = np.array(dates, dtype='datetime64[s]')
+    seconds = (seconds - seconds[0]).astype(np.float64)
+
+    codes = np.array([a.value for a in actions])
+    coinsTraded = np.diff(coins, prepend=0.0)
+    isBuy = codes == Action.BUY.value
+    isExit = codes == Action.EXIT.value
+    # some bots record an exit when they have no coins left to sell
+    isSale = ((codes == Action.SELL.value) | isExit) & (coinsTraded < 0)
+    rows = np.flatnonzero(codes != Action.NOACTION.value)
+
+    # cash which isn't explained by the coins traded at the market price, in each state
+    fees = np.zeros(n)
+    fees[1:] = -(np.diff(cash) + coinsTraded[1:] * prices[1:])
+    # leaving out rounding errors
+    fees[np.abs(fees) < 1e-9 * np.maximum(np.abs(cash), 1)] = 0
+    # a buy or sell's fee shows at the next state, an exit's in its own,
+    # and an exit straight after a trade takes the fees of both.
+    # Bots can charge a fee for a sell with no coins to sell, which is kept but has no profit
+    previousIsTrade = np.zeros(n, dtype=bool)
+    previousIsTrade[1:] = (codes != Action.NOACTION.value)[:-1] & ~isExit[:-1]
+    feeOwner = np.where(isExit, np.arange(n), np.where(previousIsTrade, np.arange(n) - 1, -1))
+    owned = feeOwner >= 0
+    tradeFees = np.zeros(n)
+    np.add.at(tradeFees, feeOwner[owned], fees[owned])
+
+    # the cost and coin-seconds of the first q coins bought, along the total bought
+    bought = np.where(isBuy, coinsTraded, 0)
+    totalBought = np.concatenate(([0.0], np.cumsum(bought[isBuy])))
+    totalCost = np.concatenate(([0.0], np.cumsum(bought[isBuy] * prices[isBuy] + tradeFees[isBuy])))
+    totalCoinSeconds = np.concatenate(([0.0], np.cumsum(bought[isBuy] * seconds[isBuy])))
+
+    sold = np.where(isSale, -coinsTraded, 0)
+    soldAfter = np.cumsum(sold[isSale])
+    soldBefore = soldAfter - sold[isSale]
+    cost = np.interp(soldAfter, totalBought, totalCost) - np.interp(soldBefore, totalBought, totalCost)
+    coinSeconds = (np.interp(soldAfter, totalBought, totalCoinSeconds)
+                   - np.interp(soldBefore, totalBought, totalCoinSeconds))
+    saleCoins = sold[isSale]
+    proceeds = saleCoins * prices[isSale] - tradeFees[isSale]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        boughtAt = np.where(saleCoins > 0, coinSeconds / saleCoins, seconds[isSale])
+
+    profits = np.full(n, np.nan)
+    profits[isSale] = proceeds - cost
+    daysHeld = np.full(n, np.nan)
+    daysHeld[isSale] = (seconds[isSale] - boughtAt) / secondsPerDay
+
+    index.rows = rows
+    index.dates = [dates[i] for i in rows]
+    index.actions = [actions[i] for i in rows]
+    index.prices = prices[rows]
+    index.coinsTraded = coinsTraded[rows]
+    index.portfolioValues = values[rows]
+    index.fees = tradeFees[rows]
+    index.profits = profits[rows]
+    index.daysHeld = daysHeld[rows]
+    index.openCoins = float(max(totalBought[-1] - (soldAfter[-1] if len(soldAfter) else 0), 0))
+    return index